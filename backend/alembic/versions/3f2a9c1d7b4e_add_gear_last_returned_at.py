@@ -0,0 +1,39 @@
+"""add_gear_last_returned_at
+
+Revision ID: 3f2a9c1d7b4e
+Revises: c8548a7b7b79
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3f2a9c1d7b4e'
+down_revision = 'c8548a7b7b79'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('gear', sa.Column('last_returned_at', sa.TIMESTAMP, nullable=True))
+
+    # Backfill: час останнього повернення для кожної одиниці спорядження
+    op.execute("""
+        UPDATE gear
+        SET last_returned_at = r.last_returned_at
+        FROM (
+            SELECT gear_id, MAX(return_at) AS last_returned_at
+            FROM rentals
+            WHERE return_at IS NOT NULL
+            GROUP BY gear_id
+        ) r
+        WHERE gear.id = r.gear_id
+    """)
+
+    op.create_index('idx_gear_owner_status_last_returned', 'gear', ['owner_id', 'status', 'last_returned_at'])
+
+
+def downgrade():
+    op.drop_index('idx_gear_owner_status_last_returned', table_name='gear')
+    op.drop_column('gear', 'last_returned_at')
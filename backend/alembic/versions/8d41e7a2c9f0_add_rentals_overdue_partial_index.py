@@ -0,0 +1,29 @@
+"""add_rentals_overdue_partial_index
+
+Revision ID: 8d41e7a2c9f0
+Revises: 3f2a9c1d7b4e
+Create Date: 2026-10-18 11:04:17.552190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '8d41e7a2c9f0'
+down_revision = '3f2a9c1d7b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Частковий індекс лише по неповернутих орендах: прострочені та keyset-пагінація по (due_at, id)
+    op.create_index(
+        'idx_rentals_owner_due_active',
+        'rentals',
+        ['owner_id', 'due_at', 'id'],
+        postgresql_where=sa.text('return_at IS NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('idx_rentals_owner_due_active', table_name='rentals')
@@ -0,0 +1,50 @@
+"""add_rental_daily_stats
+
+Revision ID: a4c7e2f9d813
+Revises: e7a9b1c4d602
+Create Date: 2026-10-18 15:41:09.502317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'a4c7e2f9d813'
+down_revision = 'e7a9b1c4d602'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Денний rollup оренд для аналітики виручки та паттернів за часом
+    op.create_table(
+        'rental_daily_stats',
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('owners.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('hour', sa.SmallInteger(), nullable=False),
+        sa.Column('gear_type', postgresql.ENUM(name='gear_type_enum', create_type=False), nullable=False),
+        sa.Column('rental_type', postgresql.ENUM(name='rental_type_enum', create_type=False), nullable=False),
+        sa.Column('rental_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('revenue', sa.Numeric(14, 2), server_default='0', nullable=False),
+        sa.Column('returned_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('condition_score_sum', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('owner_id', 'day', 'hour', 'gear_type', 'rental_type'),
+    )
+
+    # Backfill з наявних оренд
+    op.execute("""
+        INSERT INTO rental_daily_stats (
+            owner_id, day, hour, gear_type, rental_type,
+            rental_count, revenue, returned_count, condition_score_sum
+        )
+        SELECT r.owner_id, date(r.created_at), CAST(extract(hour FROM r.created_at) AS integer), g.type, r.rental_type,
+               count(r.id), coalesce(sum(r.total_price), 0), count(r.return_at), coalesce(sum(r.condition_score), 0)
+        FROM rentals r
+        JOIN gear g ON g.id = r.gear_id
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def downgrade():
+    op.drop_table('rental_daily_stats')
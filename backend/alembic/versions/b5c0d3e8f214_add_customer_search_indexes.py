@@ -0,0 +1,48 @@
+"""add_customer_search_indexes
+
+Revision ID: b5c0d3e8f214
+Revises: 8d41e7a2c9f0
+Create Date: 2026-10-18 12:26:53.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b5c0d3e8f214'
+down_revision = '8d41e7a2c9f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm - триграмний пошук, btree_gin - owner_id у складі GIN індексу
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # Нормалізований телефон (лише цифри), підтримується самою БД
+    op.add_column('customers', sa.Column(
+        'phone_digits',
+        sa.String(20),
+        sa.Computed("regexp_replace(phone, '\\D', '', 'g')", persisted=True),
+    ))
+
+    op.create_index(
+        'idx_customers_owner_name_trgm',
+        'customers',
+        ['owner_id', 'full_name'],
+        postgresql_using='gin',
+        postgresql_ops={'full_name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'idx_customers_owner_phone_digits',
+        'customers',
+        ['owner_id', 'phone_digits'],
+        postgresql_ops={'phone_digits': 'varchar_pattern_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('idx_customers_owner_phone_digits', table_name='customers')
+    op.drop_index('idx_customers_owner_name_trgm', table_name='customers')
+    op.drop_column('customers', 'phone_digits')
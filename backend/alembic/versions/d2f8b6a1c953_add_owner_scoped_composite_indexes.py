@@ -0,0 +1,70 @@
+"""add_owner_scoped_composite_indexes
+
+Revision ID: d2f8b6a1c953
+Revises: a4c7e2f9d813
+Create Date: 2026-10-18 16:20:44.871205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd2f8b6a1c953'
+down_revision = 'a4c7e2f9d813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Складені індекси під owner-scoped запити: owner_id першою колонкою, далі фільтр / сортування,
+    # INCLUDE - колонки агрегатів, щоб аналітика читалась index-only scan без звернення до таблиці
+
+    # Список оренд (keyset по created_at, id) та виручка за період на dashboard
+    op.create_index(
+        'idx_rentals_owner_created', 'rentals', ['owner_id', 'created_at', 'id'],
+        postgresql_include=['total_price'],
+    )
+    # Агрегати по клієнтах: топ клієнтів, сегментація, проблемні клієнти
+    op.create_index(
+        'idx_rentals_owner_customer', 'rentals', ['owner_id', 'customer_id'],
+        postgresql_include=['total_price', 'created_at', 'condition_score'],
+    )
+    # Агрегати по спорядженню: популярне спорядження, продуктивність брендів
+    op.create_index(
+        'idx_rentals_owner_gear', 'rentals', ['owner_id', 'gear_id'],
+        postgresql_include=['total_price', 'condition_score'],
+    )
+
+    # Список спорядження (keyset по created_at, id) та спорядження бренду
+    # (owner_id, status) покриває idx_gear_owner_status_last_returned
+    op.create_index('idx_gear_owner_created', 'gear', ['owner_id', 'created_at', 'id'])
+    op.create_index('idx_gear_owner_brand', 'gear', ['owner_id', 'brand_id'])
+
+    # Список клієнтів (keyset по full_name, id); перевірку унікальності телефону
+    # обслуговує індекс обмеження uq_customers_phone_owner (phone, owner_id)
+    op.create_index('idx_customers_owner_name', 'customers', ['owner_id', 'full_name', 'id'])
+
+    # Список брендів (keyset по name, id) та перевірка унікальності назви
+    op.create_index('idx_brands_owner_name', 'brands', ['owner_id', 'name', 'id'])
+
+    # Одноколонкові індекси по owner_id - префікс складених, лише уповільнюють запис
+    # (у c8548a7b7b79 створюються лише для таблиць без owner_id, тому можуть бути відсутні)
+    op.drop_index('idx_rentals_owner', table_name='rentals', if_exists=True)
+    op.drop_index('idx_gear_owner', table_name='gear', if_exists=True)
+    op.drop_index('idx_customers_owner', table_name='customers', if_exists=True)
+    op.drop_index('idx_brands_owner', table_name='brands', if_exists=True)
+
+
+def downgrade():
+    op.create_index('idx_brands_owner', 'brands', ['owner_id'])
+    op.create_index('idx_customers_owner', 'customers', ['owner_id'])
+    op.create_index('idx_gear_owner', 'gear', ['owner_id'])
+    op.create_index('idx_rentals_owner', 'rentals', ['owner_id'])
+
+    op.drop_index('idx_brands_owner_name', table_name='brands')
+    op.drop_index('idx_customers_owner_name', table_name='customers')
+    op.drop_index('idx_gear_owner_brand', table_name='gear')
+    op.drop_index('idx_gear_owner_created', table_name='gear')
+    op.drop_index('idx_rentals_owner_gear', table_name='rentals')
+    op.drop_index('idx_rentals_owner_customer', table_name='rentals')
+    op.drop_index('idx_rentals_owner_created', table_name='rentals')
@@ -0,0 +1,53 @@
+"""add_single_active_rental_per_gear
+
+Revision ID: e7a9b1c4d602
+Revises: b5c0d3e8f214
+Create Date: 2026-10-18 13:02:35.128640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e7a9b1c4d602'
+down_revision = 'b5c0d3e8f214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Старий seed fallback міг створити кілька активних оренд одного gear - на таких даних індекс не створиться.
+    # Залишається відкритою лише остання (за start_at, id); попередні закриваються моментом початку
+    # наступної оренди того ж gear з позначкою в comment, last_returned_at gear оновлюється
+    op.execute("""
+        WITH active AS (
+            SELECT id, lead(start_at) OVER (PARTITION BY gear_id ORDER BY start_at, id) AS next_start_at
+            FROM rentals
+            WHERE return_at IS NULL
+        ),
+        closed AS (
+            UPDATE rentals r
+            SET return_at = a.next_start_at,
+                comment = concat_ws(E'\\n', r.comment, 'Закрито міграцією e7a9b1c4d602: дублікат активної оренди спорядження')
+            FROM active a
+            WHERE r.id = a.id AND a.next_start_at IS NOT NULL
+            RETURNING r.gear_id, r.return_at
+        )
+        UPDATE gear g
+        SET last_returned_at = c.return_at
+        FROM (SELECT gear_id, max(return_at) AS return_at FROM closed GROUP BY gear_id) c
+        WHERE g.id = c.gear_id AND (g.last_returned_at IS NULL OR g.last_returned_at < c.return_at)
+    """)
+
+    # Не більше однієї активної (неповернутої) оренди на одиницю спорядження
+    op.create_index(
+        'uq_rentals_gear_active',
+        'rentals',
+        ['gear_id'],
+        unique=True,
+        postgresql_where=sa.text('return_at IS NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('uq_rentals_gear_active', table_name='rentals')
@@ -0,0 +1,32 @@
+"""add_owner_segment_thresholds
+
+Revision ID: f3b9d7c2a610
+Revises: d2f8b6a1c953
+Create Date: 2026-10-18 12:40:17.502913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f3b9d7c2a610'
+down_revision = 'd2f8b6a1c953'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Пороги сегментації клієнтів, налаштовувані кожним власником (за замовчуванням як раніше: 5 та 2)
+    op.add_column('owners', sa.Column('segment_vip_min_rentals', sa.SmallInteger, nullable=False, server_default='5'))
+    op.add_column('owners', sa.Column('segment_regular_min_rentals', sa.SmallInteger, nullable=False, server_default='2'))
+    op.create_check_constraint(
+        'check_segment_thresholds',
+        'owners',
+        'segment_regular_min_rentals >= 1 AND segment_vip_min_rentals > segment_regular_min_rentals'
+    )
+
+
+def downgrade():
+    op.drop_constraint('check_segment_thresholds', 'owners', type_='check')
+    op.drop_column('owners', 'segment_regular_min_rentals')
+    op.drop_column('owners', 'segment_vip_min_rentals')
@@ -1,31 +1,110 @@
-from app.database import get_db, engine, Base
-from app.models import Owner, Gear, Customer, Rental, Brand, GearType, GearStatus, RentalType
-from app.schemas import OwnerRegister, OwnerLogin, GearCreate, CustomerCreate, CustomerUpdate, RentalCreate, RentalReturn, BrandCreate, BrandUpdate
-from app.auth import hash_password, verify_password, create_token, verify_token
+from app.database import get_db, get_async_db, engine, async_engine, Base, get_pool_status, DB_ASYNC
+from app.models import Owner, Gear, Customer, Rental, Brand, RentalDailyStats, GearType, GearStatus, RentalType
+from app.schemas import OwnerRegister, OwnerLogin, OwnerIdentity, SegmentationSettings, GearCreate, CustomerCreate, CustomerUpdate, RentalCreate, RentalBatchCreate, RentalReturn, RentalBatchReturnItem, RentalBatchReturn, BrandCreate, BrandUpdate
+from app.auth import hash_password, verify_password, verify_and_update_password, create_token, verify_token, PasswordPoolBusy, shutdown_password_pool
+from app.rentals import rental_details_options, filter_rentals_by_status, format_rental_response, validate_rental_terms, calculate_rental_terms, reserve_gear_statement, validate_condition_score, gear_status_after_return
+from app.customers import apply_customer_search, normalize_phone_digits
+from app.cache import analytics_cache, cached_analytics, token_cache, owner_cache
+from app.pagination import encode_cursor, decode_cursor, parse_cursor_datetime, parse_cursor_value, paginate, paginate_async, MAX_PAGE_SIZE
+from app.importer import import_gear_csv, import_customers_csv
+from app.rollups import apply_rental_stats, rebuild_rental_stats, stats_since
+from app.instrumentation import QueryStatsMiddleware, instrument_engine, set_request_owner, request_query_stats
+from app.analytics_engine import rental_engine
+from app.analytics import brand_stats, top_gear_stats, top_customer_stats, low_condition_customer_stats, compute_sections, customer_segments, customer_segment_rows, segment_customer_rows, validate_segment_limit, encode_segment_cursor, decode_segment_cursor, format_segment_customer, CUSTOMER_SEGMENTS, CUSTOMER_SEGMENT_TOP_N
+from app.metrics import MetricsMiddleware, render_metrics
+from app.export import stream_export, filter_created_range, rental_export_statement, customer_export_statement, gear_export_statement, RENTAL_EXPORT_COLUMNS, CUSTOMER_EXPORT_COLUMNS, GEAR_EXPORT_COLUMNS
 
 __all__ = [
     "get_db",
+    "get_async_db",
     "engine",
+    "async_engine",
+    "DB_ASYNC",
     "Base",
+    "get_pool_status",
     "Owner",
     "Gear",
     "Customer",
     "Rental",
     "Brand",
+    "RentalDailyStats",
     "GearType",
     "GearStatus",
     "RentalType",
     "OwnerRegister",
     "OwnerLogin",
+    "OwnerIdentity",
+    "SegmentationSettings",
     "GearCreate",
     "CustomerCreate",
     "CustomerUpdate",
     "RentalCreate",
+    "RentalBatchCreate",
     "RentalReturn",
+    "RentalBatchReturnItem",
+    "RentalBatchReturn",
     "BrandCreate",
     "BrandUpdate",
     "hash_password",
     "verify_password",
+    "verify_and_update_password",
+    "rental_details_options",
+    "filter_rentals_by_status",
+    "format_rental_response",
+    "validate_rental_terms",
+    "calculate_rental_terms",
+    "reserve_gear_statement",
+    "validate_condition_score",
+    "gear_status_after_return",
+    "apply_customer_search",
+    "normalize_phone_digits",
     "create_token",
     "verify_token",
+    "PasswordPoolBusy",
+    "shutdown_password_pool",
+    "analytics_cache",
+    "cached_analytics",
+    "token_cache",
+    "owner_cache",
+    "encode_cursor",
+    "decode_cursor",
+    "parse_cursor_datetime",
+    "parse_cursor_value",
+    "paginate",
+    "paginate_async",
+    "MAX_PAGE_SIZE",
+    "import_gear_csv",
+    "import_customers_csv",
+    "apply_rental_stats",
+    "rebuild_rental_stats",
+    "stats_since",
+    "QueryStatsMiddleware",
+    "instrument_engine",
+    "set_request_owner",
+    "request_query_stats",
+    "rental_engine",
+    "brand_stats",
+    "top_gear_stats",
+    "top_customer_stats",
+    "low_condition_customer_stats",
+    "compute_sections",
+    "customer_segments",
+    "customer_segment_rows",
+    "segment_customer_rows",
+    "validate_segment_limit",
+    "encode_segment_cursor",
+    "decode_segment_cursor",
+    "format_segment_customer",
+    "CUSTOMER_SEGMENTS",
+    "CUSTOMER_SEGMENT_TOP_N",
+    "MetricsMiddleware",
+    "render_metrics",
+    "stream_export",
+    "filter_created_range",
+    "rental_export_statement",
+    "customer_export_statement",
+    "gear_export_statement",
+    "RENTAL_EXPORT_COLUMNS",
+    "CUSTOMER_EXPORT_COLUMNS",
+    "GEAR_EXPORT_COLUMNS",
 ]
@@ -0,0 +1,416 @@
+from collections import deque
+from fastapi import HTTPException
+from sqlalchemy import select, func, case, text
+from sqlalchemy.orm import Session
+from decimal import Decimal, InvalidOperation
+import anyio
+import heapq
+import os
+import threading
+from app.database import SessionLocal
+from app.models import Gear, GearStatus, Customer, Rental, Brand
+from app.analytics_engine import rental_engine, merge_dimensions, CustomerRentalStats, CustomerConditionStats, GearRentalStats, BrandStats, SegmentCustomerStats
+from app.pagination import encode_cursor, decode_cursor
+
+# Скільки сесій БД (і потоків) одночасно обчислюють секції /analytics/bundle; 1 - усі секції в одній сесії
+ANALYTICS_BUNDLE_CONCURRENCY = int(os.getenv("ANALYTICS_BUNDLE_CONCURRENCY", "4"))
+# Скільки з'єднань разом тримають воркери всіх бандлів процесу. Вони беруться з того ж пулу
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW), що й для інших запитів, плюс з'єднання get_current_owner самого запиту
+# бандла, якщо власника немає в кеші; решта пулу лишається звичайним запитам, бандл без вільних з'єднань
+# обчислюється меншою кількістю воркерів
+ANALYTICS_BUNDLE_MAX_CONNECTIONS = int(os.getenv("ANALYTICS_BUNDLE_MAX_CONNECTIONS", str(ANALYTICS_BUNDLE_CONCURRENCY)))
+
+# Скільки клієнтів кожного сегмента повертається за замовчуванням (решта - через next_cursor)
+CUSTOMER_SEGMENT_TOP_N = int(os.getenv("CUSTOMER_SEGMENT_TOP_N", "10"))
+CUSTOMER_SEGMENT_MAX_LIMIT = 100
+
+CUSTOMER_SEGMENTS = ("vip", "regular", "occasional")
+
+class SharedAggregates:
+    """
+    Проміжні агрегати аналітики, спільні для секцій одного запиту (кожен обчислюється один раз).
+    share_customers - rollup по клієнтах для TOP / проблемних клієнтів і сегментації (бандл секцій);
+    окремий endpoint рахує свою секцію в SQL з ORDER BY ... LIMIT / HAVING.
+    """
+
+    def __init__(self, share_customers: bool = False):
+        self.share_customers = share_customers
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, compute):
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        # Інші секції чекають на вже розпочате обчислення замість повторного сканування
+        with lock:
+            if name not in self._values:
+                self._values[name] = compute()
+            return self._values[name]
+
+def shared_aggregates(db: Session) -> SharedAggregates:
+    # Агрегати живуть у session.info - для окремого endpoint це межі одного HTTP запиту
+    return db.info.setdefault("analytics_aggregates", SharedAggregates())
+
+def gear_rollup(db: Session, owner_id: int) -> dict:
+    """
+    Оренди власника по спорядженню: gear_id -> агрегати. Зі знімка рушія, якщо він готовий,
+    інакше одним GROUP BY (index-only по idx_rentals_owner_gear)
+    """
+    def compute():
+        rollup = rental_engine.gear_rollup(db, owner_id) if rental_engine.enabled else None
+        if rollup is not None:
+            return rollup
+        return {
+            row.gear_id: row
+            for row in db.query(
+                Rental.gear_id,
+                func.count().label('rental_count'),
+                func.sum(Rental.total_price).label('revenue'),
+                func.count(Rental.condition_score).label('scored_count'),
+                func.sum(Rental.condition_score).label('condition_sum')
+            ).filter(Rental.owner_id == owner_id).group_by(Rental.gear_id).all()
+        }
+    return shared_aggregates(db).get("gear_rollup", compute)
+
+def owner_gear(db: Session, owner_id: int) -> list:
+    return shared_aggregates(db).get("gear", lambda: db.query(
+        Gear.id, Gear.type, Gear.size, Gear.brand_id, Gear.status, Gear.hourly_price, Gear.daily_price
+    ).filter(Gear.owner_id == owner_id).all())
+
+def owner_brands(db: Session, owner_id: int) -> list:
+    return shared_aggregates(db).get("brands", lambda: db.query(Brand.id, Brand.name)
+        .filter(Brand.owner_id == owner_id)
+        .order_by(Brand.id)
+        .all())
+
+def customer_rollup(db: Session, owner_id: int) -> dict:
+    """Оренди власника по клієнтах одним GROUP BY (index-only по idx_rentals_owner_customer): customer_id -> агрегати"""
+    return shared_aggregates(db).get("customer_rollup", lambda: {
+        row.customer_id: row
+        for row in db.query(
+            Rental.customer_id,
+            func.count().label('rental_count'),
+            func.sum(Rental.total_price).label('total_spent'),
+            func.max(Rental.created_at).label('last_rental'),
+            func.count(Rental.condition_score).label('scored_count'),
+            func.sum(Rental.condition_score).label('condition_sum'),
+            func.sum(Rental.total_price).filter(Rental.condition_score.isnot(None)).label('scored_spent')
+        ).filter(Rental.owner_id == owner_id).group_by(Rental.customer_id).all()
+    })
+
+def customer_dimensions(db: Session, owner_id: int):
+    return db.query(Customer.id, Customer.full_name, Customer.phone).filter(Customer.owner_id == owner_id)
+
+def brand_stats(db: Session, owner_id: int) -> list[BrandStats]:
+    """Бренди власника з метриками спорядження та оренд - з rollup спорядження (спільний з TOP спорядження)"""
+    def compute():
+        rollup = gear_rollup(db, owner_id)
+        # gear_count, rented_count, rental_count, revenue, scored_count, condition_sum
+        totals = {brand_id: [0, 0, 0, Decimal(0), 0, 0] for brand_id, _ in owner_brands(db, owner_id)}
+        for gear in owner_gear(db, owner_id):
+            brand = totals.get(gear.brand_id)
+            if brand is None:
+                continue
+            brand[0] += 1
+            brand[1] += gear.status == GearStatus.rented
+            rentals = rollup.get(gear.id)
+            if rentals:
+                brand[2] += rentals.rental_count
+                brand[3] += rentals.revenue
+                brand[4] += rentals.scored_count
+                brand[5] += rentals.condition_sum or 0
+        return [
+            BrandStats(
+                brand_id, name, gear_count, rented_count, rental_count, revenue,
+                Decimal(condition_sum) / scored_count if scored_count else None
+            )
+            for (brand_id, name), (gear_count, rented_count, rental_count, revenue, scored_count, condition_sum)
+            in zip(owner_brands(db, owner_id), totals.values())
+        ]
+    return shared_aggregates(db).get("brand_stats", compute)
+
+def top_gear_stats(db: Session, owner_id: int, limit: int) -> list[GearRentalStats]:
+    """TOP спорядження власника за кількістю оренд з брендом - з rollup спорядження (спільний з метриками брендів)"""
+    rollup = gear_rollup(db, owner_id)
+    brands = dict(owner_brands(db, owner_id))
+
+    def rental_count(gear) -> int:
+        return rollup[gear.id].rental_count if gear.id in rollup else 0
+
+    # ORDER BY rental_count DESC, id LIMIT - спорядження без оренд теж бере участь (як LEFT JOIN)
+    top = heapq.nsmallest(limit, owner_gear(db, owner_id), key=lambda gear: (-rental_count(gear), gear.id))
+    return [
+        GearRentalStats(
+            gear.id, gear.type, gear.size, brands.get(gear.brand_id), gear.hourly_price, gear.daily_price,
+            rental_count(gear), rollup[gear.id].revenue if gear.id in rollup else None
+        )
+        for gear in top
+    ]
+
+def top_customer_stats(db: Session, owner_id: int, limit: int) -> list[CustomerRentalStats]:
+    """TOP клієнтів власника за кількістю оренд (ORDER BY ... LIMIT в SQL або з rollup клієнтів бандла)"""
+    rows = rental_engine.top_customers(db, owner_id, limit) if rental_engine.enabled else None
+    if rows is not None:
+        return rows
+    if shared_aggregates(db).share_customers:
+        top = heapq.nsmallest(limit, customer_rollup(db, owner_id).values(), key=lambda row: (-row.rental_count, row.customer_id))
+        aggregates = {row.customer_id: (row.rental_count, row.total_spent, row.last_rental) for row in top}
+        return [
+            CustomerRentalStats(*row)
+            for row in merge_dimensions(customer_dimensions(db, owner_id), Customer.id, aggregates, pad_to=limit, empty=(0, None, None))
+        ]
+    rental_count = func.count(Rental.id)
+    return db.query(
+        Customer.id,
+        Customer.full_name,
+        Customer.phone,
+        rental_count.label('rental_count'),
+        func.sum(Rental.total_price).label('total_spent'),
+        func.max(Rental.created_at).label('last_rental')
+    ).filter(Customer.owner_id == owner_id)\
+     .outerjoin(Rental, (Rental.customer_id == Customer.id) & (Rental.owner_id == owner_id))\
+     .group_by(Customer.id)\
+     .order_by(rental_count.desc(), Customer.id)\
+     .limit(limit)\
+     .all()
+
+def low_condition_customer_stats(db: Session, owner_id: int, max_avg_condition: float) -> list[CustomerConditionStats]:
+    """Клієнти власника із середньою оцінкою стану < max_avg_condition серед оцінених оренд (HAVING в SQL або з rollup клієнтів)"""
+    rows = rental_engine.low_condition_customers(db, owner_id, max_avg_condition) if rental_engine.enabled else None
+    if rows is not None:
+        return rows
+    if shared_aggregates(db).share_customers:
+        scored = [
+            (Decimal(row.condition_sum) / row.scored_count, row)
+            for row in customer_rollup(db, owner_id).values() if row.scored_count
+        ]
+        # ORDER BY avg_condition, id
+        selected = sorted(
+            ((avg_condition, row) for avg_condition, row in scored if avg_condition < max_avg_condition),
+            key=lambda item: (item[0], item[1].customer_id)
+        )
+        aggregates = {row.customer_id: (avg_condition, row.scored_count, row.scored_spent) for avg_condition, row in selected}
+        return [CustomerConditionStats(*row) for row in merge_dimensions(customer_dimensions(db, owner_id), Customer.id, aggregates)]
+    avg_condition = func.avg(Rental.condition_score)
+    return db.query(
+        Customer.id,
+        Customer.full_name,
+        Customer.phone,
+        avg_condition.label('avg_condition'),
+        func.count(Rental.id).label('rental_count'),
+        func.sum(Rental.total_price).label('total_spent')
+    ).join(Rental, (Rental.customer_id == Customer.id) & (Rental.owner_id == owner_id))\
+     .filter(Customer.owner_id == owner_id, Rental.condition_score.isnot(None))\
+     .group_by(Customer.id)\
+     .having(avg_condition < max_avg_condition)\
+     .order_by(avg_condition, Customer.id)\
+     .all()
+
+def segment_of(rental_count: int, vip_min_rentals: int, regular_min_rentals: int) -> str:
+    if rental_count >= vip_min_rentals:
+        return 'vip'
+    if rental_count >= regular_min_rentals:
+        return 'regular'
+    return 'occasional'
+
+def customer_segments(owner_id: int, vip_min_rentals: int, regular_min_rentals: int):
+    """Підзапит: клієнти власника з орендами, їх агрегати та сегмент (CASE за кількістю оренд)"""
+    rental_count = func.count(Rental.id)
+    return select(
+        Customer.id,
+        Customer.full_name,
+        Customer.phone,
+        rental_count.label('rental_count'),
+        func.sum(Rental.total_price).label('total_spent'),
+        func.max(Rental.created_at).label('last_rental'),
+        case(
+            (rental_count >= vip_min_rentals, 'vip'),
+            (rental_count >= regular_min_rentals, 'regular'),
+            else_='occasional'
+        ).label('segment')
+    ).join(Rental, (Rental.customer_id == Customer.id) & (Rental.owner_id == owner_id))\
+     .where(Customer.owner_id == owner_id)\
+     .group_by(Customer.id)\
+     .subquery()
+
+def customer_segment_rows(db: Session, owner_id: int, vip_min_rentals: int, regular_min_rentals: int, limit: int) -> list:
+    """
+    Агрегати сегментів і перші limit + 1 клієнтів кожного сегмента за витратами (ранг у сегменті),
+    упорядковані за (segment, rank): зі знімка рушія, з rollup клієнтів бандла або віконними функціями в SQL
+    """
+    rows = rental_engine.customer_segments(db, owner_id, vip_min_rentals, regular_min_rentals, limit) if rental_engine.enabled else None
+    if rows is not None:
+        return rows
+    if shared_aggregates(db).share_customers:
+        members = {segment: [] for segment in CUSTOMER_SEGMENTS}
+        for row in customer_rollup(db, owner_id).values():
+            members[segment_of(row.rental_count, vip_min_rentals, regular_min_rentals)].append(row)
+        ranked = {
+            segment: heapq.nsmallest(limit + 1, rows, key=lambda row: (-row.total_spent, row.customer_id))
+            for segment, rows in members.items()
+        }
+        revenue = {segment: sum(row.total_spent for row in rows) for segment, rows in members.items()}
+        ids = [row.customer_id for rows in ranked.values() for row in rows]
+        names = {
+            row.id: row for row in customer_dimensions(db, owner_id).filter(Customer.id.in_(ids)).all()
+        } if ids else {}
+        return [
+            SegmentCustomerStats(
+                row.customer_id, names[row.customer_id].full_name, names[row.customer_id].phone,
+                row.rental_count, row.total_spent, row.last_rental,
+                segment, rank, len(members[segment]), revenue[segment]
+            )
+            for segment in sorted(ranked)
+            for rank, row in enumerate(ranked[segment], start=1)
+        ]
+
+    segments = customer_segments(owner_id, vip_min_rentals, regular_min_rentals)
+    # Кількість і виручка сегмента та ранг клієнта за витратами - віконними функціями, одним запитом (власника)
+    ranked = select(
+        segments,
+        func.row_number().over(
+            partition_by=segments.c.segment,
+            order_by=(segments.c.total_spent.desc(), segments.c.id)
+        ).label('rank'),
+        func.count().over(partition_by=segments.c.segment).label('segment_count'),
+        func.sum(segments.c.total_spent).over(partition_by=segments.c.segment).label('segment_revenue')
+    ).subquery()
+
+    return db.execute(
+        select(ranked)
+        .where(ranked.c.rank <= limit + 1)
+        .order_by(ranked.c.segment, ranked.c.rank)
+    ).all()
+
+def segment_customer_rows(
+    db: Session, owner_id: int, vip_min_rentals: int, regular_min_rentals: int,
+    segment: str, after: tuple[Decimal, int] | None, limit: int
+) -> list:
+    """Клієнти сегмента за (total_spent DESC, id) після курсора after - limit + 1 рядків (keyset)"""
+    rows = rental_engine.segment_customers(
+        db, owner_id, vip_min_rentals, regular_min_rentals, segment, after, limit
+    ) if rental_engine.enabled else None
+    if rows is not None:
+        return rows
+
+    segments = customer_segments(owner_id, vip_min_rentals, regular_min_rentals)
+    query = select(segments).where(segments.c.segment == segment)
+    if after is not None:
+        total_spent, customer_id = after
+        query = query.where(
+            (segments.c.total_spent < total_spent) |
+            ((segments.c.total_spent == total_spent) & (segments.c.id > customer_id))
+        )
+    return db.execute(query.order_by(segments.c.total_spent.desc(), segments.c.id).limit(limit + 1)).all()
+
+def validate_segment_limit(limit: int):
+    if not 1 <= limit <= CUSTOMER_SEGMENT_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit має бути від 1 до {CUSTOMER_SEGMENT_MAX_LIMIT}")
+
+def encode_segment_cursor(row) -> str:
+    # Keyset по (total_spent DESC, id); Decimal передається рядком без втрати точності
+    return encode_cursor(str(row.total_spent), row.id)
+
+def decode_segment_cursor(cursor: str) -> tuple[Decimal, int]:
+    total_spent, customer_id = decode_cursor(cursor, 2)
+    try:
+        total_spent = Decimal(total_spent)
+    except (TypeError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Некоректний курсор")
+    if not total_spent.is_finite() or not isinstance(customer_id, int):
+        raise HTTPException(status_code=400, detail="Некоректний курсор")
+    return total_spent, customer_id
+
+def format_segment_customer(row) -> dict:
+    return {
+        "id": row.id,
+        "full_name": row.full_name,
+        "phone": row.phone,
+        "rental_count": row.rental_count,
+        "total_spent": float(row.total_spent),
+        "last_rental": row.last_rental.isoformat() if row.last_rental else None
+    }
+
+class ConnectionBudget:
+    """З'єднання пулу, які разом можуть тримати воркери всіх /analytics/bundle процесу"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, wanted: int) -> int:
+        # Одне з'єднання бандл чекає; додаткові бере лише вільні зараз - бандли не чекають один на одного
+        with self._condition:
+            self._condition.wait_for(lambda: self.used < self.limit)
+            granted = min(wanted, self.limit - self.used)
+            self.used += granted
+            return granted
+
+    def release(self, count: int):
+        with self._condition:
+            self.used -= count
+            self._condition.notify_all()
+
+bundle_connections = ConnectionBudget(ANALYTICS_BUNDLE_MAX_CONNECTIONS)
+
+async def compute_sections(names: list[str], compute_section, concurrency: int = ANALYTICS_BUNDLE_CONCURRENCY) -> dict:
+    """
+    Обчислює секції аналітики пулом воркерів: кожен воркер - потік з власною сесією БД,
+    що по черзі бере секції з черги. Проміжні агрегати спільні для всіх воркерів.
+
+    Усі сесії читають один знімок БД: перший воркер відкриває REPEATABLE READ транзакцію
+    та експортує знімок (pg_export_snapshot), інші імпортують його (SET TRANSACTION SNAPSHOT) -
+    секції та спільні агрегати узгоджені між собою. Кількість воркерів обмежена bundle_connections.
+    """
+    workers = await anyio.to_thread.run_sync(bundle_connections.acquire, max(1, min(concurrency, len(names))))
+    queue = deque(names)
+    aggregates = SharedAggregates(share_customers=True)
+    results = {}
+    snapshot = {}
+    exported = threading.Event()
+    imported = threading.Semaphore(0)
+
+    def worker(leader: bool):
+        db = SessionLocal()
+        db.info["analytics_aggregates"] = aggregates
+        try:
+            if leader:
+                try:
+                    db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+                    if workers > 1:
+                        snapshot["id"] = db.execute(text("SELECT pg_export_snapshot()")).scalar()
+                finally:
+                    exported.set()
+            else:
+                try:
+                    exported.wait()
+                    if "id" not in snapshot:
+                        # Помилку експорту повертає перший воркер
+                        return
+                    db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+                    db.execute(text("SET TRANSACTION SNAPSHOT :snapshot"), {"snapshot": snapshot["id"]})
+                finally:
+                    imported.release()
+            while True:
+                try:
+                    name = queue.popleft()
+                except IndexError:
+                    break
+                results[name] = compute_section(name, db)
+            if leader:
+                # Експортований знімок діє, поки відкрита транзакція, що його експортувала
+                for _ in range(workers - 1):
+                    imported.acquire()
+        finally:
+            db.close()
+
+    try:
+        async with anyio.create_task_group() as task_group:
+            for index in range(workers):
+                task_group.start_soon(anyio.to_thread.run_sync, worker, index == 0)
+    finally:
+        bundle_connections.release(workers)
+
+    return {name: results[name] for name in names}
@@ -0,0 +1,444 @@
+"""
+Опціональний in-memory рушій аналітики: оренди власника завантажуються один раз у колонки NumPy,
+rollup по клієнтах та спорядженню рахуються векторно (bincount) замість GROUP BY по rentals.
+
+Вмикається ANALYTICS_ENGINE=numpy (потрібен `pip install numpy`); без NumPy - SQL.
+Зі знімка рахуються: TOP клієнтів, проблемні клієнти, сегментація клієнтів (агрегати сегментів
+і сторінки сегмента) - з rollup по клієнтах; TOP спорядження та метрики брендів - з rollup
+по спорядженню. Rollup рахується один раз на версію знімка і спільний для всіх цих секцій.
+Тип, статус і бренд спорядження, імена клієнтів беруться з таблиць (редагуються), тому знімок
+не містить кодів GearType; RentalType жоден з цих агрегатів не використовує, а часові патерни
+та виручка рахуються з rental_daily_stats.
+
+Актуальність знімка визначає шлях запису: кожна зміна викликає analytics_cache.invalidate_owner,
+що збільшує покоління власника. Поки покоління не змінилось, читання не звертається до rentals.
+Записи інших процесів (кілька воркерів uvicorn, пряма зміна БД) підхоплюються перевіркою
+не рідше ніж раз на ANALYTICS_ENGINE_RECHECK_SECONDS.
+
+Повне завантаження знімка виконується у фоновому потоці; поки його немає, а також поки інший
+запит дозавантажує зміни, агрегати рахуються в SQL - запит ніколи не чекає на знімок.
+"""
+
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+from sqlalchemy import select, func, true
+from sqlalchemy.orm import Session
+import logging
+import os
+import threading
+import time
+from app.database import SessionLocal
+from app.models import Customer, Rental
+from app.cache import analytics_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql").lower()
+ANALYTICS_ENGINE_MAX_OWNERS = int(os.getenv("ANALYTICS_ENGINE_MAX_OWNERS", "16"))
+ANALYTICS_ENGINE_BATCH_SIZE = int(os.getenv("ANALYTICS_ENGINE_BATCH_SIZE", "100000"))
+ANALYTICS_ENGINE_RECHECK_SECONDS = float(os.getenv("ANALYTICS_ENGINE_RECHECK_SECONDS", "60"))
+
+logger = logging.getLogger("app.analytics_engine")
+
+# Колонки знімка: gear/customer - лише id, бо тип, статус і бренд редагуються (беруться з таблиць при запиті)
+SNAPSHOT_COLUMNS = (
+    ("id", "int32"),
+    ("gear_id", "int32"),
+    ("customer_id", "int32"),
+    ("created_at", "datetime64[us]"),
+    ("return_at", "datetime64[us]"),
+    ("total_price", "float64"),
+    ("condition_score", "int8"),  # 0 - без оцінки
+)
+
+# Ті ж поля, що й у SQL агрегатів app.analytics
+CustomerRentalStats = namedtuple("CustomerRentalStats", (
+    "id", "full_name", "phone", "rental_count", "total_spent", "last_rental"
+))
+CustomerConditionStats = namedtuple("CustomerConditionStats", (
+    "id", "full_name", "phone", "avg_condition", "rental_count", "total_spent"
+))
+GearRentalStats = namedtuple("GearRentalStats", (
+    "id", "type", "size", "brand_name", "hourly_price", "daily_price", "rental_count", "revenue"
+))
+BrandStats = namedtuple("BrandStats", (
+    "id", "name", "gear_count", "rented_count", "rental_count", "revenue", "avg_condition"
+))
+SegmentCustomerStats = namedtuple("SegmentCustomerStats", (
+    "id", "full_name", "phone", "rental_count", "total_spent", "last_rental",
+    "segment", "rank", "segment_count", "segment_revenue"
+))
+GearRollup = namedtuple("GearRollup", ("gear_id", "rental_count", "revenue", "scored_count", "condition_sum"))
+
+# Сегменти у порядку ORDER BY segment в SQL
+SEGMENT_NAMES = ("occasional", "regular", "vip")
+
+def empty_columns() -> dict:
+    return {name: np.empty(0, dtype) for name, dtype in SNAPSHOT_COLUMNS}
+
+def to_columns(rows) -> dict:
+    ids, gear_ids, customer_ids, created_at, return_at, total_price, condition_score = zip(*rows)
+    return {
+        "id": np.array(ids, dtype="int32"),
+        "gear_id": np.array(gear_ids, dtype="int32"),
+        "customer_id": np.array(customer_ids, dtype="int32"),
+        "created_at": np.array(created_at, dtype="datetime64[us]"),
+        "return_at": np.array(return_at, dtype="datetime64[us]"),  # None -> NaT
+        "total_price": np.array(total_price, dtype="float64"),
+        "condition_score": np.array(condition_score, dtype="int8"),
+    }
+
+def concat_columns(parts: list[dict]) -> dict:
+    if not parts:
+        return empty_columns()
+    return {name: np.concatenate([part[name] for part in parts]) for name, _ in SNAPSHOT_COLUMNS}
+
+def group_by(keys):
+    """Унікальні ключі (відсортовані) та номер групи кожного рядка"""
+    return np.unique(keys, return_inverse=True)
+
+def group_sum(inverse, size: int, weights=None):
+    return np.bincount(inverse, weights=weights, minlength=size)
+
+def group_max_datetime(inverse, size: int, values):
+    # Максимум по групі через int64; мінімальне int64 - це NaT, тобто None для груп без значень
+    result = np.full(size, np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(result, inverse, values.view(np.int64))
+    return result.view("datetime64[us]")
+
+def to_cents(values):
+    # Суми в копійках (int64): порівняння та сортування без похибки float, як numeric у SQL
+    return np.rint(values * 100).astype(np.int64)
+
+def money(cents) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+def top_positions(ids, counts, limit: int):
+    # ORDER BY count DESC, id LIMIT - як у SQL
+    return np.lexsort((ids, -counts))[:limit]
+
+def merge_dimensions(query, id_column, aggregates: dict, pad_to: int = 0, empty: tuple = ()) -> list[tuple]:
+    """
+    Рядки довідника (клієнт / спорядження) лише для відібраних id разом з агрегатами, у порядку агрегатів.
+    Як LEFT JOIN у SQL: якщо відібраних менше за pad_to - доповнюються записами без оренд (за id).
+    """
+    rows = {row[0]: tuple(row) for row in query.filter(id_column.in_(list(aggregates))).all()} if aggregates else {}
+    merged = [rows[key] + tuple(values) for key, values in aggregates.items() if key in rows]
+    if len(merged) < pad_to:
+        rest = query.filter(id_column.notin_(list(aggregates))) if aggregates else query
+        merged += [tuple(row) + empty for row in rest.order_by(id_column).limit(pad_to - len(merged)).all()]
+    return merged
+
+class RentalSnapshot:
+    """Оренди одного власника в колонках NumPy з інкрементним оновленням"""
+
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+        self.lock = threading.Lock()
+        self.columns = None
+        self.rollups = {}
+        self.last_id = 0
+        self.generation = None
+        self.checked_at = 0.0
+        self.loading = False
+
+    def __len__(self):
+        return 0 if self.columns is None else len(self.columns["id"])
+
+    def fetch(self, db: Session, condition) -> dict:
+        statement = select(
+            Rental.id, Rental.gear_id, Rental.customer_id, Rental.created_at, Rental.return_at,
+            Rental.total_price, func.coalesce(Rental.condition_score, 0)
+        ).where(Rental.owner_id == self.owner_id, condition)\
+         .order_by(Rental.id)\
+         .execution_options(yield_per=ANALYTICS_ENGINE_BATCH_SIZE)
+        return concat_columns([to_columns(rows) for rows in db.execute(statement).partitions()])
+
+    def is_current(self, generation: int) -> bool:
+        return (
+            self.columns is not None and self.generation == generation
+            and time.monotonic() - self.checked_at < ANALYTICS_ENGINE_RECHECK_SECONDS
+        )
+
+    def replace(self, columns: dict, generation: int):
+        # Нові колонки замість змінених на місці: запити, що вже взяли попередні, рахують далі на них
+        self.columns = columns
+        self.rollups = {}
+        # Оренди впорядковані за id - останній id є максимальним
+        self.last_id = int(columns["id"][-1]) if len(columns["id"]) else 0
+        self.generation = generation
+        self.checked_at = time.monotonic()
+
+    def apply_changes(self, db: Session, generation: int) -> bool:
+        """
+        Дозавантажує нові оренди (id > last_id) та повернення відкритих оренд - лише після запису власника.
+        False - оренд з id <= last_id стало інакше (каскадне видалення, пізній коміт), потрібне повне завантаження.
+        """
+        count = db.query(func.count(Rental.id))\
+            .filter(Rental.owner_id == self.owner_id, Rental.id <= self.last_id)\
+            .scalar()
+        if count != len(self):
+            return False
+
+        columns = self.with_returns(db)
+        new = self.fetch(db, Rental.id > self.last_id)
+        if len(new["id"]):
+            columns = concat_columns([columns, new])
+        self.replace(columns, generation)
+        return True
+
+    def with_returns(self, db: Session) -> dict:
+        open_positions = np.flatnonzero(np.isnat(self.columns["return_at"]))
+        if not len(open_positions):
+            return self.columns
+        open_ids = self.columns["id"][open_positions]
+        returned = db.query(Rental.id, Rental.return_at, func.coalesce(Rental.condition_score, 0))\
+            .filter(Rental.owner_id == self.owner_id, Rental.id.in_(open_ids.tolist()), Rental.return_at.isnot(None))\
+            .all()
+        if not returned:
+            return self.columns
+        ids, return_at, condition_score = zip(*returned)
+        positions = open_positions[np.searchsorted(open_ids, np.array(ids, dtype="int32"))]
+        columns = {**self.columns, "return_at": self.columns["return_at"].copy(), "condition_score": self.columns["condition_score"].copy()}
+        columns["return_at"][positions] = np.array(return_at, dtype="datetime64[us]")
+        columns["condition_score"][positions] = np.array(condition_score, dtype="int8")
+        return columns
+
+def memoized(rollups: dict, name: str, compute):
+    # Rollup рахується один раз на версію знімка (паралельні запити можуть порахувати його одночасно - результат той самий)
+    if name not in rollups:
+        rollups[name] = compute()
+    return rollups[name]
+
+def customer_rollup(columns: dict, rollups: dict) -> dict:
+    """Агрегати по клієнтах (id відсортовані): кількість, витрати, остання оренда та оцінки стану"""
+    def compute():
+        ids, inverse = group_by(columns["customer_id"])
+        size = len(ids)
+        scored = columns["condition_score"] > 0
+        return {
+            "ids": ids,
+            "rental_count": group_sum(inverse, size),
+            "total_spent": to_cents(group_sum(inverse, size, columns["total_price"])),
+            "last_rental": group_max_datetime(inverse, size, columns["created_at"]),
+            "scored_count": group_sum(inverse, size, scored.astype("float64")).astype(np.int64),
+            "condition_sum": group_sum(inverse, size, columns["condition_score"].astype("float64")).astype(np.int64),
+            "scored_spent": to_cents(group_sum(inverse, size, np.where(scored, columns["total_price"], 0.0))),
+        }
+    return memoized(rollups, "customers", compute)
+
+def gear_rollup(columns: dict, rollups: dict) -> dict:
+    """Агрегати по спорядженню: gear_id -> GearRollup (як GROUP BY gear_id у SQL)"""
+    def compute():
+        ids, inverse = group_by(columns["gear_id"])
+        size = len(ids)
+        return {
+            gear_id: GearRollup(gear_id, rental_count, money(revenue), scored_count, condition_sum)
+            for gear_id, rental_count, revenue, scored_count, condition_sum in zip(
+                ids.tolist(),
+                group_sum(inverse, size).tolist(),
+                to_cents(group_sum(inverse, size, columns["total_price"])).tolist(),
+                group_sum(inverse, size, (columns["condition_score"] > 0).astype("float64")).astype(np.int64).tolist(),
+                group_sum(inverse, size, columns["condition_score"].astype("float64")).astype(np.int64).tolist(),
+            )
+        }
+    return memoized(rollups, "gear", compute)
+
+def segment_codes(rental_count, vip_min_rentals: int, regular_min_rentals: int):
+    # Номер сегмента в SEGMENT_NAMES - як CASE у app.analytics.customer_segments
+    return np.where(rental_count >= vip_min_rentals, 2, np.where(rental_count >= regular_min_rentals, 1, 0))
+
+def customer_names(db: Session, owner_id: int, ids: list[int]) -> dict:
+    if not ids:
+        return {}
+    return {
+        row.id: row
+        for row in db.query(Customer.id, Customer.full_name, Customer.phone)
+            .filter(Customer.owner_id == owner_id, Customer.id.in_(ids))
+            .all()
+    }
+
+class RentalAnalyticsEngine:
+    """LRU знімків оренд по власниках; агрегати рахуються векторно, з БД читаються лише відібрані клієнти та спорядження"""
+
+    def __init__(self, enabled: bool, max_owners: int):
+        if enabled and np is None:
+            logger.warning("ANALYTICS_ENGINE=numpy, але NumPy не встановлено - аналітика рахується в SQL")
+        self.enabled = enabled and np is not None
+        self.max_owners = max_owners
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def snapshot(self, owner_id: int) -> RentalSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(owner_id)
+            if snapshot is None:
+                snapshot = self._snapshots[owner_id] = RentalSnapshot(owner_id)
+                while len(self._snapshots) > self.max_owners:
+                    self._snapshots.popitem(last=False)
+            self._snapshots.move_to_end(owner_id)
+            return snapshot
+
+    def load(self, owner_id: int):
+        """Повне завантаження знімка власника у власній сесії (фоновий потік, прогрів)"""
+        snapshot = self.snapshot(owner_id)
+        db = SessionLocal()
+        try:
+            # Покоління читається до звернення до БД: запис під час завантаження знову зробить знімок застарілим
+            generation = analytics_cache.generation(owner_id)
+            columns = snapshot.fetch(db, true())
+            with snapshot.lock:
+                snapshot.replace(columns, generation)
+        except Exception:
+            logger.exception("Не вдалося завантажити знімок оренд власника %s", owner_id)
+        finally:
+            db.close()
+            with snapshot.lock:
+                snapshot.loading = False
+
+    def start_loading(self, snapshot: RentalSnapshot):
+        # Викликається під snapshot.lock
+        if not snapshot.loading:
+            snapshot.loading = True
+            threading.Thread(target=self.load, args=(snapshot.owner_id,), daemon=True).start()
+
+    def columns(self, db: Session, owner_id: int) -> tuple[dict, dict] | None:
+        """
+        Колонки та rollup актуального знімка власника або None - тоді агрегат рахується в SQL.
+        Після запису власника зміни дозавантажуються в запиті; інші запити власника на цей час
+        не чекають на блокування, а рахуються в SQL. Повне завантаження - лише у фоновому потоці.
+        """
+        snapshot = self.snapshot(owner_id)
+        if not snapshot.lock.acquire(blocking=False):
+            return None
+        try:
+            generation = analytics_cache.generation(owner_id)
+            if snapshot.columns is not None and not snapshot.is_current(generation):
+                if not snapshot.apply_changes(db, generation):
+                    snapshot.columns = None
+            if snapshot.columns is None:
+                self.start_loading(snapshot)
+                return None
+            return snapshot.columns, snapshot.rollups
+        finally:
+            snapshot.lock.release()
+
+    def top_customers(self, db: Session, owner_id: int, limit: int) -> list[CustomerRentalStats] | None:
+        current = self.columns(db, owner_id)
+        if current is None:
+            return None
+        rollup = customer_rollup(*current)
+        ids = rollup["ids"]
+        top = top_positions(ids, rollup["rental_count"], limit)
+        aggregates = {
+            customer_id: (rental_count, money(total_spent), last_rental)
+            for customer_id, rental_count, total_spent, last_rental in zip(
+                ids[top].tolist(), rollup["rental_count"][top].tolist(),
+                rollup["total_spent"][top].tolist(), rollup["last_rental"][top].tolist()
+            )
+        }
+
+        query = db.query(Customer.id, Customer.full_name, Customer.phone).filter(Customer.owner_id == owner_id)
+        return [
+            CustomerRentalStats(*row)
+            for row in merge_dimensions(query, Customer.id, aggregates, pad_to=limit, empty=(0, None, None))
+        ]
+
+    def low_condition_customers(self, db: Session, owner_id: int, max_avg_condition: float) -> list[CustomerConditionStats] | None:
+        current = self.columns(db, owner_id)
+        if current is None:
+            return None
+        rollup = customer_rollup(*current)
+        ids, scored_count = rollup["ids"], rollup["scored_count"]
+        avg_condition = rollup["condition_sum"] / np.maximum(scored_count, 1)
+        selected = np.flatnonzero((scored_count > 0) & (avg_condition < max_avg_condition))
+        # ORDER BY avg_condition, id
+        selected = selected[np.lexsort((ids[selected], avg_condition[selected]))]
+        aggregates = {
+            customer_id: (avg, count, money(spent))
+            for customer_id, avg, count, spent in zip(
+                ids[selected].tolist(), avg_condition[selected].tolist(),
+                scored_count[selected].tolist(), rollup["scored_spent"][selected].tolist()
+            )
+        }
+
+        query = db.query(Customer.id, Customer.full_name, Customer.phone).filter(Customer.owner_id == owner_id)
+        return [CustomerConditionStats(*row) for row in merge_dimensions(query, Customer.id, aggregates)]
+
+    def customer_segments(
+        self, db: Session, owner_id: int, vip_min_rentals: int, regular_min_rentals: int, limit: int
+    ) -> list[SegmentCustomerStats] | None:
+        """Агрегати сегментів і перші limit + 1 клієнтів кожного сегмента за витратами, за (segment, rank)"""
+        current = self.columns(db, owner_id)
+        if current is None:
+            return None
+        rollup = customer_rollup(*current)
+        ids, total_spent = rollup["ids"], rollup["total_spent"]
+        codes = segment_codes(rollup["rental_count"], vip_min_rentals, regular_min_rentals)
+        counts = np.bincount(codes, minlength=len(SEGMENT_NAMES))
+        revenue = np.bincount(codes, weights=total_spent, minlength=len(SEGMENT_NAMES)).astype(np.int64)
+
+        # ORDER BY total_spent DESC, id у межах сегмента
+        ranked = [
+            members[np.lexsort((ids[members], -total_spent[members]))][:limit + 1]
+            for members in (np.flatnonzero(codes == code) for code in range(len(SEGMENT_NAMES)))
+        ]
+        names = customer_names(db, owner_id, ids[np.concatenate(ranked)].tolist())
+        return [
+            SegmentCustomerStats(
+                customer_id, names[customer_id].full_name, names[customer_id].phone,
+                int(rollup["rental_count"][position]), money(total_spent[position]), rollup["last_rental"][position].tolist(),
+                SEGMENT_NAMES[code], rank, int(counts[code]), money(revenue[code])
+            )
+            for code, positions in enumerate(ranked)
+            for rank, (position, customer_id) in enumerate(zip(positions.tolist(), ids[positions].tolist()), start=1)
+        ]
+
+    def segment_customers(
+        self, db: Session, owner_id: int, vip_min_rentals: int, regular_min_rentals: int,
+        segment: str, after: tuple[Decimal, int] | None, limit: int
+    ) -> list[CustomerRentalStats] | None:
+        """Клієнти сегмента за (total_spent DESC, id) після курсора after, limit + 1 рядків"""
+        current = self.columns(db, owner_id)
+        if current is None:
+            return None
+        rollup = customer_rollup(*current)
+        ids, total_spent = rollup["ids"], rollup["total_spent"]
+        selected = segment_codes(rollup["rental_count"], vip_min_rentals, regular_min_rentals) == SEGMENT_NAMES.index(segment)
+        if after is not None:
+            spent, customer_id = int(after[0].scaleb(2).to_integral_value()), after[1]
+            selected &= (total_spent < spent) | ((total_spent == spent) & (ids > customer_id))
+        members = np.flatnonzero(selected)
+        page = members[np.lexsort((ids[members], -total_spent[members]))][:limit + 1]
+        names = customer_names(db, owner_id, ids[page].tolist())
+        return [
+            CustomerRentalStats(
+                customer_id, names[customer_id].full_name, names[customer_id].phone,
+                int(rollup["rental_count"][position]), money(total_spent[position]), rollup["last_rental"][position].tolist()
+            )
+            for position, customer_id in zip(page.tolist(), ids[page].tolist())
+        ]
+
+    def gear_rollup(self, db: Session, owner_id: int) -> dict | None:
+        """Rollup по спорядженню для TOP спорядження та метрик брендів (app.analytics.gear_rollup)"""
+        current = self.columns(db, owner_id)
+        return None if current is None else gear_rollup(*current)
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        return {
+            "enabled": self.enabled,
+            "owners": len(snapshots),
+            "rentals": sum(len(snapshot) for snapshot in snapshots),
+            "loading": sum(snapshot.loading for snapshot in snapshots),
+            "bytes": sum(
+                sum(column.nbytes for column in snapshot.columns.values())
+                for snapshot in snapshots if snapshot.columns is not None
+            ),
+        }
+
+rental_engine = RentalAnalyticsEngine(ANALYTICS_ENGINE == "numpy", ANALYTICS_ENGINE_MAX_OWNERS)
@@ -0,0 +1,201 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import datetime
+from app.database import get_async_db
+from app.models import Owner, Gear, Customer, Rental
+from app.schemas import OwnerIdentity, RentalCreate, RentalReturn
+from app.auth import verify_token
+from app.cache import analytics_cache, owner_cache
+from app.pagination import paginate_async
+from app.customers import apply_customer_search
+from app.rollups import apply_rental_stats
+from app.instrumentation import set_request_owner
+from app.rentals import filter_rentals_by_status, rental_details_options, format_rental_response, validate_rental_terms, calculate_rental_terms, reserve_gear_statement, validate_condition_score, gear_status_after_return
+
+# Async (asyncpg) версії найнавантаженіших endpoints, підключаються замість sync при DB_ASYNC=true
+router = APIRouter()
+
+async def get_current_owner_async(authorization: str = Header(), db: AsyncSession = Depends(get_async_db)):
+    token = authorization.replace("Bearer ", "")
+    owner_id = verify_token(token)
+
+    owner = owner_cache.get(owner_id)
+    if owner is None:
+        row = await db.get(Owner, owner_id)
+        if not row:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        owner = OwnerIdentity.model_validate(row)
+        owner_cache.set(owner_id, owner)
+    set_request_owner(owner.id)
+    return owner
+
+async def load_rental(db: AsyncSession, rental_id: int, owner_id: int, for_update: bool = False):
+    statement = (
+        select(Rental).options(*rental_details_options())
+        .where(Rental.id == rental_id, Rental.owner_id == owner_id)
+        .execution_options(populate_existing=True)
+    )
+    if for_update:
+        # Лише рядок оренди: FOR UPDATE не застосовується до nullable сторони LEFT JOIN
+        statement = statement.with_for_update(of=Rental)
+    result = await db.execute(statement)
+    return result.scalars().first()
+
+@router.get("/gear")
+async def get_gear(
+    type: str | None = None,
+    status: str | None = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
+    owner: Owner = Depends(get_current_owner_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    statement = select(Gear).options(joinedload(Gear.brand)).where(Gear.owner_id == owner.id)
+    if type:
+        statement = statement.where(Gear.type == type)
+    if status:
+        statement = statement.where(Gear.status == status)
+
+    return await paginate_async(
+        db, statement, (Gear.created_at, Gear.id), page, page_size,
+        cursor=cursor, include_total=include_total, approximate_total=approximate_total
+    )
+
+@router.get("/customers")
+async def get_customers(
+    search: str | None = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
+    owner: Owner = Depends(get_current_owner_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    statement = select(Customer).where(Customer.owner_id == owner.id)
+    if search:
+        statement = apply_customer_search(statement, search)
+
+    return await paginate_async(
+        db, statement, (Customer.full_name, Customer.id), page, page_size,
+        cursor=cursor, include_total=include_total, approximate_total=approximate_total
+    )
+
+@router.get("/rentals")
+async def get_rentals(
+    status: str | None = None,
+    customer_id: int | None = None,
+    gear_id: int | None = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
+    owner: Owner = Depends(get_current_owner_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    statement = select(Rental).options(*rental_details_options()).where(Rental.owner_id == owner.id)
+    statement = filter_rentals_by_status(statement, status)
+
+    if customer_id:
+        statement = statement.where(Rental.customer_id == customer_id)
+    if gear_id:
+        statement = statement.where(Rental.gear_id == gear_id)
+
+    result = await paginate_async(
+        db, statement.order_by(Rental.created_at.desc()), (Rental.created_at, Rental.id), page, page_size,
+        cursor=cursor, descending=True, include_total=include_total, approximate_total=approximate_total
+    )
+    result["items"] = [format_rental_response(r) for r in result["items"]]
+    return result
+
+@router.post("/rentals")
+async def create_rental(data: RentalCreate, owner: Owner = Depends(get_current_owner_async), db: AsyncSession = Depends(get_async_db)):
+    # 1. Атомарно зайняти gear: умовний UPDATE ... WHERE status='available' (в межах власника)
+    gear = (await db.execute(reserve_gear_statement(data.gear_id, owner.id))).first()
+    if not gear:
+        exists = (await db.execute(select(Gear.id).where(Gear.id == data.gear_id, Gear.owner_id == owner.id))).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Спорядження не знайдено")
+        raise HTTPException(status_code=400, detail="Спорядження недоступне для оренди")
+
+    # 2. Перевірити що customer існує (в межах власника); при помилці транзакція відкочується
+    customer = (await db.execute(select(Customer).where(Customer.id == data.customer_id, Customer.owner_id == owner.id))).scalars().first()
+    if not customer:
+        raise HTTPException(status_code=404, detail="Клієнта не знайдено")
+
+    # 3. Валідація rental_type та duration
+    validate_rental_terms(data.rental_type, data.duration)
+
+    # 4. Розрахувати ціну та дати
+    start_at, due_at, total_price = calculate_rental_terms(gear, data.rental_type, data.duration)
+
+    # 5. Створити оренду (статус gear вже 'rented')
+    rental = Rental(
+        gear_id=data.gear_id,
+        customer_id=data.customer_id,
+        start_at=start_at,
+        due_at=due_at,
+        rental_type=data.rental_type,
+        total_price=total_price,
+        owner_id=owner.id
+    )
+    db.add(rental)
+
+    # Унікальний частковий індекс гарантує лише одну активну оренду на gear
+    try:
+        await db.flush()
+        await db.run_sync(apply_rental_stats, Rental.id == rental.id, created=True)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Спорядження недоступне для оренди")
+    analytics_cache.invalidate_owner(owner.id)
+
+    return format_rental_response(await load_rental(db, rental.id, owner.id))
+
+@router.post("/rentals/{id}/return")
+async def return_rental(id: int, data: RentalReturn, owner: Owner = Depends(get_current_owner_async), db: AsyncSession = Depends(get_async_db)):
+    # 1. Знайти та заблокувати оренду (в межах власника)
+    # Паралельне повернення чекає на блокування і бачить уже заповнений return_at
+    rental = await load_rental(db, id, owner.id, for_update=True)
+    if not rental:
+        raise HTTPException(status_code=404, detail="Оренду не знайдено")
+
+    # 2. Перевірити що оренда ще активна
+    if rental.return_at:
+        raise HTTPException(status_code=400, detail="Спорядження вже повернуто")
+
+    # 3. Валідація condition_score
+    validate_condition_score(data.condition_score)
+
+    # 4. Оновити оренду
+    rental.return_at = datetime.utcnow()
+    rental.condition_score = data.condition_score
+    rental.comment = data.comment
+
+    # 5. Змінити статус gear на основі condition_score
+    gear = rental.gear
+    if gear and gear.owner_id == owner.id:
+        gear.last_returned_at = rental.return_at
+        gear.status = gear_status_after_return(data.condition_score)
+
+    await db.flush()
+    await db.run_sync(apply_rental_stats, Rental.id == rental.id, returned=True)
+    await db.commit()
+    analytics_cache.invalidate_owner(owner.id)
+
+    return format_rental_response(rental)
+
+@router.get("/rentals/{id}")
+async def get_rental(id: int, owner: Owner = Depends(get_current_owner_async), db: AsyncSession = Depends(get_async_db)):
+    rental = await load_rental(db, id, owner.id)
+    if not rental:
+        raise HTTPException(status_code=404, detail="Оренду не знайдено")
+    return format_rental_response(rental)
@@ -1,24 +1,109 @@
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.cache import token_cache
+import asyncio
 import os
+import threading
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Вартість bcrypt; хеші з іншою вартістю перехешовуються при вході
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-def hash_password(password: str) -> str:
+# Окремий пул процесів для bcrypt та ліміт черги очікування
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", "2"))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "16"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+class PasswordPoolBusy(Exception):
+    pass
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(PASSWORD_POOL_SIZE + PASSWORD_QUEUE_LIMIT)
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PASSWORD_POOL_SIZE)
+        return _pool
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    # Пул зламаний (воркер аварійно завершився) - наступний запит створить новий
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+async def _run_in_pool(fn, *args):
+    # Якщо всі воркери зайняті і черга заповнена - одразу відмовляємо, не блокуючи event loop
+    if not _pool_slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        # Після BrokenProcessPool - новий пул і одна повторна спроба (хешування ідемпотентне)
+        for attempt in range(2):
+            pool = _get_pool()
+            try:
+                return await asyncio.wrap_future(pool.submit(fn, *args))
+            except BrokenProcessPool:
+                _reset_pool(pool)
+                if attempt:
+                    raise
+    finally:
+        _pool_slots.release()
+
+def shutdown_password_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+def _verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain, hashed)
+
+async def hash_password(password: str) -> str:
+    return await _run_in_pool(_hash, password)
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return (await verify_and_update_password(plain, hashed))[0]
+
+async def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    # Повертає (чи вірний пароль, новий хеш якщо вартість застаріла)
+    return await _run_in_pool(_verify_and_update, plain, hashed)
 
 def create_token(owner_id: int) -> str:
     expires = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     return jwt.encode({"sub": str(owner_id), "exp": expires}, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_token(token: str) -> int:
+    owner_id = token_cache.get(token)
+    if owner_id is not None:
+        return owner_id
+
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    return int(payload["sub"])
+    owner_id = int(payload["sub"])
+
+    # Токен кешується не довше, ніж до закінчення його терміну дії
+    ttl = min(token_cache.ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, owner_id, ttl=ttl)
+    return owner_id
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from functools import wraps
+import inspect
+import json
+import os
+import threading
+import time
+
+ANALYTICS_CACHE_ENABLED = os.getenv("ANALYTICS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1024"))
+ANALYTICS_CACHE_MAX_BYTES = int(os.getenv("ANALYTICS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CACHE_MAX_BYTES = int(os.getenv("AUTH_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+def estimate_size(value) -> int:
+    # Приблизний розмір відповіді - довжина її JSON-представлення
+    return len(json.dumps(value, default=str))
+
+class TTLCache:
+    """In-process LRU кеш з TTL та обмеженням за кількістю записів і пам'яттю"""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int, enabled: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        if not self.enabled:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._put(key, value, size, ttl)
+
+    def _put(self, key, value, size: int, ttl: float | None = None):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate(self, predicate):
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+class AnalyticsCache(TTLCache):
+    """Кеш результатів аналітики з ключем (owner_id, endpoint, params)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._generations = {}  # owner_id -> лічильник інвалідацій
+
+    def generation(self, owner_id: int) -> int:
+        with self._lock:
+            return self._generations.get(owner_id, 0)
+
+    def get_or_compute(self, owner_id: int, endpoint: str, params: tuple, compute):
+        if not self.enabled:
+            return compute()
+        key = (owner_id, endpoint, params)
+        value = self.get(key)
+        if value is None:
+            # Якщо під час обчислення дані власника змінились - результат може бути застарілим, не кешуємо
+            generation = self.generation(owner_id)
+            value = compute()
+            size = estimate_size(value)
+            if size <= self.max_bytes:
+                with self._lock:
+                    if self._generations.get(owner_id, 0) == generation:
+                        self._put(key, value, size)
+        return value
+
+    def invalidate_owner(self, owner_id: int):
+        with self._lock:
+            self._generations[owner_id] = self._generations.get(owner_id, 0) + 1
+        if self.enabled:
+            self.invalidate(lambda key: key[0] == owner_id)
+
+analytics_cache = AnalyticsCache(
+    ttl=ANALYTICS_CACHE_TTL,
+    max_entries=ANALYTICS_CACHE_MAX_ENTRIES,
+    max_bytes=ANALYTICS_CACHE_MAX_BYTES,
+    enabled=ANALYTICS_CACHE_ENABLED,
+)
+
+# Кеш перевірених JWT токенів (token -> owner_id) та ідентичності власників (owner_id -> OwnerIdentity)
+token_cache = TTLCache(
+    ttl=AUTH_CACHE_TTL,
+    max_entries=AUTH_CACHE_MAX_ENTRIES,
+    max_bytes=AUTH_CACHE_MAX_BYTES,
+    enabled=AUTH_CACHE_ENABLED,
+)
+
+owner_cache = TTLCache(
+    ttl=AUTH_CACHE_TTL,
+    max_entries=AUTH_CACHE_MAX_ENTRIES,
+    max_bytes=AUTH_CACHE_MAX_BYTES,
+    enabled=AUTH_CACHE_ENABLED,
+)
+
+def cached_analytics(func):
+    # Декоратор для analytics endpoints: кешує відповідь за власником та параметрами запиту
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        owner = kwargs["owner"]
+        # Параметри зі значеннями за замовчуванням - однаковий ключ для HTTP запиту та прямого виклику (bundle)
+        bound = signature.bind_partial(**kwargs)
+        bound.apply_defaults()
+        params = tuple(sorted((k, v) for k, v in bound.arguments.items() if k not in ("owner", "db")))
+        return analytics_cache.get_or_compute(owner.id, func.__name__, params, lambda: func(*args, **kwargs))
+    return wrapper
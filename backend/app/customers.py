@@ -0,0 +1,23 @@
+from sqlalchemy import func
+from app.models import Customer
+
+# Код країни для номерів, введених у локальному форматі (067... -> 38067...)
+PHONE_COUNTRY_PREFIX = "38"
+
+def normalize_phone_digits(value: str) -> str | None:
+    # Повертає лише цифри, якщо пошуковий запит схожий на номер телефону
+    stripped = value.replace("+", "").replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+    return stripped if stripped.isdigit() else None
+
+def apply_customer_search(query, search: str):
+    """Цифри - префіксний пошук по phone_digits, текст - триграмний пошук по імені з ранжуванням за схожістю"""
+    digits = normalize_phone_digits(search)
+    if digits:
+        condition = Customer.phone_digits.like(f"{digits}%")
+        if digits.startswith("0"):
+            condition = condition | Customer.phone_digits.like(f"{PHONE_COUNTRY_PREFIX}{digits}%")
+        return query.filter(condition).order_by(Customer.phone_digits, Customer.id)
+
+    return query.filter(
+        Customer.full_name.ilike(f"%{search}%") | Customer.full_name.op("%")(search)
+    ).order_by(func.similarity(Customer.full_name, search).desc(), Customer.id)
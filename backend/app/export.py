@@ -0,0 +1,126 @@
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from datetime import datetime
+from decimal import Decimal
+import csv
+import io
+import json
+import os
+from app.models import Gear, Customer, Rental, Brand
+
+# Кількість рядків, які server-side курсор (named cursor psycopg2) віддає за один раз
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Колонки експорту: назва поля -> вираз SQL (лише колонки, без ORM-об'єктів в identity map)
+RENTAL_EXPORT_COLUMNS = {
+    "id": Rental.id,
+    "start_at": Rental.start_at,
+    "due_at": Rental.due_at,
+    "return_at": Rental.return_at,
+    "rental_type": Rental.rental_type,
+    "total_price": Rental.total_price,
+    "condition_score": Rental.condition_score,
+    "comment": Rental.comment,
+    "created_at": Rental.created_at,
+    "gear_id": Rental.gear_id,
+    "gear_type": Gear.type,
+    "gear_brand": Brand.name,
+    "gear_size": Gear.size,
+    "customer_id": Rental.customer_id,
+    "customer_name": Customer.full_name,
+    "customer_phone": Customer.phone,
+}
+
+CUSTOMER_EXPORT_COLUMNS = {
+    "id": Customer.id,
+    "full_name": Customer.full_name,
+    "phone": Customer.phone,
+    "created_at": Customer.created_at,
+}
+
+GEAR_EXPORT_COLUMNS = {
+    "id": Gear.id,
+    "type": Gear.type,
+    "brand": Brand.name,
+    "size": Gear.size,
+    "status": Gear.status,
+    "hourly_price": Gear.hourly_price,
+    "daily_price": Gear.daily_price,
+    "last_returned_at": Gear.last_returned_at,
+    "created_at": Gear.created_at,
+}
+
+def rental_export_statement():
+    return select(*RENTAL_EXPORT_COLUMNS.values())\
+        .select_from(Rental)\
+        .join(Gear, Rental.gear_id == Gear.id)\
+        .outerjoin(Brand, Gear.brand_id == Brand.id)\
+        .join(Customer, Rental.customer_id == Customer.id)
+
+def customer_export_statement():
+    return select(*CUSTOMER_EXPORT_COLUMNS.values())
+
+def gear_export_statement():
+    return select(*GEAR_EXPORT_COLUMNS.values())\
+        .select_from(Gear)\
+        .outerjoin(Brand, Gear.brand_id == Brand.id)
+
+def filter_created_range(statement, column, date_from: datetime | None, date_to: datetime | None):
+    if date_from:
+        statement = statement.where(column >= date_from)
+    if date_to:
+        statement = statement.where(column < date_to)
+    return statement
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def iter_csv(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for partition in rows:
+        for row in partition:
+            writer.writerow([export_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_ndjson(rows, fields):
+    for partition in rows:
+        yield "".join(
+            json.dumps(dict(zip(fields, (export_value(value) for value in row))), ensure_ascii=False) + "\n"
+            for row in partition
+        )
+
+def stream_export(db: Session, statement, fields: list[str], format: str, filename: str):
+    """Стрімінг результату запиту пачками по EXPORT_BATCH_SIZE - пам'ять не залежить від кількості рядків"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Формат має бути 'csv' або 'ndjson'")
+
+    def generate():
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        try:
+            rows = result.partitions()
+            yield from (iter_csv(rows, fields) if format == "csv" else iter_ndjson(rows, fields))
+        finally:
+            result.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
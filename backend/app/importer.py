@@ -0,0 +1,236 @@
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from decimal import Decimal, InvalidOperation
+import csv
+import os
+import tempfile
+from app.models import GearType, GearStatus
+
+# Валідні рядки накопичуються у тимчасовому файлі: в пам'яті до IMPORT_SPOOL_BYTES, далі на диску
+IMPORT_SPOOL_BYTES = int(os.getenv("IMPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+GEAR_IMPORT_COLUMNS = ("type", "brand", "size", "status", "hourly_price", "daily_price", "notes")
+GEAR_REQUIRED_COLUMNS = ("type", "brand", "hourly_price", "daily_price")
+
+CUSTOMER_IMPORT_COLUMNS = ("full_name", "phone", "notes")
+CUSTOMER_REQUIRED_COLUMNS = ("full_name", "phone")
+
+# numeric(10, 2)
+MAX_PRICE = Decimal("100000000")
+
+GEAR_TYPES = {gear_type.value for gear_type in GearType}
+GEAR_STATUSES = {gear_status.value for gear_status in GearStatus}
+
+def clean(row: dict, column: str) -> str | None:
+    value = (row.get(column) or "").strip()
+    return value or None
+
+def required(row: dict, column: str, max_length: int, message: str) -> str:
+    value = clean(row, column)
+    if not value:
+        raise ValueError(message)
+    if len(value) > max_length:
+        raise ValueError(f"Поле {column} довше за {max_length} символів")
+    return value
+
+def positive_price(row: dict, column: str) -> Decimal:
+    try:
+        price = Decimal(clean(row, column) or "")
+    except InvalidOperation:
+        raise ValueError(f"Поле {column} має бути числом")
+    if not price.is_finite():
+        raise ValueError(f"Поле {column} має бути числом")
+    if price <= 0:
+        raise ValueError(f"Поле {column} має бути більше 0")
+    if price >= MAX_PRICE:
+        raise ValueError(f"Поле {column} завелике")
+    return price
+
+def validate_gear_row(row: dict) -> tuple:
+    gear_type = clean(row, "type")
+    if gear_type not in GEAR_TYPES:
+        raise ValueError("Тип має бути 'ski', 'skate' або 'sled'")
+    brand = required(row, "brand", 100, "Бренд обов'язковий")
+    size = clean(row, "size")
+    if size and len(size) > 20:
+        raise ValueError("Поле size довше за 20 символів")
+    status = clean(row, "status") or "available"
+    if status not in GEAR_STATUSES:
+        raise ValueError("Статус має бути 'available', 'rented' або 'broken'")
+    return (
+        gear_type, brand, size, status,
+        positive_price(row, "hourly_price"), positive_price(row, "daily_price"),
+        clean(row, "notes")
+    )
+
+def validate_customer_row(row: dict) -> tuple:
+    return (
+        required(row, "full_name", 255, "Ім'я обов'язкове"),
+        required(row, "phone", 20, "Телефон обов'язковий"),
+        clean(row, "notes")
+    )
+
+def stage_rows(lines, required_columns, validate, errors: list):
+    """Потокова валідація CSV: валідні рядки пишуться у CSV для COPY, помилки - у звіт"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES, mode="w+", newline="", encoding="utf-8")
+    writer = csv.writer(buffer)
+    total = 0
+    try:
+        reader = csv.DictReader(lines)
+        missing = [column for column in required_columns if column not in (reader.fieldnames or [])]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Відсутні колонки: {', '.join(missing)}")
+
+        # Рядок 1 - заголовок, тому нумерація даних з 2 (як у табличному редакторі)
+        for row_number, row in enumerate(reader, start=2):
+            total += 1
+            try:
+                values = validate(row)
+            except ValueError as e:
+                errors.append({"row": row_number, "error": str(e)})
+                continue
+            writer.writerow((row_number, *values))
+    except UnicodeDecodeError:
+        buffer.close()
+        raise HTTPException(status_code=400, detail="Файл має бути у кодуванні UTF-8")
+    except csv.Error as e:
+        buffer.close()
+        raise HTTPException(status_code=400, detail=f"Некоректний CSV: {e}")
+    except HTTPException:
+        buffer.close()
+        raise
+
+    buffer.seek(0)
+    return buffer, total
+
+def copy_to_staging(db: Session, table: str, columns: tuple, buffer):
+    # COPY через psycopg2 у межах транзакції сесії
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} (row_number, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    db.execute(text(f"ANALYZE {table}"))
+
+def staging_errors(db: Session, table: str) -> list[dict]:
+    return [
+        {"row": row_number, "error": error}
+        for row_number, error in db.execute(text(
+            f"SELECT row_number, error FROM {table} WHERE error IS NOT NULL"
+        ))
+    ]
+
+def import_report(total: int, imported: int, errors: list[dict], **extra) -> dict:
+    return {
+        "total_rows": total,
+        "imported": imported,
+        "failed": len(errors),
+        **extra,
+        "errors": sorted(errors, key=lambda error: error["row"]),
+    }
+
+def import_customers_csv(db: Session, lines, owner_id: int) -> dict:
+    """Імпорт клієнтів: COPY у staging, set-based перевірка дублікатів (owner_id, phone), INSERT ... SELECT"""
+    errors = []
+    buffer, total = stage_rows(lines, CUSTOMER_REQUIRED_COLUMNS, validate_customer_row, errors)
+    try:
+        db.execute(text("""
+            CREATE TEMP TABLE import_customers (
+                row_number integer PRIMARY KEY,
+                full_name varchar(255) NOT NULL,
+                phone varchar(20) NOT NULL,
+                notes text,
+                error text
+            ) ON COMMIT DROP
+        """))
+        copy_to_staging(db, "import_customers", CUSTOMER_IMPORT_COLUMNS, buffer)
+    finally:
+        buffer.close()
+    db.execute(text("CREATE INDEX ON import_customers (phone, row_number)"))
+
+    # Телефон вже є у власника
+    db.execute(text("""
+        UPDATE import_customers s SET error = 'Клієнт з таким номером телефону вже існує'
+        FROM customers c
+        WHERE c.owner_id = :owner_id AND c.phone = s.phone
+    """), {"owner_id": owner_id})
+
+    # Повтор телефону у файлі: залишається лише перший рядок
+    db.execute(text("""
+        UPDATE import_customers s SET error = 'Дублікат телефону у файлі'
+        WHERE s.error IS NULL AND EXISTS (
+            SELECT 1 FROM import_customers d
+            WHERE d.phone = s.phone AND d.row_number < s.row_number
+        )
+    """))
+
+    # Паралельне створення клієнта з тим самим телефоном між перевіркою та INSERT -> uq_customers_phone_owner
+    try:
+        imported = db.execute(text("""
+            INSERT INTO customers (full_name, phone, notes, owner_id)
+            SELECT full_name, phone, notes, :owner_id
+            FROM import_customers
+            WHERE error IS NULL
+            ORDER BY row_number
+        """), {"owner_id": owner_id}).rowcount
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Клієнтів з цими телефонами створено паралельно, повторіть імпорт")
+
+    errors.extend(staging_errors(db, "import_customers"))
+    db.commit()
+    return import_report(total, imported, errors)
+
+def import_gear_csv(db: Session, lines, owner_id: int, create_brands: bool = True) -> dict:
+    """Імпорт спорядження: COPY у staging, бренди за назвою (відсутні створюються), INSERT ... SELECT"""
+    errors = []
+    buffer, total = stage_rows(lines, GEAR_REQUIRED_COLUMNS, validate_gear_row, errors)
+    try:
+        db.execute(text("""
+            CREATE TEMP TABLE import_gear (
+                row_number integer PRIMARY KEY,
+                type text NOT NULL,
+                brand varchar(100) NOT NULL,
+                size varchar(20),
+                status text NOT NULL,
+                hourly_price numeric(10, 2) NOT NULL,
+                daily_price numeric(10, 2) NOT NULL,
+                notes text,
+                error text
+            ) ON COMMIT DROP
+        """))
+        copy_to_staging(db, "import_gear", GEAR_IMPORT_COLUMNS, buffer)
+    finally:
+        buffer.close()
+
+    brands_created = 0
+    if create_brands:
+        # ON CONFLICT - бренд, створений паралельно (інший імпорт або POST /brands) між перевіркою та INSERT
+        brands_created = db.execute(text("""
+            INSERT INTO brands (name, owner_id)
+            SELECT DISTINCT s.brand, CAST(:owner_id AS integer)
+            FROM import_gear s
+            WHERE NOT EXISTS (SELECT 1 FROM brands b WHERE b.owner_id = :owner_id AND b.name = s.brand)
+            ON CONFLICT (name, owner_id) DO NOTHING
+        """), {"owner_id": owner_id}).rowcount
+    else:
+        db.execute(text("""
+            UPDATE import_gear s SET error = 'Бренд не знайдено'
+            WHERE NOT EXISTS (SELECT 1 FROM brands b WHERE b.owner_id = :owner_id AND b.name = s.brand)
+        """), {"owner_id": owner_id})
+
+    imported = db.execute(text("""
+        INSERT INTO gear (type, brand_id, size, status, hourly_price, daily_price, notes, owner_id)
+        SELECT CAST(s.type AS gear_type_enum), b.id, s.size, CAST(s.status AS gear_status_enum),
+               s.hourly_price, s.daily_price, s.notes, :owner_id
+        FROM import_gear s
+        JOIN brands b ON b.owner_id = :owner_id AND b.name = s.brand
+        WHERE s.error IS NULL
+        ORDER BY s.row_number
+    """), {"owner_id": owner_id}).rowcount
+
+    errors.extend(staging_errors(db, "import_gear"))
+    db.commit()
+    return import_report(total, imported, errors, brands_created=brands_created)
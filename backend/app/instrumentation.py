@@ -0,0 +1,99 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+import logging
+import os
+import time
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_SQL = int(os.getenv("SLOW_QUERY_MAX_SQL", "1000"))
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+class RequestQueryStats:
+    """Лічильники SQL запитів одного HTTP запиту"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.owner_id = None
+
+    @property
+    def route(self) -> str:
+        # FastAPI додає маршрут у scope після роутингу
+        route = self.scope.get("route")
+        path = route.path if route is not None else self.scope.get("path")
+        return f"{self.scope.get('method')} {path}"
+
+request_query_stats: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+def set_request_owner(owner_id: int):
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.owner_id = owner_id
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "slow query %.1f ms route=%s owner_id=%s sql=%s",
+            elapsed * 1000,
+            stats.route if stats else None,
+            stats.owner_id if stats else None,
+            " ".join(statement.split())[:SLOW_QUERY_MAX_SQL],
+        )
+
+def handle_error(exception_context):
+    # Запит завершився помилкою - прибрати його час початку зі стеку з'єднання
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+def instrument_engine(engine):
+    """Підключає лічильник та slow-query лог до sync engine (для async - engine.sync_engine)"""
+    if not QUERY_STATS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+class QueryStatsMiddleware:
+    """ASGI middleware: кількість і час SQL запитів у заголовках X-DB-Queries та Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = request_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", app;dur={total:.1f}'.encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            request_query_stats.reset(token)
@@ -1,10 +1,16 @@
-from fastapi import FastAPI, Depends, Header, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import text, func
+from sqlalchemy import text, func, true, inspect, tuple_, event, insert, update, case, cast
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-from app import get_db, Owner, Gear, Customer, Rental, Brand, OwnerRegister, OwnerLogin, GearCreate, CustomerCreate, CustomerUpdate, RentalCreate, RentalReturn, BrandCreate, BrandUpdate, hash_password, verify_password, create_token, verify_token
+from typing import Annotated
+import anyio
+import codecs
+from app import apply_customer_search, customer_segment_rows, segment_customer_rows, validate_segment_limit, encode_segment_cursor, decode_segment_cursor, format_segment_customer, CUSTOMER_SEGMENTS, CUSTOMER_SEGMENT_TOP_N, brand_stats, top_gear_stats, top_customer_stats, low_condition_customer_stats, compute_sections, MetricsMiddleware, render_metrics, QueryStatsMiddleware, instrument_engine, set_request_owner, engine, apply_rental_stats, stats_since, RentalDailyStats, import_gear_csv, import_customers_csv, filter_rentals_by_status, stream_export, rental_export_statement, customer_export_statement, gear_export_statement, filter_created_range, RENTAL_EXPORT_COLUMNS, CUSTOMER_EXPORT_COLUMNS, GEAR_EXPORT_COLUMNS, get_db, get_pool_status, async_engine, DB_ASYNC, rental_details_options, format_rental_response, validate_rental_terms, calculate_rental_terms, reserve_gear_statement, validate_condition_score, gear_status_after_return, Owner, Gear, Customer, Rental, Brand, OwnerRegister, OwnerLogin, OwnerIdentity, SegmentationSettings, GearCreate, CustomerCreate, CustomerUpdate, RentalCreate, RentalBatchCreate, RentalReturn, RentalBatchReturn, BrandCreate, BrandUpdate, hash_password, verify_and_update_password, create_token, verify_token, PasswordPoolBusy, shutdown_password_pool, analytics_cache, cached_analytics, token_cache, owner_cache, encode_cursor, decode_cursor, parse_cursor_value, paginate, MAX_PAGE_SIZE
 
 app = FastAPI(title="Ski Rental API")
 
@@ -18,31 +24,106 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "Server-Timing"],
 )
 
+# Кількість і час SQL запитів на кожен HTTP запит, slow-query лог
+app.add_middleware(QueryStatsMiddleware)
+instrument_engine(engine)
+
+# Латентність, статуси та in-flight запитів по маршрутах для /metrics
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(PasswordPoolBusy)
+def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(status_code=503, content={"detail": "Сервер перевантажений, спробуйте пізніше"}, headers={"Retry-After": "1"})
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_password_pool()
+
 def get_current_owner(authorization: str = Header(), db: Session = Depends(get_db)):
     token = authorization.replace("Bearer ", "")
     owner_id = verify_token(token)
-    return db.query(Owner).filter(Owner.id == owner_id).first()
+
+    owner = owner_cache.get(owner_id)
+    if owner is None:
+        row = db.query(Owner).filter(Owner.id == owner_id).first()
+        if not row:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        owner = OwnerIdentity.model_validate(row)
+        owner_cache.set(owner_id, owner)
+    set_request_owner(owner.id)
+    return owner
+
+# Скидати кеш ідентичності при зміні або видаленні власника
+@event.listens_for(Owner, "after_update")
+@event.listens_for(Owner, "after_delete")
+def invalidate_owner_identity(mapper, connection, target):
+    owner_cache.pop(target.id)
 
 @app.get("/health")
 def health_check(db: Session = Depends(get_db)):
     db.execute(text("SELECT 1"))
     return {"status": "ok", "database": "connected"}
 
+@app.get("/health/pool")
+def pool_status():
+    return get_pool_status()
+
+@app.get("/health/cache")
+def cache_stats():
+    return {
+        "analytics": analytics_cache.stats(),
+        "tokens": token_cache.stats(),
+        "owners": owner_cache.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # async - виконується в event loop разом з MetricsMiddleware, без блокувань
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    threadpool = {
+        "busy": limiter.borrowed_tokens,
+        "limit": limiter.total_tokens,
+        "waiting": limiter.statistics().tasks_waiting,
+    }
+    caches = {
+        "analytics": analytics_cache.stats(),
+        "tokens": token_cache.stats(),
+        "owners": owner_cache.stats()
+    }
+    return PlainTextResponse(
+        render_metrics(get_pool_status(), caches, threadpool),
+        media_type="text/plain; version=0.0.4"
+    )
+
+# async - bcrypt чекає на пул процесів без зайнятого потоку; запити до БД виконуються в пулі потоків
 @app.post("/register")
-def register(data: OwnerRegister, db: Session = Depends(get_db)):
-    owner = Owner(email=data.email, password_hash=hash_password(data.password), company_name=data.company_name)
-    db.add(owner)
-    db.commit()
-    db.refresh(owner)
+async def register(data: OwnerRegister, db: Session = Depends(get_db)):
+    owner = Owner(email=data.email, password_hash=await hash_password(data.password), company_name=data.company_name)
+
+    def save():
+        db.add(owner)
+        db.commit()
+        db.refresh(owner)
+    await anyio.to_thread.run_sync(save)
     return {"id": owner.id, "email": owner.email, "token": create_token(owner.id)}
 
 @app.post("/login")
-def login(data: OwnerLogin, db: Session = Depends(get_db)):
-    owner = db.query(Owner).filter(Owner.email == data.email).first()
-    if not owner or not verify_password(data.password, owner.password_hash):
+async def login(data: OwnerLogin, db: Session = Depends(get_db)):
+    owner = await anyio.to_thread.run_sync(lambda: db.query(Owner).filter(Owner.email == data.email).first())
+    if not owner:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password(data.password, owner.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Прозоро перехешувати пароль із застарілою вартістю bcrypt
+    if new_hash:
+        owner.password_hash = new_hash
+        await anyio.to_thread.run_sync(db.commit)
+
     return {
         "id": owner.id,
         "email": owner.email,
@@ -50,12 +131,35 @@ def login(data: OwnerLogin, db: Session = Depends(get_db)):
         "token": create_token(owner.id)
     }
 
+@app.get("/settings/segmentation")
+def get_segmentation_settings(owner: Owner = Depends(get_current_owner)):
+    return {
+        "vip_min_rentals": owner.segment_vip_min_rentals,
+        "regular_min_rentals": owner.segment_regular_min_rentals
+    }
+
+@app.put("/settings/segmentation")
+def update_segmentation_settings(data: SegmentationSettings, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
+    # Пороги за кількістю оренд: Occasional < regular_min_rentals <= Regular < vip_min_rentals <= VIP
+    if not 1 <= data.regular_min_rentals < data.vip_min_rentals <= 32767:
+        raise HTTPException(status_code=400, detail="Пороги мають задовольняти 1 <= regular_min_rentals < vip_min_rentals")
+
+    row = db.query(Owner).filter(Owner.id == owner.id).first()
+    row.segment_vip_min_rentals = data.vip_min_rentals
+    row.segment_regular_min_rentals = data.regular_min_rentals
+    db.commit()
+    analytics_cache.invalidate_owner(owner.id)
+    return data
+
 @app.get("/gear")
 def get_gear(
     type: str | None = None,
     status: str | None = None,
     page: int = 1,
     page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
     owner: Owner = Depends(get_current_owner),
     db: Session = Depends(get_db)
 ):
@@ -65,26 +169,17 @@ def get_gear(
     if status:
         query = query.filter(Gear.status == status)
 
-    # Get total count before pagination
-    total = query.count()
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    gear = query.limit(page_size).offset(offset).all()
-
-    return {
-        "items": gear,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
-    }
+    return paginate(
+        query, (Gear.created_at, Gear.id), page, page_size,
+        cursor=cursor, include_total=include_total, approximate_total=approximate_total
+    )
 
 @app.post("/gear")
 def create_gear(data: GearCreate, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     gear = Gear(**data.dict(), owner_id=owner.id)
     db.add(gear)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     db.refresh(gear)
     return gear
 
@@ -93,9 +188,17 @@ def update_gear(id: int, data: GearCreate, owner: Owner = Depends(get_current_ow
     gear = db.query(Gear).filter(Gear.id == id, Gear.owner_id == owner.id).first()
     if not gear:
         raise HTTPException(status_code=404, detail="Not found")
+    # Зміна типу переносить оренди gear в іншу групу rollup
+    type_changed = data.type != gear.type
+    if type_changed:
+        apply_rental_stats(db, Rental.gear_id == gear.id, created=True, returned=True, sign=-1)
     for key, value in data.dict(exclude_unset=True).items():
         setattr(gear, key, value)
+    if type_changed:
+        db.flush()
+        apply_rental_stats(db, Rental.gear_id == gear.id, created=True, returned=True)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     db.refresh(gear)
     return gear
 
@@ -104,8 +207,11 @@ def delete_gear(id: int, owner: Owner = Depends(get_current_owner), db: Session
     gear = db.query(Gear).filter(Gear.id == id, Gear.owner_id == owner.id).first()
     if not gear:
         raise HTTPException(status_code=404, detail="Not found")
+    # Оренди видаляються каскадно - відняти їх внесок з rollup
+    apply_rental_stats(db, Rental.gear_id == gear.id, created=True, returned=True, sign=-1)
     db.delete(gear)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     return {"message": "Deleted"}
 
 @app.get("/customers")
@@ -113,31 +219,20 @@ def get_customers(
     search: str | None = None,
     page: int = 1,
     page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
     owner: Owner = Depends(get_current_owner),
     db: Session = Depends(get_db)
 ):
     query = db.query(Customer).filter(Customer.owner_id == owner.id)
     if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            (Customer.full_name.ilike(search_pattern)) |
-            (Customer.phone.ilike(search_pattern))
-        )
+        query = apply_customer_search(query, search)
 
-    # Get total count before pagination
-    total = query.count()
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    customers = query.limit(page_size).offset(offset).all()
-
-    return {
-        "items": customers,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
-    }
+    return paginate(
+        query, (Customer.full_name, Customer.id), page, page_size,
+        cursor=cursor, include_total=include_total, approximate_total=approximate_total
+    )
 
 @app.post("/customers")
 def create_customer(data: CustomerCreate, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
@@ -149,6 +244,7 @@ def create_customer(data: CustomerCreate, owner: Owner = Depends(get_current_own
     customer = Customer(**data.dict(), owner_id=owner.id)
     db.add(customer)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     db.refresh(customer)
     return customer
 
@@ -167,6 +263,7 @@ def update_customer(id: int, data: CustomerUpdate, owner: Owner = Depends(get_cu
     for key, value in data.dict(exclude_unset=True).items():
         setattr(customer, key, value)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     db.refresh(customer)
     return customer
 
@@ -175,45 +272,22 @@ def delete_customer(id: int, owner: Owner = Depends(get_current_owner), db: Sess
     customer = db.query(Customer).filter(Customer.id == id, Customer.owner_id == owner.id).first()
     if not customer:
         raise HTTPException(status_code=404, detail="Клієнта не знайдено")
+    # Оренди видаляються каскадно - відняти їх внесок з rollup
+    apply_rental_stats(db, Rental.customer_id == customer.id, created=True, returned=True, sign=-1)
     db.delete(customer)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     return {"message": "Deleted"}
 
-# Helper функція для форматування відповіді rental
-def format_rental_response(rental: Rental, db: Session):
-    gear = db.query(Gear).filter(Gear.id == rental.gear_id).first()
-    customer = db.query(Customer).filter(Customer.id == rental.customer_id).first()
-    brand = db.query(Brand).filter(Brand.id == gear.brand_id).first() if gear else None
-
-    is_overdue = False
-    if not rental.return_at and rental.due_at < datetime.utcnow():
-        is_overdue = True
-
-    return {
-        "id": rental.id,
-        "gear_id": rental.gear_id,
-        "customer_id": rental.customer_id,
-        "start_at": rental.start_at.isoformat() if rental.start_at else None,
-        "due_at": rental.due_at.isoformat() if rental.due_at else None,
-        "return_at": rental.return_at.isoformat() if rental.return_at else None,
-        "rental_type": rental.rental_type,
-        "total_price": float(rental.total_price),
-        "condition_score": rental.condition_score,
-        "comment": rental.comment,
-        "created_at": rental.created_at.isoformat() if rental.created_at else None,
-        "gear": {
-            "id": gear.id,
-            "type": gear.type,
-            "brand": brand.name if brand else None,
-            "size": gear.size
-        },
-        "customer": {
-            "id": customer.id,
-            "full_name": customer.full_name,
-            "phone": customer.phone
-        },
-        "is_overdue": is_overdue
-    }
+# Форматування списку оренд: gear, brand та customer для всієї сторінки завантажуються одним запитом
+def format_rentals_response(rentals: list[Rental], db: Session):
+    not_loaded = [
+        r.id for r in rentals
+        if {'gear', 'customer'} & inspect(r).unloaded
+    ]
+    if not_loaded:
+        db.query(Rental).options(*rental_details_options()).filter(Rental.id.in_(not_loaded)).all()
+    return [format_rental_response(r) for r in rentals]
 
 @app.get("/rentals")
 def get_rentals(
@@ -222,74 +296,52 @@ def get_rentals(
     gear_id: int | None = None,
     page: int = 1,
     page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
     owner: Owner = Depends(get_current_owner),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Rental).filter(Rental.owner_id == owner.id)
-
-    if status == 'active':
-        query = query.filter(Rental.return_at.is_(None))
-    elif status == 'completed':
-        query = query.filter(Rental.return_at.isnot(None))
-    elif status == 'overdue':
-        query = query.filter(
-            Rental.return_at.is_(None),
-            Rental.due_at < func.now()
-        )
+    query = db.query(Rental).options(*rental_details_options()).filter(Rental.owner_id == owner.id)
+    query = filter_rentals_by_status(query, status)
 
     if customer_id:
         query = query.filter(Rental.customer_id == customer_id)
     if gear_id:
         query = query.filter(Rental.gear_id == gear_id)
 
-    # Get total count before pagination
-    total = query.count()
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    rentals = query.order_by(Rental.created_at.desc()).limit(page_size).offset(offset).all()
-
-    return {
-        "items": [format_rental_response(r, db) for r in rentals],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
-    }
+    result = paginate(
+        query.order_by(Rental.created_at.desc()), (Rental.created_at, Rental.id), page, page_size,
+        cursor=cursor, descending=True, include_total=include_total, approximate_total=approximate_total
+    )
+    result["items"] = format_rentals_response(result["items"], db)
+    return result
 
 @app.post("/rentals")
 def create_rental(data: RentalCreate, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
-    # 1. Перевірити що gear існує та доступний (в межах власника)
-    gear = db.query(Gear).filter(Gear.id == data.gear_id, Gear.owner_id == owner.id).first()
+    # 1. Атомарно зайняти gear: умовний UPDATE ... WHERE status='available' (в межах власника)
+    # Паралельний запит на той самий gear чекає на блокування рядка і не знаходить його доступним
+    gear = db.execute(
+        reserve_gear_statement(data.gear_id, owner.id)
+    ).first()
     if not gear:
-        raise HTTPException(status_code=404, detail="Спорядження не знайдено")
-    if gear.status != "available":
+        exists = db.query(Gear.id).filter(Gear.id == data.gear_id, Gear.owner_id == owner.id).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Спорядження не знайдено")
         raise HTTPException(status_code=400, detail="Спорядження недоступне для оренди")
 
-    # 2. Перевірити що customer існує (в межах власника)
+    # 2. Перевірити що customer існує (в межах власника); при помилці транзакція відкочується
     customer = db.query(Customer).filter(Customer.id == data.customer_id, Customer.owner_id == owner.id).first()
     if not customer:
         raise HTTPException(status_code=404, detail="Клієнта не знайдено")
 
-    # 3. Валідація rental_type
-    if data.rental_type not in ['hourly', 'daily']:
-        raise HTTPException(status_code=400, detail="Тип оренди має бути 'hourly' або 'daily'")
-
-    # 4. Валідація duration
-    if data.duration <= 0:
-        raise HTTPException(status_code=400, detail="Тривалість має бути більше 0")
-
-    # 5. Розрахувати ціну та дати
-    start_at = datetime.utcnow()
+    # 3. Валідація rental_type та duration
+    validate_rental_terms(data.rental_type, data.duration)
 
-    if data.rental_type == 'hourly':
-        total_price = float(gear.hourly_price) * data.duration
-        due_at = start_at + timedelta(hours=data.duration)
-    else:  # daily
-        total_price = float(gear.daily_price) * data.duration
-        due_at = start_at + timedelta(days=data.duration)
+    # 4. Розрахувати ціну та дати
+    start_at, due_at, total_price = calculate_rental_terms(gear, data.rental_type, data.duration)
 
-    # 6. Створити оренду
+    # 5. Створити оренду (статус gear вже 'rented')
     rental = Rental(
         gear_id=data.gear_id,
         customer_id=data.customer_id,
@@ -301,18 +353,120 @@ def create_rental(data: RentalCreate, owner: Owner = Depends(get_current_owner),
     )
     db.add(rental)
 
-    # 7. Змінити статус gear на 'rented'
-    gear.status = "rented"
+    # Унікальний частковий індекс гарантує лише одну активну оренду на gear
+    try:
+        db.flush()
+        apply_rental_stats(db, Rental.id == rental.id, created=True)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Спорядження недоступне для оренди")
+    analytics_cache.invalidate_owner(owner.id)
+
+    return format_rentals_response([rental], db)[0]
+
+@app.post("/rentals/batch")
+def create_rentals_batch(data: RentalBatchCreate, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
+    """Групова оренда: кілька одиниць спорядження для одного або кількох клієнтів однією транзакцією"""
+    if not data.items:
+        raise HTTPException(status_code=400, detail="Список оренд порожній")
+
+    gear_ids = {item.gear_id for item in data.items}
+    customer_ids = {item.customer_id for item in data.items}
+
+    # 1. Заблокувати та перевірити все спорядження одним запитом (в межах власника)
+    # Блокування у порядку id - пачки з тим самим gear у різному порядку не отримують deadlock
+    gear_by_id = {
+        gear.id: gear for gear in db.query(Gear.id, Gear.status, Gear.hourly_price, Gear.daily_price)
+        .filter(Gear.id.in_(gear_ids), Gear.owner_id == owner.id)
+        .order_by(Gear.id)
+        .with_for_update()
+    }
 
-    db.commit()
-    db.refresh(rental)
+    # 2. Перевірити всіх клієнтів одним запитом (в межах власника)
+    existing_customers = {
+        customer_id for customer_id, in db.query(Customer.id)
+        .filter(Customer.id.in_(customer_ids), Customer.owner_id == owner.id)
+    }
+
+    # 3. Валідація кожної позиції
+    results = []
+    seen_gear = set()
+    start_at = datetime.utcnow()
+    rows = []
+    for index, item in enumerate(data.items):
+        result = {"index": index, "gear_id": item.gear_id, "customer_id": item.customer_id}
+        gear = gear_by_id.get(item.gear_id)
+        try:
+            if not gear:
+                raise HTTPException(status_code=404, detail="Спорядження не знайдено")
+            if gear.status != "available" or item.gear_id in seen_gear:
+                raise HTTPException(status_code=400, detail="Спорядження недоступне для оренди")
+            if item.customer_id not in existing_customers:
+                raise HTTPException(status_code=404, detail="Клієнта не знайдено")
+            validate_rental_terms(item.rental_type, item.duration)
+        except HTTPException as e:
+            result.update({"status": "error", "detail": e.detail})
+            results.append(result)
+            continue
+
+        seen_gear.add(item.gear_id)
+        _, due_at, total_price = calculate_rental_terms(gear, item.rental_type, item.duration, start_at)
+        rows.append({
+            "gear_id": item.gear_id,
+            "customer_id": item.customer_id,
+            "start_at": start_at,
+            "due_at": due_at,
+            "rental_type": item.rental_type,
+            "total_price": total_price,
+            "owner_id": owner.id
+        })
+        result["status"] = "created"
+        results.append(result)
+
+    failed = len(data.items) - len(rows)
+    if failed and data.all_or_nothing:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"message": "Жодну оренду не створено", "items": results})
+
+    rentals_by_gear = {}
+    if rows:
+        # 4. Створити всі оренди одним INSERT та змінити статус усього gear одним UPDATE
+        # Унікальний частковий індекс (одна активна оренда на gear) спрацьовує вже на INSERT
+        try:
+            created = db.execute(insert(Rental).values(rows).returning(Rental.id, Rental.gear_id)).all()
+            db.execute(
+                update(Gear)
+                .where(Gear.id.in_([row["gear_id"] for row in rows]), Gear.owner_id == owner.id)
+                .values(status="rented")
+                .execution_options(synchronize_session=False)
+            )
+            apply_rental_stats(db, Rental.id.in_([rental_id for rental_id, _ in created]), created=True)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Спорядження недоступне для оренди")
+        analytics_cache.invalidate_owner(owner.id)
+
+        rentals = db.query(Rental).options(*rental_details_options())\
+            .filter(Rental.id.in_([rental_id for rental_id, _ in created])).all()
+        rentals_by_gear = {rental.gear_id: format_rental_response(rental) for rental in rentals}
+
+    for result in results:
+        if result["status"] == "created":
+            result["rental"] = rentals_by_gear[result["gear_id"]]
 
-    return format_rental_response(rental, db)
+    return {
+        "items": results,
+        "created": len(rows),
+        "failed": failed
+    }
 
 @app.post("/rentals/{id}/return")
 def return_rental(id: int, data: RentalReturn, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
-    # 1. Знайти оренду (в межах власника)
-    rental = db.query(Rental).filter(Rental.id == id, Rental.owner_id == owner.id).first()
+    # 1. Знайти та заблокувати оренду (в межах власника)
+    # Паралельне повернення чекає на блокування і бачить уже заповнений return_at
+    rental = db.query(Rental).filter(Rental.id == id, Rental.owner_id == owner.id).with_for_update().first()
     if not rental:
         raise HTTPException(status_code=404, detail="Оренду не знайдено")
 
@@ -321,8 +475,7 @@ def return_rental(id: int, data: RentalReturn, owner: Owner = Depends(get_curren
         raise HTTPException(status_code=400, detail="Спорядження вже повернуто")
 
     # 3. Валідація condition_score
-    if data.condition_score < 1 or data.condition_score > 5:
-        raise HTTPException(status_code=400, detail="Оцінка стану має бути від 1 до 5")
+    validate_condition_score(data.condition_score)
 
     # 4. Оновити оренду
     rental.return_at = datetime.utcnow()
@@ -332,47 +485,208 @@ def return_rental(id: int, data: RentalReturn, owner: Owner = Depends(get_curren
     # 5. Змінити статус gear на основі condition_score
     gear = db.query(Gear).filter(Gear.id == rental.gear_id, Gear.owner_id == owner.id).first()
     if gear:
-        # Якщо оцінка 1 зірка - спорядження зламане
-        if data.condition_score == 1:
-            gear.status = "broken"
-        else:
-            gear.status = "available"
+        gear.last_returned_at = rental.return_at
+        gear.status = gear_status_after_return(data.condition_score)
 
+    db.flush()
+    apply_rental_stats(db, Rental.id == rental.id, returned=True)
     db.commit()
-    db.refresh(rental)
+    analytics_cache.invalidate_owner(owner.id)
+
+    return format_rentals_response([rental], db)[0]
+
+@app.post("/rentals/return/batch")
+def return_rentals_batch(data: RentalBatchReturn, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
+    """Групове повернення в кінці дня: set-based UPDATE rentals та gear однією транзакцією"""
+    if not data.items:
+        raise HTTPException(status_code=400, detail="Список повернень порожній")
+
+    # 1. Знайти та заблокувати всі оренди одним запитом (в межах власника), у порядку id -
+    # пачки з тими самими орендами в різному порядку не отримують deadlock
+    rentals_by_id = {
+        rental.id: rental for rental in db.query(Rental.id, Rental.gear_id, Rental.return_at)
+        .filter(Rental.id.in_({item.id for item in data.items}), Rental.owner_id == owner.id)
+        .order_by(Rental.id)
+        .with_for_update()
+    }
+
+    # 2. Валідація кожної позиції
+    results = []
+    accepted = {}
+    for item in data.items:
+        rental = rentals_by_id.get(item.id)
+        try:
+            if not rental:
+                raise HTTPException(status_code=404, detail="Оренду не знайдено")
+            if rental.return_at or item.id in accepted:
+                raise HTTPException(status_code=400, detail="Спорядження вже повернуто")
+            validate_condition_score(item.condition_score)
+        except HTTPException as e:
+            results.append({"id": item.id, "status": "error", "detail": e.detail})
+            continue
+
+        accepted[item.id] = item
+        results.append({
+            "id": item.id,
+            "status": "returned",
+            "gear_id": rental.gear_id,
+            "gear_status": gear_status_after_return(item.condition_score)
+        })
 
-    return format_rental_response(rental, db)
+    if accepted:
+        return_at = datetime.utcnow()
+
+        # 3. Оновити всі оренди одним UPDATE (оцінка та коментар через CASE по id)
+        db.execute(
+            update(Rental)
+            .where(Rental.id.in_(accepted), Rental.owner_id == owner.id, Rental.return_at.is_(None))
+            .values(
+                return_at=return_at,
+                condition_score=case({rental_id: item.condition_score for rental_id, item in accepted.items()}, value=Rental.id),
+                comment=case({rental_id: item.comment for rental_id, item in accepted.items()}, value=Rental.id)
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        # 4. Змінити статус усього gear одним UPDATE на основі condition_score
+        # (gear заблоковано заздалегідь у порядку id - порядок рядків UPDATE не визначений)
+        gear_statuses = {result["gear_id"]: result["gear_status"] for result in results if result["status"] == "returned"}
+        db.query(Gear.id).filter(Gear.id.in_(gear_statuses), Gear.owner_id == owner.id).order_by(Gear.id)\
+            .with_for_update(key_share=True).all()
+        db.execute(
+            update(Gear)
+            .where(Gear.id.in_(gear_statuses), Gear.owner_id == owner.id)
+            .values(last_returned_at=return_at, status=cast(case(gear_statuses, value=Gear.id), Gear.status.type))
+            .execution_options(synchronize_session=False)
+        )
+        apply_rental_stats(db, Rental.id.in_(accepted), returned=True)
+
+        db.commit()
+        analytics_cache.invalidate_owner(owner.id)
+
+    return {
+        "items": results,
+        "returned": len(accepted),
+        "failed": len(data.items) - len(accepted)
+    }
 
 @app.get("/rentals/{id}")
 def get_rental(id: int, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
-    rental = db.query(Rental).filter(Rental.id == id, Rental.owner_id == owner.id).first()
+    rental = db.query(Rental).options(*rental_details_options())\
+        .filter(Rental.id == id, Rental.owner_id == owner.id).first()
     if not rental:
         raise HTTPException(status_code=404, detail="Оренду не знайдено")
-    return format_rental_response(rental, db)
+    return format_rentals_response([rental], db)[0]
+
+# ==================== IMPORT ====================
+
+def upload_lines(file: UploadFile):
+    # Потокове читання завантаженого CSV (BOM з Excel прибирається); SpooledTemporaryFile до Python 3.11
+    # не має readable(), тому TextIOWrapper не підходить
+    return codecs.getreader("utf-8-sig")(file.file)
+
+@app.post("/import/gear")
+def import_gear(
+    file: UploadFile = File(...),
+    create_brands: bool = True,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    report = import_gear_csv(db, upload_lines(file), owner.id, create_brands=create_brands)
+    analytics_cache.invalidate_owner(owner.id)
+    return report
+
+@app.post("/import/customers")
+def import_customers(
+    file: UploadFile = File(...),
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    report = import_customers_csv(db, upload_lines(file), owner.id)
+    analytics_cache.invalidate_owner(owner.id)
+    return report
+
+# ==================== EXPORT ====================
+
+@app.get("/export/rentals")
+def export_rentals(
+    format: str = "csv",
+    status: str | None = None,
+    customer_id: int | None = None,
+    gear_id: int | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    statement = filter_rentals_by_status(rental_export_statement().where(Rental.owner_id == owner.id), status)
+    if customer_id:
+        statement = statement.where(Rental.customer_id == customer_id)
+    if gear_id:
+        statement = statement.where(Rental.gear_id == gear_id)
+    statement = filter_created_range(statement, Rental.created_at, date_from, date_to)
+
+    return stream_export(
+        db, statement.order_by(Rental.created_at, Rental.id),
+        list(RENTAL_EXPORT_COLUMNS), format, "rentals"
+    )
+
+@app.get("/export/customers")
+def export_customers(
+    format: str = "csv",
+    search: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    statement = customer_export_statement().where(Customer.owner_id == owner.id)
+    statement = filter_created_range(statement, Customer.created_at, date_from, date_to)
+    if search:
+        statement = apply_customer_search(statement, search)
+    else:
+        statement = statement.order_by(Customer.full_name, Customer.id)
+
+    return stream_export(db, statement, list(CUSTOMER_EXPORT_COLUMNS), format, "customers")
+
+@app.get("/export/gear")
+def export_gear(
+    format: str = "csv",
+    type: str | None = None,
+    status: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    statement = gear_export_statement().where(Gear.owner_id == owner.id)
+    if type:
+        statement = statement.where(Gear.type == type)
+    if status:
+        statement = statement.where(Gear.status == status)
+    statement = filter_created_range(statement, Gear.created_at, date_from, date_to)
+
+    return stream_export(
+        db, statement.order_by(Gear.created_at, Gear.id),
+        list(GEAR_EXPORT_COLUMNS), format, "gear"
+    )
 
 @app.get("/brands")
 def get_brands(
     page: int = 1,
     page_size: int = 10,
+    cursor: str | None = None,
+    include_total: bool = True,
+    approximate_total: bool = False,
     owner: Owner = Depends(get_current_owner),
     db: Session = Depends(get_db)
 ):
     query = db.query(Brand).filter(Brand.owner_id == owner.id).order_by(Brand.name)
 
-    # Get total count before pagination
-    total = query.count()
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    brands = query.limit(page_size).offset(offset).all()
-
-    return {
-        "items": brands,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
-    }
+    return paginate(
+        query, (Brand.name, Brand.id), page, page_size,
+        cursor=cursor, include_total=include_total, approximate_total=approximate_total
+    )
 
 @app.post("/brands")
 def create_brand(data: BrandCreate, owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
@@ -384,6 +698,7 @@ def create_brand(data: BrandCreate, owner: Owner = Depends(get_current_owner), d
     brand = Brand(**data.dict(), owner_id=owner.id)
     db.add(brand)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     db.refresh(brand)
     return brand
 
@@ -400,6 +715,7 @@ def update_brand(id: int, data: BrandUpdate, owner: Owner = Depends(get_current_
 
     brand.name = data.name
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     db.refresh(brand)
     return brand
 
@@ -416,84 +732,67 @@ def delete_brand(id: int, owner: Owner = Depends(get_current_owner), db: Session
 
     db.delete(brand)
     db.commit()
+    analytics_cache.invalidate_owner(owner.id)
     return {"message": "Deleted"}
 
 # ============= ANALYTICS ENDPOINTS =============
 
 @app.get("/analytics/dashboard")
+@cached_analytics
 def get_dashboard_analytics(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Основні метрики для dashboard"""
 
-    # Підрахунок спорядження (власника)
-    total_gear = db.query(Gear).filter(Gear.owner_id == owner.id).count()
-    available_gear = db.query(Gear).filter(Gear.owner_id == owner.id, Gear.status == 'available').count()
-    broken_gear = db.query(Gear).filter(Gear.owner_id == owner.id, Gear.status == 'broken').count()
-
-    # Спорядження в оренді - розділяємо на активні та прострочені
-    # Активні = gear.status='rented' + його оренда НЕ прострочена
-    rented_gear_ids = db.query(Gear.id).filter(
-        Gear.owner_id == owner.id,
-        Gear.status == 'rented'
-    ).all()
-    rented_gear_ids = [g.id for g in rented_gear_ids]
-
     now = datetime.utcnow()
-    active_rented_gear = 0
-    overdue_rented_gear = 0
-
-    for gear_id in rented_gear_ids:
-        # Знайти активну оренду для цього gear
-        rental = db.query(Rental).filter(
-            Rental.gear_id == gear_id,
-            Rental.return_at.is_(None)
-        ).first()
-
-        if rental:
-            if rental.due_at < now:
-                overdue_rented_gear += 1
-            else:
-                active_rented_gear += 1
-
-    # Підрахунок клієнтів (власника)
-    total_customers = db.query(Customer).filter(Customer.owner_id == owner.id).count()
-    new_customers_month = db.query(Customer).filter(
-        Customer.owner_id == owner.id,
-        Customer.created_at >= datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    ).count()
-
-    # Підрахунок орend (власника)
-    active_rentals = db.query(Rental).filter(Rental.owner_id == owner.id, Rental.return_at.is_(None)).count()
-    overdue_rentals = db.query(Rental).filter(
-        Rental.owner_id == owner.id,
-        Rental.return_at.is_(None),
-        Rental.due_at < datetime.utcnow()
-    ).count()
-
-    # Виручка за різні періоди (власника)
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = datetime.utcnow() - timedelta(days=7)
-    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    revenue_today = db.query(func.sum(Rental.total_price)).filter(
-        Rental.owner_id == owner.id,
-        Rental.created_at >= today_start
-    ).scalar() or 0
-
-    revenue_week = db.query(func.sum(Rental.total_price)).filter(
-        Rental.owner_id == owner.id,
-        Rental.created_at >= week_start
-    ).scalar() or 0
-
-    revenue_month = db.query(func.sum(Rental.total_price)).filter(
-        Rental.owner_id == owner.id,
-        Rental.created_at >= month_start
-    ).scalar() or 0
-
-    # Середня оцінка стану (власника)
-    avg_condition = db.query(func.avg(Rental.condition_score)).filter(
-        Rental.owner_id == owner.id,
-        Rental.condition_score.isnot(None)
-    ).scalar() or 0
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = now - timedelta(days=7)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    # Найближчий термін повернення активної оренди для кожного gear (власника)
+    active_due = db.query(
+        Rental.gear_id.label('gear_id'),
+        func.min(Rental.due_at).label('due_at')
+    ).filter(Rental.owner_id == owner.id, Rental.return_at.is_(None))\
+     .group_by(Rental.gear_id)\
+     .subquery()
+
+    # Спорядження: активні = gear.status='rented' + його оренда НЕ прострочена
+    is_rented = Gear.status == 'rented'
+    gear_stats = db.query(
+        func.count(Gear.id).label('total'),
+        func.count(Gear.id).filter(Gear.status == 'available').label('available'),
+        func.count(Gear.id).filter(Gear.status == 'broken').label('broken'),
+        func.count(Gear.id).filter(is_rented, active_due.c.due_at >= now).label('rented'),
+        func.count(Gear.id).filter(is_rented, active_due.c.due_at < now).label('overdue')
+    ).outerjoin(active_due, active_due.c.gear_id == Gear.id)\
+     .filter(Gear.owner_id == owner.id)\
+     .subquery()
+
+    # Клієнти (власника)
+    customer_stats = db.query(
+        func.count(Customer.id).label('total'),
+        func.count(Customer.id).filter(Customer.created_at >= month_start).label('new_this_month')
+    ).filter(Customer.owner_id == owner.id).subquery()
+
+    # Оренди, виручка за різні періоди та середня оцінка стану (власника)
+    rental_stats = db.query(
+        func.count(Rental.id).filter(Rental.return_at.is_(None)).label('active'),
+        func.count(Rental.id).filter(Rental.return_at.is_(None), Rental.due_at < now).label('overdue'),
+        func.coalesce(func.sum(Rental.total_price).filter(Rental.created_at >= today_start), 0).label('revenue_today'),
+        func.coalesce(func.sum(Rental.total_price).filter(Rental.created_at >= week_start), 0).label('revenue_week'),
+        func.coalesce(func.sum(Rental.total_price).filter(Rental.created_at >= month_start), 0).label('revenue_month'),
+        func.avg(Rental.condition_score).label('avg_condition')
+    ).filter(Rental.owner_id == owner.id).subquery()
+
+    # Кожен підзапит повертає рівно один рядок - усе рахується одним SQL-запитом
+    (
+        total_gear, available_gear, broken_gear, active_rented_gear, overdue_rented_gear,
+        total_customers, new_customers_month,
+        active_rentals, overdue_rentals, revenue_today, revenue_week, revenue_month, avg_condition
+    ) = db.query(gear_stats, customer_stats, rental_stats)\
+        .select_from(gear_stats)\
+        .join(customer_stats, true())\
+        .join(rental_stats, true())\
+        .one()
 
     # % зайнятості (активні + прострочені)
     total_in_use = active_rented_gear + overdue_rented_gear
@@ -527,33 +826,20 @@ def get_dashboard_analytics(owner: Owner = Depends(get_current_owner), db: Sessi
     }
 
 @app.get("/analytics/equipment/popular")
+@cached_analytics
 def get_popular_equipment(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Статистика популярного спорядження"""
 
-    # TOP-10 за кількістю орend (власника)
-    popular_by_count = db.query(
-        Gear,
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('total_revenue')
-    ).filter(Gear.owner_id == owner.id)\
-     .outerjoin(Rental, (Gear.id == Rental.gear_id) & (Rental.owner_id == owner.id))\
-     .group_by(Gear.id)\
-     .order_by(func.count(Rental.id).desc())\
-     .limit(10)\
-     .all()
-
+    # TOP-10 за кількістю оренд з брендом одним запитом (власника)
     top_equipment = []
-    for gear, count, revenue in popular_by_count:
-        # Завантажити brand окремо
-        brand = db.query(Brand).filter(Brand.id == gear.brand_id, Brand.owner_id == owner.id).first() if gear.brand_id else None
-
+    for gear in top_gear_stats(db, owner.id, 10):
         top_equipment.append({
             "id": gear.id,
             "type": gear.type,
-            "brand": brand.name if brand else None,
+            "brand": gear.brand_name,
             "size": gear.size,
-            "rental_count": count or 0,
-            "total_revenue": float(revenue) if revenue else 0,
+            "rental_count": gear.rental_count,
+            "total_revenue": float(gear.revenue) if gear.revenue else 0,
             "hourly_price": float(gear.hourly_price),
             "daily_price": float(gear.daily_price)
         })
@@ -566,17 +852,12 @@ def get_popular_equipment(owner: Owner = Depends(get_current_owner), db: Session
 
     types_stats = {type_name: count for type_name, count in type_distribution}
 
-    # Розподіл по брендах (власника)
-    brand_distribution = db.query(
-        Brand.name,
-        func.count(Gear.id).label('count')
-    ).join(Gear, (Brand.id == Gear.brand_id) & (Gear.owner_id == owner.id))\
-     .filter(Brand.owner_id == owner.id)\
-     .group_by(Brand.name)\
-     .order_by(func.count(Gear.id).desc())\
-     .all()
-
-    brands_stats = [{"name": name, "count": count} for name, count in brand_distribution]
+    # Розподіл по брендах - з метрик брендів (спільний агрегат з продуктивністю брендів, власника)
+    brands_stats = [
+        {"name": brand.name, "count": brand.gear_count}
+        for brand in sorted(brand_stats(db, owner.id), key=lambda brand: brand.gear_count, reverse=True)
+        if brand.gear_count
+    ]
 
     return {
         "top_equipment": top_equipment,
@@ -585,31 +866,22 @@ def get_popular_equipment(owner: Owner = Depends(get_current_owner), db: Session
     }
 
 @app.get("/analytics/customers/top")
+@cached_analytics
 def get_top_customers(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Статистика топ клієнтів"""
 
-    # TOP-10 клієнтів за кількістю орend (власника)
-    top_customers = db.query(
-        Customer,
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('total_spent'),
-        func.max(Rental.created_at).label('last_rental')
-    ).filter(Customer.owner_id == owner.id)\
-     .outerjoin(Rental, (Customer.id == Rental.customer_id) & (Rental.owner_id == owner.id))\
-     .group_by(Customer.id)\
-     .order_by(func.count(Rental.id).desc())\
-     .limit(10)\
-     .all()
+    # TOP-10 клієнтів за кількістю оренд (власника)
+    top_customers = top_customer_stats(db, owner.id, 10)
 
     customers_list = []
-    for customer, count, spent, last_rental in top_customers:
+    for customer in top_customers:
         customers_list.append({
             "id": customer.id,
             "full_name": customer.full_name,
             "phone": customer.phone,
-            "rental_count": count or 0,
-            "total_spent": float(spent) if spent else 0,
-            "last_rental": last_rental.isoformat() if last_rental else None
+            "rental_count": customer.rental_count,
+            "total_spent": float(customer.total_spent) if customer.total_spent else 0,
+            "last_rental": customer.last_rental.isoformat() if customer.last_rental else None
         })
 
     # Нові клієнти за місяць (власника)
@@ -625,18 +897,22 @@ def get_top_customers(owner: Owner = Depends(get_current_owner), db: Session = D
     }
 
 @app.get("/analytics/revenue")
+@cached_analytics
 def get_revenue_analytics(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Деталі виручки для графіків"""
 
+    # Читається з rollup rental_daily_stats замість сканування rentals
+
     # Виручка по днях за останні 30 днів (власника)
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
 
     daily_revenue = db.query(
-        func.date(Rental.created_at).label('date'),
-        func.sum(Rental.total_price).label('revenue')
-    ).filter(Rental.owner_id == owner.id, Rental.created_at >= thirty_days_ago)\
-     .group_by(func.date(Rental.created_at))\
-     .order_by(func.date(Rental.created_at))\
+        RentalDailyStats.day.label('date'),
+        func.sum(RentalDailyStats.revenue).label('revenue')
+    ).filter(RentalDailyStats.owner_id == owner.id, stats_since(thirty_days_ago))\
+     .group_by(RentalDailyStats.day)\
+     .having(func.sum(RentalDailyStats.rental_count) > 0)\
+     .order_by(RentalDailyStats.day)\
      .all()
 
     revenue_by_day = [
@@ -646,10 +922,13 @@ def get_revenue_analytics(owner: Owner = Depends(get_current_owner), db: Session
 
     # Розподіл по типу оренди (власника)
     revenue_by_type = db.query(
-        Rental.rental_type,
-        func.sum(Rental.total_price).label('revenue'),
-        func.count(Rental.id).label('count')
-    ).filter(Rental.owner_id == owner.id).group_by(Rental.rental_type).all()
+        RentalDailyStats.rental_type,
+        func.sum(RentalDailyStats.revenue).label('revenue'),
+        func.sum(RentalDailyStats.rental_count).label('count')
+    ).filter(RentalDailyStats.owner_id == owner.id)\
+     .group_by(RentalDailyStats.rental_type)\
+     .having(func.sum(RentalDailyStats.rental_count) > 0)\
+     .all()
 
     by_rental_type = {
         rental_type: {"revenue": float(revenue), "count": count}
@@ -658,12 +937,12 @@ def get_revenue_analytics(owner: Owner = Depends(get_current_owner), db: Session
 
     # Розподіл по типу спорядження (власника)
     revenue_by_gear_type = db.query(
-        Gear.type,
-        func.sum(Rental.total_price).label('revenue'),
-        func.count(Rental.id).label('count')
-    ).join(Rental, (Gear.id == Rental.gear_id) & (Rental.owner_id == owner.id))\
-     .filter(Gear.owner_id == owner.id)\
-     .group_by(Gear.type)\
+        RentalDailyStats.gear_type,
+        func.sum(RentalDailyStats.revenue).label('revenue'),
+        func.sum(RentalDailyStats.rental_count).label('count')
+    ).filter(RentalDailyStats.owner_id == owner.id)\
+     .group_by(RentalDailyStats.gear_type)\
+     .having(func.sum(RentalDailyStats.rental_count) > 0)\
      .all()
 
     by_gear_type = [
@@ -678,24 +957,48 @@ def get_revenue_analytics(owner: Owner = Depends(get_current_owner), db: Session
     }
 
 @app.get("/analytics/overdue")
-def get_overdue_rentals(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
-    """Список прострочених орend"""
+@cached_analytics
+def get_overdue_rentals(
+    limit: Annotated[int | None, Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: str | None = None,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    """Список прострочених оренд"""
+
+    now = datetime.utcnow()
 
-    # Прострочені оренди (не повернуті і due_at < NOW) (власника)
-    overdue = db.query(Rental).filter(
-        Rental.owner_id == owner.id,
-        Rental.return_at.is_(None),
-        Rental.due_at < datetime.utcnow()
-    ).order_by(Rental.due_at).all()
+    # Прострочені оренди (не повернуті і due_at < NOW) разом з gear, brand та customer одним запитом (власника)
+    query = db.query(Rental, Gear, Customer, Brand.name)\
+        .join(Gear, (Gear.id == Rental.gear_id) & (Gear.owner_id == owner.id))\
+        .join(Customer, (Customer.id == Rental.customer_id) & (Customer.owner_id == owner.id))\
+        .outerjoin(Brand, (Brand.id == Gear.brand_id) & (Brand.owner_id == owner.id))\
+        .filter(
+            Rental.owner_id == owner.id,
+            Rental.return_at.is_(None),
+            Rental.due_at < now
+        )
 
-    overdue_list = []
-    for rental in overdue:
-        gear = db.query(Gear).filter(Gear.id == rental.gear_id, Gear.owner_id == owner.id).first()
-        customer = db.query(Customer).filter(Customer.id == rental.customer_id, Customer.owner_id == owner.id).first()
-        brand = db.query(Brand).filter(Brand.id == gear.brand_id, Brand.owner_id == owner.id).first() if gear else None
+    # Keyset-пагінація по (due_at, id)
+    if cursor:
+        due_at, rental_id = decode_cursor(cursor, 2)
+        query = query.filter(tuple_(Rental.due_at, Rental.id) > (parse_cursor_value(Rental.due_at, due_at), parse_cursor_value(Rental.id, rental_id)))
+
+    query = query.order_by(Rental.due_at, Rental.id)
+    if limit:
+        query = query.limit(limit + 1)
+    overdue = query.all()
+
+    next_cursor = None
+    if limit and len(overdue) > limit:
+        overdue = overdue[:limit]
+        last_rental = overdue[-1][0]
+        next_cursor = encode_cursor(last_rental.due_at, last_rental.id)
 
+    overdue_list = []
+    for rental, gear, customer, brand_name in overdue:
         # Розрахувати скільки днів прострочено
-        days_overdue = (datetime.utcnow() - rental.due_at).days
+        days_overdue = (now - rental.due_at).days
 
         overdue_list.append({
             "rental_id": rental.id,
@@ -712,64 +1015,36 @@ def get_overdue_rentals(owner: Owner = Depends(get_current_owner), db: Session =
             "gear": {
                 "id": gear.id,
                 "type": gear.type,
-                "brand": brand.name if brand else None,
+                "brand": brand_name,
                 "size": gear.size
             }
         })
 
     return {
         "overdue_rentals": overdue_list,
-        "count": len(overdue_list)
+        "count": len(overdue_list),
+        "next_cursor": next_cursor
     }
 
 @app.get("/analytics/brands/performance")
+@cached_analytics
 def get_brand_performance(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Детальна аналітика по брендах"""
 
-    # Отримати всі бренди з їх метриками (власника)
-    brands = db.query(Brand).filter(Brand.owner_id == owner.id).all()
-
-    total_gear = db.query(Gear).filter(Gear.owner_id == owner.id).count()
-    total_revenue = db.query(func.sum(Rental.total_price)).filter(Rental.owner_id == owner.id).scalar() or 0
-    total_rentals = db.query(Rental).filter(Rental.owner_id == owner.id).count()
-
-    brand_stats = []
-
-    for brand in brands:
-        # Кількість спорядження бренду (власника)
-        gear_count = db.query(Gear).filter(Gear.brand_id == brand.id, Gear.owner_id == owner.id).count()
+    # Усі метрики брендів одним GROUP BY запитом (спільний агрегат, власника)
+    brand_rows = brand_stats(db, owner.id)
 
-        # Кількість орend цього бренду (власника)
-        rental_count = db.query(Rental).join(
-            Gear, Rental.gear_id == Gear.id
-        ).filter(Gear.brand_id == brand.id, Rental.owner_id == owner.id, Gear.owner_id == owner.id).count()
-
-        # Загальна виручка від бренду (власника)
-        brand_revenue = db.query(func.sum(Rental.total_price)).join(
-            Gear, Rental.gear_id == Gear.id
-        ).filter(Gear.brand_id == brand.id, Rental.owner_id == owner.id, Gear.owner_id == owner.id).scalar() or 0
-
-        # Середня оцінка стану після повернення (власника)
-        avg_condition = db.query(func.avg(Rental.condition_score)).join(
-            Gear, Rental.gear_id == Gear.id
-        ).filter(
-            Gear.brand_id == brand.id,
-            Rental.owner_id == owner.id,
-            Gear.owner_id == owner.id,
-            Rental.condition_score.isnot(None)
-        ).scalar() or 0
+    total_gear = sum(row.gear_count for row in brand_rows)
+    total_revenue = sum(row.revenue for row in brand_rows)
+    total_rentals = sum(row.rental_count for row in brand_rows)
 
-        # Поточна зайнятість (скільки спорядження в оренді) (власника)
-        rented_count = db.query(Gear).filter(
-            Gear.brand_id == brand.id,
-            Gear.owner_id == owner.id,
-            Gear.status == 'rented'
-        ).count()
+    brands_list = []
 
+    for brand_id, brand_name, gear_count, rented_count, rental_count, brand_revenue, avg_condition in brand_rows:
         # Відсоток зайнятості
         utilization_rate = (rented_count / gear_count * 100) if gear_count > 0 else 0
 
-        # Відсоток попиту (% від загальних орend)
+        # Відсоток попиту (% від загальних оренд)
         demand_percentage = (rental_count / total_rentals * 100) if total_rentals > 0 else 0
 
         # Відсоток виручки
@@ -778,9 +1053,9 @@ def get_brand_performance(owner: Owner = Depends(get_current_owner), db: Session
         # Середня виручка на одиницю спорядження
         avg_revenue_per_item = float(brand_revenue) / gear_count if gear_count > 0 else 0
 
-        brand_stats.append({
-            "brand_id": brand.id,
-            "brand_name": brand.name,
+        brands_list.append({
+            "brand_id": brand_id,
+            "brand_name": brand_name,
             "equipment_count": gear_count,
             "rental_count": rental_count,
             "total_revenue": float(brand_revenue),
@@ -794,12 +1069,12 @@ def get_brand_performance(owner: Owner = Depends(get_current_owner), db: Session
         })
 
     # Сортувати за виручкою (від найбільшої до найменшої)
-    brand_stats.sort(key=lambda x: x['total_revenue'], reverse=True)
+    brands_list.sort(key=lambda x: x['total_revenue'], reverse=True)
 
     return {
-        "brands": brand_stats,
+        "brands": brands_list,
         "summary": {
-            "total_brands": len(brands),
+            "total_brands": len(brand_rows),
             "total_equipment": total_gear,
             "total_revenue": float(total_revenue),
             "total_rentals": total_rentals
@@ -807,17 +1082,22 @@ def get_brand_performance(owner: Owner = Depends(get_current_owner), db: Session
     }
 
 @app.get("/analytics/rentals/time-patterns")
+@cached_analytics
 def get_time_patterns(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
-    """Аналітика паттернів орend за часом"""
+    """Аналітика паттернів оренд за часом"""
+
+    # Читається з rollup rental_daily_stats замість сканування rentals
+    has_rentals = func.sum(RentalDailyStats.rental_count) > 0
 
     # 1. Розподіл по днях тижня (0=Monday, 6=Sunday) (власника)
     day_of_week_data = db.query(
-        func.extract('dow', Rental.created_at).label('day_of_week'),
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('revenue')
-    ).filter(Rental.owner_id == owner.id)\
-     .group_by(func.extract('dow', Rental.created_at))\
-     .order_by(func.extract('dow', Rental.created_at))\
+        func.extract('dow', RentalDailyStats.day).label('day_of_week'),
+        func.sum(RentalDailyStats.rental_count).label('rental_count'),
+        func.sum(RentalDailyStats.revenue).label('revenue')
+    ).filter(RentalDailyStats.owner_id == owner.id)\
+     .group_by(func.extract('dow', RentalDailyStats.day))\
+     .having(has_rentals)\
+     .order_by(func.extract('dow', RentalDailyStats.day))\
      .all()
 
     # Мапінг днів тижня на українські назви (PostgreSQL: 0=Sunday, 1=Monday, ..., 6=Saturday)
@@ -842,12 +1122,13 @@ def get_time_patterns(owner: Owner = Depends(get_current_owner), db: Session = D
 
     # 2. Розподіл по годинах (0-23) (власника)
     hour_data = db.query(
-        func.extract('hour', Rental.created_at).label('hour'),
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('revenue')
-    ).filter(Rental.owner_id == owner.id)\
-     .group_by(func.extract('hour', Rental.created_at))\
-     .order_by(func.extract('hour', Rental.created_at))\
+        RentalDailyStats.hour,
+        func.sum(RentalDailyStats.rental_count).label('rental_count'),
+        func.sum(RentalDailyStats.revenue).label('revenue')
+    ).filter(RentalDailyStats.owner_id == owner.id)\
+     .group_by(RentalDailyStats.hour)\
+     .having(has_rentals)\
+     .order_by(RentalDailyStats.hour)\
      .all()
 
     by_hour = []
@@ -862,17 +1143,17 @@ def get_time_patterns(owner: Owner = Depends(get_current_owner), db: Session = D
     twelve_months_ago = datetime.utcnow() - timedelta(days=365)
 
     monthly_data = db.query(
-        func.extract('year', Rental.created_at).label('year'),
-        func.extract('month', Rental.created_at).label('month'),
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('revenue')
-    ).filter(Rental.owner_id == owner.id, Rental.created_at >= twelve_months_ago)\
+        func.extract('year', RentalDailyStats.day).label('year'),
+        func.extract('month', RentalDailyStats.day).label('month'),
+        func.sum(RentalDailyStats.rental_count).label('rental_count'),
+        func.sum(RentalDailyStats.revenue).label('revenue')
+    ).filter(RentalDailyStats.owner_id == owner.id, stats_since(twelve_months_ago))\
      .group_by(
-        func.extract('year', Rental.created_at),
-        func.extract('month', Rental.created_at)
-    ).order_by(
-        func.extract('year', Rental.created_at),
-        func.extract('month', Rental.created_at)
+        func.extract('year', RentalDailyStats.day),
+        func.extract('month', RentalDailyStats.day)
+    ).having(has_rentals).order_by(
+        func.extract('year', RentalDailyStats.day),
+        func.extract('month', RentalDailyStats.day)
     ).all()
 
     # Назви місяців українською
@@ -911,58 +1192,50 @@ def get_time_patterns(owner: Owner = Depends(get_current_owner), db: Session = D
     }
 
 @app.get("/analytics/equipment/idle")
+@cached_analytics
 def get_idle_equipment(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Спорядження, яке простоює більше 7 днів"""
 
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    now = datetime.utcnow()
+    seven_days_ago = now - timedelta(days=7)
 
-    # Знайти спорядження, яке доступне (не в оренді) (власника)
-    available_gear = db.query(Gear).filter(Gear.owner_id == owner.id, Gear.status == 'available').all()
+    # Доступне спорядження без оренд більше 7 днів: останнє повернення (або дата створення, якщо оренд не було) (власника)
+    idle_gear = db.query(Gear, Brand.name)\
+        .outerjoin(Brand, (Brand.id == Gear.brand_id) & (Brand.owner_id == owner.id))\
+        .filter(
+            Gear.owner_id == owner.id,
+            Gear.status == 'available',
+            (Gear.last_returned_at <= seven_days_ago) |
+            (Gear.last_returned_at.is_(None) & (Gear.created_at <= seven_days_ago))
+        ).all()
 
     idle_equipment = []
+    total_lost_revenue = 0
 
-    for gear in available_gear:
-        # Знайти останню оренду цього спорядження (власника)
-        last_rental = db.query(Rental).filter(
-            Rental.gear_id == gear.id,
-            Rental.owner_id == owner.id,
-            Rental.return_at.isnot(None)
-        ).order_by(Rental.return_at.desc()).first()
-
-        # Якщо оренд немає взагалі, або остання оренда була більше 7 днів тому
-        if not last_rental:
-            days_idle = (datetime.utcnow() - gear.created_at).days
-            last_used = None
-        else:
-            days_idle = (datetime.utcnow() - last_rental.return_at).days
-            last_used = last_rental.return_at
-
-        # Якщо простоює більше 7 днів
-        if days_idle >= 7:
-            brand = db.query(Brand).filter(Brand.id == gear.brand_id, Brand.owner_id == owner.id).first()
+    for gear, brand_name in idle_gear:
+        last_used = gear.last_returned_at
+        days_idle = (now - (last_used or gear.created_at)).days
 
-            # Розрахувати втрачену виручку (opportunity cost)
-            # Припускаємо що могли б здавати 1 раз на день по daily_price
-            lost_revenue = float(gear.daily_price) * days_idle
+        # Розрахувати втрачену виручку (opportunity cost)
+        # Припускаємо що могли б здавати 1 раз на день по daily_price
+        lost_revenue = round(float(gear.daily_price) * days_idle, 2)
+        total_lost_revenue += lost_revenue
 
-            idle_equipment.append({
-                "gear_id": gear.id,
-                "type": gear.type,
-                "brand": brand.name if brand else None,
-                "size": gear.size,
-                "hourly_price": float(gear.hourly_price),
-                "daily_price": float(gear.daily_price),
-                "days_idle": days_idle,
-                "last_used": last_used.isoformat() if last_used else None,
-                "potential_lost_revenue": round(lost_revenue, 2)
-            })
+        idle_equipment.append({
+            "gear_id": gear.id,
+            "type": gear.type,
+            "brand": brand_name,
+            "size": gear.size,
+            "hourly_price": float(gear.hourly_price),
+            "daily_price": float(gear.daily_price),
+            "days_idle": days_idle,
+            "last_used": last_used.isoformat() if last_used else None,
+            "potential_lost_revenue": lost_revenue
+        })
 
     # Сортувати за днями простою (від найбільшої до найменшої)
     idle_equipment.sort(key=lambda x: x['days_idle'], reverse=True)
 
-    # Підрахувати загальну втрачену виручку
-    total_lost_revenue = sum(item['potential_lost_revenue'] for item in idle_equipment)
-
     return {
         "idle_equipment": idle_equipment,
         "count": len(idle_equipment),
@@ -970,95 +1243,85 @@ def get_idle_equipment(owner: Owner = Depends(get_current_owner), db: Session =
     }
 
 @app.get("/analytics/customers/segmentation")
-def get_customer_segmentation(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
-    """Сегментація клієнтів: VIP, Regular, Occasional"""
-
-    # Отримати всіх клієнтів з їх статистикою (власника)
-    customers_stats = db.query(
-        Customer,
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('total_spent'),
-        func.max(Rental.created_at).label('last_rental')
-    ).filter(Customer.owner_id == owner.id)\
-     .outerjoin(Rental, (Customer.id == Rental.customer_id) & (Rental.owner_id == owner.id))\
-     .group_by(Customer.id)\
-     .all()
-
-    vip_customers = []
-    regular_customers = []
-    occasional_customers = []
-
-    for customer, rental_count, total_spent, last_rental in customers_stats:
-        customer_data = {
-            "id": customer.id,
-            "full_name": customer.full_name,
-            "phone": customer.phone,
-            "rental_count": rental_count or 0,
-            "total_spent": float(total_spent) if total_spent else 0,
-            "last_rental": last_rental.isoformat() if last_rental else None
-        }
+@cached_analytics
+def get_customer_segmentation(
+    limit: int = CUSTOMER_SEGMENT_TOP_N,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    """Сегментація клієнтів: VIP, Regular, Occasional (агрегати сегментів + top-N клієнтів за витратами)"""
+    validate_segment_limit(limit)
+    rows = customer_segment_rows(db, owner.id, owner.segment_vip_min_rentals, owner.segment_regular_min_rentals, limit)
 
-        # Сегментація: VIP (>= 5 орend), Regular (2-4 оренди), Occasional (1 оренда)
-        if rental_count >= 5:
-            vip_customers.append(customer_data)
-        elif rental_count >= 2:
-            regular_customers.append(customer_data)
-        elif rental_count >= 1:
-            occasional_customers.append(customer_data)
+    result = {
+        segment: {"customers": [], "count": 0, "total_revenue": 0, "next_cursor": None}
+        for segment in CUSTOMER_SEGMENTS
+    }
+    previous = None
+    for row in rows:
+        segment = result[row.segment]
+        segment["count"] = row.segment_count
+        segment["total_revenue"] = float(row.segment_revenue)
+        if row.rank <= limit:
+            segment["customers"].append(format_segment_customer(row))
+        else:
+            segment["next_cursor"] = encode_segment_cursor(previous)
+        previous = row
 
-    # Сортувати кожен сегмент за витратами
-    vip_customers.sort(key=lambda x: x['total_spent'], reverse=True)
-    regular_customers.sort(key=lambda x: x['total_spent'], reverse=True)
-    occasional_customers.sort(key=lambda x: x['total_spent'], reverse=True)
+    total_customers = sum(segment["count"] for segment in result.values())
 
     return {
-        "vip": {
-            "customers": vip_customers,
-            "count": len(vip_customers),
-            "total_revenue": sum(c['total_spent'] for c in vip_customers)
-        },
-        "regular": {
-            "customers": regular_customers,
-            "count": len(regular_customers),
-            "total_revenue": sum(c['total_spent'] for c in regular_customers)
-        },
-        "occasional": {
-            "customers": occasional_customers,
-            "count": len(occasional_customers),
-            "total_revenue": sum(c['total_spent'] for c in occasional_customers)
-        },
+        **result,
         "summary": {
-            "total_customers": len(vip_customers) + len(regular_customers) + len(occasional_customers),
-            "vip_percentage": round(len(vip_customers) / (len(vip_customers) + len(regular_customers) + len(occasional_customers)) * 100, 1) if (len(vip_customers) + len(regular_customers) + len(occasional_customers)) > 0 else 0
+            "total_customers": total_customers,
+            "vip_percentage": round(result["vip"]["count"] / total_customers * 100, 1) if total_customers > 0 else 0
+        },
+        "thresholds": {
+            "vip_min_rentals": owner.segment_vip_min_rentals,
+            "regular_min_rentals": owner.segment_regular_min_rentals
         }
     }
 
+@app.get("/analytics/customers/segmentation/{segment}")
+@cached_analytics
+def get_customer_segment(
+    segment: str,
+    limit: int = CUSTOMER_SEGMENT_TOP_N,
+    cursor: str | None = None,
+    owner: Owner = Depends(get_current_owner),
+    db: Session = Depends(get_db)
+):
+    """Клієнти одного сегмента за витратами, keyset-пагінація по next_cursor"""
+    if segment not in CUSTOMER_SEGMENTS:
+        raise HTTPException(status_code=404, detail="Сегмент не знайдено")
+    validate_segment_limit(limit)
+    after = decode_segment_cursor(cursor) if cursor else None
+    rows = segment_customer_rows(
+        db, owner.id, owner.segment_vip_min_rentals, owner.segment_regular_min_rentals, segment, after, limit
+    )
+
+    next_cursor = encode_segment_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {
+        "segment": segment,
+        "customers": [format_segment_customer(row) for row in rows[:limit]],
+        "next_cursor": next_cursor
+    }
+
 @app.get("/analytics/customers/problematic")
+@cached_analytics
 def get_problematic_customers(owner: Owner = Depends(get_current_owner), db: Session = Depends(get_db)):
     """Клієнти з низькою оцінкою стану спорядження (< 3.0)"""
 
-    # Знайти клієнтів з середньою оцінкою < 3.0 (власника)
-    customers_condition = db.query(
-        Customer,
-        func.avg(Rental.condition_score).label('avg_condition'),
-        func.count(Rental.id).label('rental_count'),
-        func.sum(Rental.total_price).label('total_spent')
-    ).join(Rental, (Customer.id == Rental.customer_id) & (Rental.owner_id == owner.id))\
-     .filter(Customer.owner_id == owner.id, Rental.condition_score.isnot(None))\
-     .group_by(Customer.id)\
-     .having(func.avg(Rental.condition_score) < 3.0)\
-     .order_by(func.avg(Rental.condition_score))\
-     .all()
-
+    # Клієнти з середньою оцінкою < 3.0 серед оренд з оцінкою (власника)
     problematic_list = []
-    for customer, avg_condition, rental_count, total_spent in customers_condition:
+    for customer in low_condition_customer_stats(db, owner.id, 3.0):
         problematic_list.append({
             "id": customer.id,
             "full_name": customer.full_name,
             "phone": customer.phone,
-            "avg_condition_score": round(float(avg_condition), 2),
-            "rental_count": rental_count,
-            "total_spent": float(total_spent) if total_spent else 0
+            "avg_condition_score": round(float(customer.avg_condition), 2),
+            "rental_count": customer.rental_count,
+            "total_spent": float(customer.total_spent) if customer.total_spent else 0
         })
 
     return {
@@ -1066,6 +1329,34 @@ def get_problematic_customers(owner: Owner = Depends(get_current_owner), db: Ses
         "count": len(problematic_list)
     }
 
+# Секції /analytics/bundle -> analytics endpoint, що її обчислює
+ANALYTICS_SECTIONS = {
+    "dashboard": get_dashboard_analytics,
+    "popular_equipment": get_popular_equipment,
+    "top_customers": get_top_customers,
+    "revenue": get_revenue_analytics,
+    "overdue": get_overdue_rentals,
+    "brands": get_brand_performance,
+    "time_patterns": get_time_patterns,
+    "idle": get_idle_equipment,
+    "segmentation": get_customer_segmentation,
+    "problematic": get_problematic_customers,
+}
+
+@app.get("/analytics/bundle")
+async def get_analytics_bundle(sections: str | None = None, owner: Owner = Depends(get_current_owner)):
+    """
+    Кілька секцій аналітики одним запитом (sections - через кому, за замовчуванням усі).
+    Секції спільно використовують rollup по клієнтах і спорядженню та обчислюються паралельно
+    на одному знімку БД; кожна секція кешується так само, як відповідний endpoint.
+    """
+    names = list(dict.fromkeys(name.strip() for name in sections.split(",") if name.strip())) if sections else list(ANALYTICS_SECTIONS)
+    unknown = [name for name in names if name not in ANALYTICS_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Невідомі секції аналітики: {', '.join(unknown)}")
+
+    return await compute_sections(names, lambda name, db: ANALYTICS_SECTIONS[name](owner=owner, db=db))
+
 # ============= SEED ENDPOINTS (для заповнення БД) =============
 
 class BrandSeed(BaseModel):
@@ -1106,6 +1397,7 @@ def seed_brand(data: BrandSeed, db: Session = Depends(get_db)):
     brand = Brand(name=data.name, owner_id=data.owner_id)
     db.add(brand)
     db.commit()
+    analytics_cache.invalidate_owner(data.owner_id)
     db.refresh(brand)
     return brand
 
@@ -1115,6 +1407,7 @@ def seed_gear(data: GearSeed, db: Session = Depends(get_db)):
     gear = Gear(**data.dict())
     db.add(gear)
     db.commit()
+    analytics_cache.invalidate_owner(data.owner_id)
     db.refresh(gear)
     return gear
 
@@ -1124,20 +1417,23 @@ def seed_customer(data: CustomerSeed, db: Session = Depends(get_db)):
     customer = Customer(**data.dict())
     db.add(customer)
     db.commit()
+    analytics_cache.invalidate_owner(data.owner_id)
     db.refresh(customer)
     return customer
 
+def parse_seed_datetime(value: str | None):
+    from datetime import datetime as dt
+    return dt.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
 @app.post("/seed/rentals")
 def seed_rental(data: RentalSeed, db: Session = Depends(get_db)):
     """Seed endpoint - створення оренди без автентифікації"""
-    from datetime import datetime as dt
-
     rental = Rental(
         gear_id=data.gear_id,
         customer_id=data.customer_id,
-        start_at=dt.fromisoformat(data.start_at.replace('Z', '+00:00')),
-        due_at=dt.fromisoformat(data.due_at.replace('Z', '+00:00')),
-        return_at=dt.fromisoformat(data.return_at.replace('Z', '+00:00')) if data.return_at else None,
+        start_at=parse_seed_datetime(data.start_at),
+        due_at=parse_seed_datetime(data.due_at),
+        return_at=parse_seed_datetime(data.return_at),
         rental_type=data.rental_type,
         total_price=data.total_price,
         condition_score=data.condition_score,
@@ -1145,10 +1441,97 @@ def seed_rental(data: RentalSeed, db: Session = Depends(get_db)):
         owner_id=data.owner_id
     )
     db.add(rental)
+
+    # Підтримувати денормалізований час останнього повернення спорядження
+    if rental.return_at:
+        db.query(Gear).filter(
+            Gear.id == data.gear_id,
+            Gear.last_returned_at.is_(None) | (Gear.last_returned_at < rental.return_at)
+        ).update({Gear.last_returned_at: rental.return_at}, synchronize_session=False)
+
+    db.flush()
+    apply_rental_stats(db, Rental.id == rental.id, created=True, returned=True)
     db.commit()
+    analytics_cache.invalidate_owner(data.owner_id)
     db.refresh(rental)
     return rental
 
+# Bulk seed endpoints: один INSERT (executemany з RETURNING) на пачку замість запиту і commit на рядок
+def seed_bulk_insert(db: Session, model, rows: list[dict]) -> list[int]:
+    if not rows:
+        raise HTTPException(status_code=400, detail="Список порожній")
+    return db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+
+def seed_bulk_finish(db: Session, rows: list[dict], ids: list[int]):
+    db.commit()
+    for owner_id in {row["owner_id"] for row in rows}:
+        analytics_cache.invalidate_owner(owner_id)
+    return {"ids": ids, "created": len(ids)}
+
+@app.post("/seed/brands/bulk")
+def seed_brands_bulk(data: list[BrandSeed], db: Session = Depends(get_db)):
+    """Seed endpoint - пакетне створення брендів, повертає id у порядку запиту"""
+    rows = [item.model_dump() for item in data]
+    return seed_bulk_finish(db, rows, seed_bulk_insert(db, Brand, rows))
+
+@app.post("/seed/gear/bulk")
+def seed_gear_bulk(data: list[GearSeed], db: Session = Depends(get_db)):
+    """Seed endpoint - пакетне створення спорядження, повертає id у порядку запиту"""
+    rows = [item.model_dump() for item in data]
+    return seed_bulk_finish(db, rows, seed_bulk_insert(db, Gear, rows))
+
+@app.post("/seed/customers/bulk")
+def seed_customers_bulk(data: list[CustomerSeed], db: Session = Depends(get_db)):
+    """Seed endpoint - пакетне створення клієнтів, повертає id у порядку запиту"""
+    rows = [item.model_dump() for item in data]
+    return seed_bulk_finish(db, rows, seed_bulk_insert(db, Customer, rows))
+
+@app.post("/seed/rentals/bulk")
+def seed_rentals_bulk(data: list[RentalSeed], db: Session = Depends(get_db)):
+    """Seed endpoint - пакетне створення оренд; gear активних оренд переводиться в 'rented'"""
+    rows = [
+        {
+            **item.model_dump(),
+            "start_at": parse_seed_datetime(item.start_at),
+            "due_at": parse_seed_datetime(item.due_at),
+            "return_at": parse_seed_datetime(item.return_at),
+        }
+        for item in data
+    ]
+    last_returned = {}
+    rented = set()
+    for row in rows:
+        if row["return_at"]:
+            last_returned[row["gear_id"]] = max(row["return_at"], last_returned.get(row["gear_id"], row["return_at"]))
+        else:
+            rented.add(row["gear_id"])
+
+    # Блокування gear у порядку id ще до INSERT, щоб паралельні пачки не отримували deadlock:
+    # INSERT оренд бере FOR KEY SHARE на gear (зовнішній ключ), і пізніше підвищення до FOR UPDATE
+    # чекало б на KEY SHARE іншої пачки. FOR NO KEY UPDATE сумісний з перевірками ключів
+    db.query(Gear.id).filter(Gear.id.in_(last_returned.keys() | rented)).order_by(Gear.id)\
+        .with_for_update(key_share=True).all()
+
+    ids = seed_bulk_insert(db, Rental, rows)
+
+    # Денормалізований час останнього повернення - один UPDATE з CASE по id
+    if last_returned:
+        returned_at = case(last_returned, value=Gear.id)
+        db.execute(
+            update(Gear)
+            .where(Gear.id.in_(last_returned), Gear.last_returned_at.is_(None) | (Gear.last_returned_at < returned_at))
+            .values(last_returned_at=returned_at)
+            .execution_options(synchronize_session=False)
+        )
+    if rented:
+        db.execute(
+            update(Gear).where(Gear.id.in_(rented)).values(status="rented")
+            .execution_options(synchronize_session=False)
+        )
+    apply_rental_stats(db, Rental.id.in_(ids), created=True, returned=True)
+
+    return seed_bulk_finish(db, rows, ids)
+
 @app.patch("/seed/gear/{gear_id}/status")
 def update_gear_status(gear_id: int, status_data: dict, db: Session = Depends(get_db)):
     """Seed endpoint - оновлення статусу спорядження без автентифікації"""
@@ -1162,5 +1545,24 @@ def update_gear_status(gear_id: int, status_data: dict, db: Session = Depends(ge
 
     gear.status = new_status
     db.commit()
+    analytics_cache.invalidate_owner(gear.owner_id)
     db.refresh(gear)
     return gear
+
+# ============= ASYNC РЕЖИМ (DB_ASYNC=true) =============
+
+# Замінити sync версії найнавантаженіших endpoints на async (asyncpg)
+if DB_ASYNC:
+    from app.async_routes import router as async_router
+
+    async_endpoints = {(route.path, method) for route in async_router.routes for method in route.methods}
+    app.router.routes = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute) and any((route.path, method) in async_endpoints for method in route.methods))
+    ]
+    app.include_router(async_router)
+    instrument_engine(async_engine.sync_engine)
+
+    @app.on_event("shutdown")
+    async def dispose_async_engine():
+        await async_engine.dispose()
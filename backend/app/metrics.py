@@ -0,0 +1,177 @@
+from bisect import bisect_left
+import os
+import time
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Межі бакетів гістограми латентності (секунди)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Метрики оновлюються лише з event loop (middleware та async /metrics), тому блокування не потрібні
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    labels = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+def format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, values: tuple = (), amount: float = 1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, value in self.series.items():
+            lines.append(f"{self.name}{format_labels(self.labels, values)} {format_value(value)}")
+        return lines
+
+class Gauge(Counter):
+    def set(self, values: tuple, value: float):
+        self.series[values] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # labels -> [лічильники по бакетах (+Inf останній), сума]
+
+    def observe(self, values: tuple, value: float):
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, values, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, values)} {total!r}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+http_requests_total = Counter(
+    "http_requests_total", "Кількість HTTP запитів", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Латентність HTTP запитів", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP запити в обробці"
+)
+http_requests_in_flight.set((), 0)
+
+def request_route(scope: dict) -> str:
+    # Шаблон маршруту замість фактичного шляху - обмежена кардинальність міток
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware: лічильники, латентність та in-flight запитів по маршрутах"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = request_route(scope)
+            http_requests_in_flight.inc(amount=-1)
+            http_requests_total.inc((scope["method"], route, status))
+            http_request_duration_seconds.observe((scope["method"], route), time.perf_counter() - started)
+
+def snapshot(metric_class, name: str, help: str, labels: tuple, samples: dict) -> list[str]:
+    # Метрика зі значень, прочитаних у момент scrape (пул, кеші, потоки)
+    metric = metric_class(name, help, labels)
+    metric.series.update(samples)
+    return metric.render()
+
+def gauges(name: str, help: str, labels: tuple, samples: dict) -> list[str]:
+    return snapshot(Gauge, name, help, labels, samples)
+
+def counters(name: str, help: str, labels: tuple, samples: dict) -> list[str]:
+    return snapshot(Counter, name, help, labels, samples)
+
+def render_metrics(pool_status: dict, caches: dict, threadpool: dict) -> str:
+    """Text exposition format Prometheus (version 0.0.4)"""
+    lines = []
+    for metric in (http_requests_total, http_request_duration_seconds, http_requests_in_flight):
+        lines.extend(metric.render())
+
+    lines.extend(gauges("db_pool_connections", "З'єднання пулу БД за станом", ("state",), {
+        ("checked_out",): pool_status["checked_out"],
+        ("checked_in",): pool_status["checked_in"],
+        ("overflow",): pool_status["overflow"],
+    }))
+    lines.extend(gauges("db_pool_size", "Розмір пулу БД", (), {(): pool_status["size"]}))
+    if "async" in pool_status:
+        async_pool = pool_status["async"]
+        lines.extend(gauges("db_async_pool_connections", "З'єднання async пулу БД (asyncpg) за станом", ("state",), {
+            ("checked_out",): async_pool["checked_out"],
+            ("checked_in",): async_pool["checked_in"],
+            ("overflow",): async_pool["overflow"],
+        }))
+        lines.extend(gauges("db_async_pool_size", "Розмір async пулу БД", (), {(): async_pool["size"]}))
+    lines.extend(counters("db_pool_checkouts_total", "Видачі з'єднань з пулу", (), {(): pool_status["checkouts"]}))
+    lines.extend(counters("db_pool_timeouts_total", "Таймаути очікування з'єднання", (), {(): pool_status["timeouts"]}))
+    lines.extend(counters("db_pool_wait_seconds_total", "Сумарне очікування з'єднання", (), {(): pool_status["total_wait_ms"] / 1000}))
+    lines.extend(gauges("db_pool_wait_seconds_max", "Максимальне очікування з'єднання", (), {(): pool_status["max_wait_ms"] / 1000}))
+
+    lines.extend(gauges("threadpool_threads", "Потоки пулу для sync endpoints", ("state",), {
+        ("busy",): threadpool["busy"],
+        ("limit",): threadpool["limit"],
+    }))
+    lines.extend(gauges("threadpool_queue_depth", "Задачі, що чекають вільного потоку", (), {(): threadpool["waiting"]}))
+
+    for metric, key, render in (
+        ("cache_hits_total", "hits", counters),
+        ("cache_misses_total", "misses", counters),
+        ("cache_evictions_total", "evictions", counters),
+        ("cache_entries", "entries", gauges),
+        ("cache_bytes", "bytes", gauges),
+        ("cache_hit_ratio", "hit_ratio", gauges),
+    ):
+        lines.extend(render(metric, f"In-process кеш: {key}", ("cache",), {
+            (name,): stats[key] for name, stats in caches.items()
+        }))
+
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Numeric, ForeignKey, CheckConstraint, Enum as SQLEnum
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, TIMESTAMP, Date, Numeric, ForeignKey, CheckConstraint, Index, Computed, PrimaryKeyConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.database import Base
 import enum
 
@@ -25,6 +25,9 @@ class Owner(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     company_name = Column(String(255))
+    # Пороги сегментації клієнтів за кількістю оренд: VIP >= vip, Regular >= regular, інакше Occasional
+    segment_vip_min_rentals = Column(SmallInteger, nullable=False, server_default="5")
+    segment_regular_min_rentals = Column(SmallInteger, nullable=False, server_default="2")
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     # Relationships
@@ -33,17 +36,28 @@ class Owner(Base):
     customers = relationship("Customer", back_populates="owner")
     rentals = relationship("Rental", back_populates="owner")
 
+    __table_args__ = (
+        CheckConstraint(
+            'segment_regular_min_rentals >= 1 AND segment_vip_min_rentals > segment_regular_min_rentals',
+            name='check_segment_thresholds'
+        ),
+    )
+
 class Brand(Base):
     __tablename__ = "brands"
 
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False, index=True)
-    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     # Relationship
     owner = relationship("Owner", back_populates="brands")
 
+    __table_args__ = (
+        Index('idx_brands_owner_name', 'owner_id', 'name', 'id'),
+    )
+
 class Gear(Base):
     __tablename__ = "gear"
 
@@ -55,7 +69,8 @@ class Gear(Base):
     hourly_price = Column(Numeric(10, 2), nullable=False)
     daily_price = Column(Numeric(10, 2), nullable=False)
     notes = Column(Text)
-    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False, index=True)
+    last_returned_at = Column(TIMESTAMP)
+    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     # Relationships
@@ -65,6 +80,9 @@ class Gear(Base):
     __table_args__ = (
         CheckConstraint('hourly_price > 0', name='check_hourly_price_positive'),
         CheckConstraint('daily_price > 0', name='check_daily_price_positive'),
+        Index('idx_gear_owner_status_last_returned', 'owner_id', 'status', 'last_returned_at'),
+        Index('idx_gear_owner_created', 'owner_id', 'created_at', 'id'),
+        Index('idx_gear_owner_brand', 'owner_id', 'brand_id'),
     )
 
 class Customer(Base):
@@ -73,13 +91,20 @@ class Customer(Base):
     id = Column(Integer, primary_key=True)
     full_name = Column(String(255), nullable=False, index=True)
     phone = Column(String(20), nullable=False, index=True)
+    phone_digits = Column(String(20), Computed("regexp_replace(phone, '\\D', '', 'g')", persisted=True))
     notes = Column(Text)
-    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     # Relationship
     owner = relationship("Owner", back_populates="customers")
 
+    __table_args__ = (
+        Index('idx_customers_owner_name_trgm', 'owner_id', 'full_name', postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}),
+        Index('idx_customers_owner_phone_digits', 'owner_id', 'phone_digits', postgresql_ops={'phone_digits': 'varchar_pattern_ops'}),
+        Index('idx_customers_owner_name', 'owner_id', 'full_name', 'id'),
+    )
+
 class Rental(Base):
     __tablename__ = "rentals"
 
@@ -93,13 +118,38 @@ class Rental(Base):
     total_price = Column(Numeric(10, 2), nullable=False)
     condition_score = Column(Integer)
     comment = Column(Text)
-    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='RESTRICT'), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
-    # Relationship
+    # Relationships
+    gear = relationship("Gear")
+    customer = relationship("Customer")
     owner = relationship("Owner", back_populates="rentals")
 
     __table_args__ = (
         CheckConstraint('due_at > start_at', name='check_due_after_start'),
         CheckConstraint('condition_score BETWEEN 1 AND 5', name='check_condition_score_range'),
+        Index('idx_rentals_owner_due_active', 'owner_id', 'due_at', 'id', postgresql_where=text('return_at IS NULL')),
+        Index('uq_rentals_gear_active', 'gear_id', unique=True, postgresql_where=text('return_at IS NULL')),
+        Index('idx_rentals_owner_created', 'owner_id', 'created_at', 'id', postgresql_include=['total_price']),
+        Index('idx_rentals_owner_customer', 'owner_id', 'customer_id', postgresql_include=['total_price', 'created_at', 'condition_score']),
+        Index('idx_rentals_owner_gear', 'owner_id', 'gear_id', postgresql_include=['total_price', 'condition_score']),
+    )
+
+class RentalDailyStats(Base):
+    """Денний rollup оренд для аналітики: кількість та виручка по (власник, день, година, тип gear, тип оренди)"""
+    __tablename__ = "rental_daily_stats"
+
+    owner_id = Column(Integer, ForeignKey('owners.id', ondelete='CASCADE'), nullable=False)
+    day = Column(Date, nullable=False)
+    hour = Column(SmallInteger, nullable=False)
+    gear_type = Column(SQLEnum(GearType, name="gear_type_enum"), nullable=False)
+    rental_type = Column(SQLEnum(RentalType, name="rental_type_enum"), nullable=False)
+    rental_count = Column(Integer, nullable=False, server_default="0")
+    revenue = Column(Numeric(14, 2), nullable=False, server_default="0")
+    returned_count = Column(Integer, nullable=False, server_default="0")
+    condition_score_sum = Column(Integer, nullable=False, server_default="0")
+
+    __table_args__ = (
+        PrimaryKeyConstraint('owner_id', 'day', 'hour', 'gear_type', 'rental_type'),
     )
@@ -0,0 +1,162 @@
+from fastapi import HTTPException
+from sqlalchemy import tuple_, select, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from datetime import datetime
+import base64
+import json
+
+# Найбільший розмір сторінки для limit-параметрів
+MAX_PAGE_SIZE = 100
+
+# Непрозорий курсор для keyset-пагінації: base64(JSON зі значеннями ключа сортування останнього рядка)
+def encode_cursor(*values) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некоректний курсор")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Некоректний курсор")
+    return values
+
+def parse_cursor_datetime(value) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Некоректний курсор")
+
+def parse_cursor_value(column, value):
+    # Значення курсора має відповідати типу колонки ключа - інакше 400, а не помилка БД
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return parse_cursor_datetime(value)
+    if isinstance(value, python_type) and (python_type is bool or not isinstance(value, bool)):
+        return value
+    raise HTTPException(status_code=400, detail="Некоректний курсор")
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def visit_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def estimate_count(query) -> int:
+    # Оцінка кількості рядків від планувальника PostgreSQL (без виконання COUNT)
+    statement = query.enable_eagerloads(False).statement
+    plan = query.session.execute(Explain(statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def count_total(query, include_total: bool = True, approximate_total: bool = False) -> int | None:
+    if not include_total:
+        return None
+    query = query.order_by(None)
+    if approximate_total:
+        return estimate_count(query)
+    return query.count()
+
+async def count_total_async(db, statement, include_total: bool = True, approximate_total: bool = False) -> int | None:
+    if not include_total:
+        return None
+    statement = statement.order_by(None)
+    if approximate_total:
+        plan = (await db.execute(Explain(statement))).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return (await db.execute(select(func.count()).select_from(statement.subquery()))).scalar()
+
+def keyset_order(keyset: tuple, descending: bool = False) -> list:
+    # Стабільний порядок сторінок за тим самим ключем, що й курсор (і за тим самим індексом)
+    return [column.desc() if descending else column.asc() for column in keyset]
+
+def offset_page(page: int, page_size: int, items: list, total: int | None) -> dict:
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None
+    }
+
+def keyset_window(query, keyset: tuple, cursor: str, page_size: int, descending: bool = False):
+    """Keyset-пагінація: порожній cursor - перша сторінка, далі next_cursor / prev_cursor з відповіді"""
+    direction = "next"
+    if cursor:
+        direction, *values = decode_cursor(cursor, len(keyset) + 1)
+        if direction not in ("next", "prev"):
+            raise HTTPException(status_code=400, detail="Некоректний курсор")
+        values = [parse_cursor_value(column, value) for column, value in zip(keyset, values)]
+        # Для попередньої сторінки йдемо у зворотному напрямку від першого рядка
+        forward = (direction == "next") != descending
+        query = query.filter(tuple_(*keyset) > tuple(values) if forward else tuple_(*keyset) < tuple(values))
+
+    reverse = (direction == "prev") != descending
+    query = query.order_by(None).order_by(*[column.desc() if reverse else column.asc() for column in keyset])
+    return direction, query.limit(page_size + 1)
+
+def keyset_page(keyset: tuple, cursor: str, direction: str, page_size: int, items: list, total: int | None) -> dict:
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if direction == "prev":
+        items.reverse()
+
+    def key_of(item):
+        return [getattr(item, column.key) for column in keyset]
+
+    has_next = has_more if direction == "next" else bool(cursor)
+    has_prev = bool(cursor) if direction == "next" else has_more
+
+    return {
+        "items": items,
+        "total": total,
+        "page_size": page_size,
+        "next_cursor": encode_cursor("next", *key_of(items[-1])) if items and has_next else None,
+        "prev_cursor": encode_cursor("prev", *key_of(items[0])) if items and has_prev else None
+    }
+
+def paginate(
+    query,
+    keyset: tuple,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    descending: bool = False,
+    include_total: bool = True,
+    approximate_total: bool = False
+) -> dict:
+    total = count_total(query, include_total, approximate_total)
+    if cursor is not None:
+        direction, window = keyset_window(query, keyset, cursor, page_size, descending)
+        return keyset_page(keyset, cursor, direction, page_size, window.all(), total)
+    query = query.order_by(None).order_by(*keyset_order(keyset, descending))
+    items = query.limit(page_size).offset((page - 1) * page_size).all()
+    return offset_page(page, page_size, items, total)
+
+async def paginate_async(
+    db,
+    statement,
+    keyset: tuple,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    descending: bool = False,
+    include_total: bool = True,
+    approximate_total: bool = False
+) -> dict:
+    total = await count_total_async(db, statement, include_total, approximate_total)
+    if cursor is not None:
+        direction, window = keyset_window(statement, keyset, cursor, page_size, descending)
+        items = list((await db.execute(window)).scalars().all())
+        return keyset_page(keyset, cursor, direction, page_size, items, total)
+    statement = statement.order_by(None).order_by(*keyset_order(keyset, descending))
+    items = list((await db.execute(statement.limit(page_size).offset((page - 1) * page_size))).scalars().all())
+    return offset_page(page, page_size, items, total)
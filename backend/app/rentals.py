@@ -0,0 +1,97 @@
+from fastapi import HTTPException
+from sqlalchemy import update, func
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
+from app.models import Gear, Rental
+
+# Eager loading gear (з брендом) та customer для оренди
+def rental_details_options():
+    return (
+        joinedload(Rental.gear).joinedload(Gear.brand),
+        joinedload(Rental.customer),
+    )
+
+# Фільтр оренд за статусом: active / completed / overdue
+def filter_rentals_by_status(query, status: str | None):
+    if status == 'active':
+        return query.filter(Rental.return_at.is_(None))
+    if status == 'completed':
+        return query.filter(Rental.return_at.isnot(None))
+    if status == 'overdue':
+        return query.filter(
+            Rental.return_at.is_(None),
+            Rental.due_at < func.now()
+        )
+    return query
+
+# Helper функція для форматування відповіді rental
+def format_rental_response(rental: Rental):
+    gear = rental.gear
+    customer = rental.customer
+    brand = gear.brand if gear else None
+
+    is_overdue = False
+    if not rental.return_at and rental.due_at < datetime.utcnow():
+        is_overdue = True
+
+    return {
+        "id": rental.id,
+        "gear_id": rental.gear_id,
+        "customer_id": rental.customer_id,
+        "start_at": rental.start_at.isoformat() if rental.start_at else None,
+        "due_at": rental.due_at.isoformat() if rental.due_at else None,
+        "return_at": rental.return_at.isoformat() if rental.return_at else None,
+        "rental_type": rental.rental_type,
+        "total_price": float(rental.total_price),
+        "condition_score": rental.condition_score,
+        "comment": rental.comment,
+        "created_at": rental.created_at.isoformat() if rental.created_at else None,
+        "gear": {
+            "id": gear.id,
+            "type": gear.type,
+            "brand": brand.name if brand else None,
+            "size": gear.size
+        },
+        "customer": {
+            "id": customer.id,
+            "full_name": customer.full_name,
+            "phone": customer.phone
+        },
+        "is_overdue": is_overdue
+    }
+
+# Умовний UPDATE: переводить gear у 'rented' лише якщо він доступний, повертає ціни для розрахунку
+def reserve_gear_statement(gear_id: int, owner_id: int):
+    return update(Gear)\
+        .where(Gear.id == gear_id, Gear.owner_id == owner_id, Gear.status == 'available')\
+        .values(status='rented')\
+        .returning(Gear.id, Gear.hourly_price, Gear.daily_price)\
+        .execution_options(synchronize_session=False)
+
+# Валідація типу та тривалості оренди
+def validate_rental_terms(rental_type: str, duration: int):
+    if rental_type not in ['hourly', 'daily']:
+        raise HTTPException(status_code=400, detail="Тип оренди має бути 'hourly' або 'daily'")
+    if duration <= 0:
+        raise HTTPException(status_code=400, detail="Тривалість має бути більше 0")
+
+# Розрахунок дат та ціни оренди: (start_at, due_at, total_price)
+def calculate_rental_terms(gear: Gear, rental_type: str, duration: int, start_at: datetime | None = None):
+    start_at = start_at or datetime.utcnow()
+
+    if rental_type == 'hourly':
+        total_price = float(gear.hourly_price) * duration
+        due_at = start_at + timedelta(hours=duration)
+    else:  # daily
+        total_price = float(gear.daily_price) * duration
+        due_at = start_at + timedelta(days=duration)
+
+    return start_at, due_at, total_price
+
+def validate_condition_score(condition_score: int):
+    if condition_score < 1 or condition_score > 5:
+        raise HTTPException(status_code=400, detail="Оцінка стану має бути від 1 до 5")
+
+# Статус спорядження після повернення: 1 зірка - спорядження зламане
+def gear_status_after_return(condition_score: int) -> str:
+    return "broken" if condition_score == 1 else "available"
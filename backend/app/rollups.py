@@ -0,0 +1,62 @@
+from sqlalchemy import select, delete, func, cast, literal, true, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from datetime import datetime
+from app.models import Gear, Rental, RentalDailyStats
+
+STATS_KEY = ("owner_id", "day", "hour", "gear_type", "rental_type")
+STATS_VALUES = ("rental_count", "revenue", "returned_count", "condition_score_sum")
+
+def rental_stats_select(condition, created: bool, returned: bool, sign: int = 1):
+    """Внесок оренд (за умовою) у rollup, згрупований за ключем rental_daily_stats"""
+    day = func.date(Rental.created_at)
+    hour = cast(func.extract('hour', Rental.created_at), Integer)
+    zero = literal(0)
+    return select(
+        Rental.owner_id, day, hour, Gear.type, Rental.rental_type,
+        func.count(Rental.id) * sign if created else zero,
+        func.coalesce(func.sum(Rental.total_price), 0) * sign if created else zero,
+        func.count(Rental.return_at) * sign if returned else zero,
+        func.coalesce(func.sum(Rental.condition_score), 0) * sign if returned else zero,
+    ).join(Gear, Gear.id == Rental.gear_id)\
+     .where(condition)\
+     .group_by(Rental.owner_id, day, hour, Gear.type, Rental.rental_type)\
+     .order_by(Rental.owner_id, day, hour, Gear.type, Rental.rental_type)
+
+def apply_rental_stats(db: Session, condition, created: bool = False, returned: bool = False, sign: int = 1):
+    """
+    Інкрементне оновлення rollup одним INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+    created - врахувати кількість та виручку, returned - повернення та оцінки стану,
+    sign=-1 - відняти внесок (перед видаленням оренд або зміною типу gear).
+    """
+    statement = pg_insert(RentalDailyStats).from_select(
+        list(STATS_KEY + STATS_VALUES),
+        rental_stats_select(condition, created, returned, sign)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=list(STATS_KEY),
+        set_={
+            column: getattr(RentalDailyStats, column) + getattr(statement.excluded, column)
+            for column in STATS_VALUES
+        }
+    )
+    db.execute(statement)
+
+def rebuild_rental_stats(db: Session, owner_id: int | None = None):
+    """Повний перерахунок rollup з таблиці rentals (backfill); без owner_id - для всіх власників"""
+    # Паралельні інкрементні оновлення чекають завершення перерахунку
+    db.connection().exec_driver_sql("LOCK TABLE rental_daily_stats IN EXCLUSIVE MODE")
+
+    condition = true()
+    statement = delete(RentalDailyStats)
+    if owner_id is not None:
+        condition = Rental.owner_id == owner_id
+        statement = statement.where(RentalDailyStats.owner_id == owner_id)
+    db.execute(statement)
+    apply_rental_stats(db, condition, created=True, returned=True)
+
+def stats_since(moment: datetime):
+    # Фільтр rollup від моменту часу з точністю до години (гранулярність rental_daily_stats)
+    return (RentalDailyStats.day > moment.date()) | (
+        (RentalDailyStats.day == moment.date()) & (RentalDailyStats.hour >= moment.hour)
+    )
@@ -13,6 +13,21 @@ class OwnerLogin(BaseModel):
     email: EmailStr
     password: str
 
+class OwnerIdentity(BaseModel):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    id: int
+    email: str
+    company_name: str | None = None
+    segment_vip_min_rentals: int = 5
+    segment_regular_min_rentals: int = 2
+
+class SegmentationSettings(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    vip_min_rentals: int
+    regular_min_rentals: int
+
 class GearCreate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -45,12 +60,26 @@ class RentalCreate(BaseModel):
     rental_type: str  # 'hourly' або 'daily'
     duration: int  # кількість годин або днів
 
+class RentalBatchCreate(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    items: list[RentalCreate]
+    all_or_nothing: bool = True  # при будь-якій помилці не створювати жодної оренди
+
 class RentalReturn(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     condition_score: int  # 1-5
     comment: str | None = None
 
+class RentalBatchReturnItem(RentalReturn):
+    id: int  # id оренди
+
+class RentalBatchReturn(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    items: list[RentalBatchReturnItem]
+
 class BrandCreate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Порівняння SQL агрегатів аналітики з in-memory рушієм NumPy (ANALYTICS_ENGINE=numpy) на реальній БД.
+
+Дані під 1M оренд одного власника:
+    python seed_data.py --scale 4000
+
+Приклади:
+    python benchmark_analytics.py --owner-id 1
+    python benchmark_analytics.py --owner-id 1 --repeat 10
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from app.database import SessionLocal
+from app.models import Owner, Rental
+from app import analytics
+from app.cache import analytics_cache
+from app.analytics_engine import RentalAnalyticsEngine, np
+
+# Усі агрегати, які рушій рахує зі знімка; пороги сегментів - як у власника за замовчуванням
+VIP_MIN_RENTALS, REGULAR_MIN_RENTALS = 5, 2
+
+AGGREGATES = {
+    "top_customers": lambda db, owner_id: analytics.top_customer_stats(db, owner_id, 10),
+    "problematic_customers": lambda db, owner_id: analytics.low_condition_customer_stats(db, owner_id, 3.0),
+    "segmentation": lambda db, owner_id: analytics.customer_segment_rows(db, owner_id, VIP_MIN_RENTALS, REGULAR_MIN_RENTALS, 10),
+    "segment_page": lambda db, owner_id: analytics.segment_customer_rows(
+        db, owner_id, VIP_MIN_RENTALS, REGULAR_MIN_RENTALS, "regular", None, 10
+    ),
+    "top_gear": lambda db, owner_id: analytics.top_gear_stats(db, owner_id, 10),
+    "brand_stats": lambda db, owner_id: analytics.brand_stats(db, owner_id),
+}
+
+def measure(engine, aggregate, owner_id: int, repeat: int) -> list[float]:
+    # Нова сесія на кожен прогін (спільні агрегати session.info не переносяться між прогонами)
+    analytics.rental_engine = engine
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            aggregate(db, owner_id)
+            timings.append((time.perf_counter() - started) * 1000)
+            # Вимір рушія не має непомітно перейти на SQL
+            assert not engine.enabled or engine.columns(db, owner_id) is not None
+        finally:
+            db.close()
+    return timings
+
+def measure_load(engine, owner_id: int) -> list[float]:
+    started = time.perf_counter()
+    engine.load(owner_id)
+    return [(time.perf_counter() - started) * 1000]
+
+def after_write(aggregate):
+    # Запис власника збільшує покоління - знімок перевіряє нові оренди та повернення
+    def run(db, owner_id: int):
+        analytics_cache.invalidate_owner(owner_id)
+        return aggregate(db, owner_id)
+    return run
+
+def report(name: str, timings: list[float]):
+    print(f"  {name:<28} median {statistics.median(timings):9.1f} ms   min {min(timings):9.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL vs NumPy для агрегатів аналітики")
+    parser.add_argument("--owner-id", type=int, required=True, help="ID власника")
+    parser.add_argument("--repeat", type=int, default=5, help="Кількість прогонів кожного виміру")
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ NumPy не встановлено: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        if db.get(Owner, args.owner_id) is None:
+            print(f"❌ Власника {args.owner_id} не знайдено", file=sys.stderr)
+            sys.exit(1)
+        rentals = db.query(Rental).filter(Rental.owner_id == args.owner_id).count()
+    finally:
+        db.close()
+    print(f"Власник {args.owner_id}: {rentals} оренд")
+
+    # Повне завантаження знімка (у сервісі - фоновий потік, запити тим часом рахуються в SQL)
+    numpy_engine = RentalAnalyticsEngine(True, 1)
+    report("NumPy завантаження знімка", measure_load(numpy_engine, args.owner_id))
+
+    sql = RentalAnalyticsEngine(False, 1)
+    for name, aggregate in AGGREGATES.items():
+        print(f"{name}:")
+        report("SQL", measure(sql, aggregate, args.owner_id, args.repeat))
+        # Без записів знімок не звертається до rentals; після запису - дозавантаження змін у запиті
+        report("NumPy (знімок у пам'яті)", measure(numpy_engine, aggregate, args.owner_id, args.repeat))
+        report("NumPy (після запису)", measure(numpy_engine, after_write(aggregate), args.owner_id, args.repeat))
+
+    print(f"Знімок: {numpy_engine.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Пропускна здатність sync endpoints (psycopg2 у пулі потоків) проти async (asyncpg, DB_ASYNC=true).
+
+Для кожного режиму запускає uvicorn на тій самій БД (DATABASE_URL, SECRET_KEY з оточення),
+створює тимчасового власника з даними через /seed/*/bulk і навантажує списки /rentals, /gear,
+/customers заданою кількістю паралельних клієнтів. Потрібен httpx (requirements-dev.txt).
+
+Приклади:
+    python benchmark_async.py
+    python benchmark_async.py --concurrency 64 --duration 20 --workers 2
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+import httpx
+
+PATHS = ("/rentals?page_size=20", "/rentals?status=active&page_size=20", "/gear?page_size=20", "/customers?page_size=20")
+
+def start_server(port: int, db_async: bool, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "DB_ASYNC": "true" if db_async else "false"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env
+    )
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Сервер не запустився")
+
+async def seed(client: httpx.AsyncClient, path: str, rows: list[dict]) -> list[int]:
+    response = await client.post(path, json=rows)
+    response.raise_for_status()
+    return response.json()["ids"]
+
+async def create_owner(client: httpx.AsyncClient, size: int) -> dict:
+    response = await client.post("/register", json={
+        "email": f"benchmark-{uuid.uuid4().hex[:12]}@example.com", "password": uuid.uuid4().hex, "company_name": "Benchmark"
+    })
+    response.raise_for_status()
+    owner = response.json()
+    owner_id = owner["id"]
+
+    brand_id, = await seed(client, "/seed/brands/bulk", [{"name": "Benchmark", "owner_id": owner_id}])
+    gear_ids = await seed(client, "/seed/gear/bulk", [
+        {"type": "ski", "brand_id": brand_id, "hourly_price": 10, "daily_price": 50, "owner_id": owner_id}
+        for _ in range(size)
+    ])
+    customer_ids = await seed(client, "/seed/customers/bulk", [
+        {"full_name": f"Клієнт {n}", "phone": f"+380{n:09d}", "owner_id": owner_id} for n in range(size)
+    ])
+    # Половина оренд повернута, решта активні (по одній на gear)
+    now = datetime.utcnow()
+    await seed(client, "/seed/rentals/bulk", [
+        {
+            "gear_id": gear_id, "customer_id": customer_id, "owner_id": owner_id,
+            "start_at": (now - timedelta(days=2)).isoformat(), "due_at": (now + timedelta(days=n % 3 - 1)).isoformat(),
+            "return_at": (now - timedelta(days=1)).isoformat() if n % 2 else None,
+            "rental_type": "daily", "total_price": 50, "condition_score": 4 if n % 2 else None
+        }
+        for n, (gear_id, customer_id) in enumerate(zip(gear_ids, customer_ids))
+    ])
+    return {"Authorization": f"Bearer {owner['token']}"}
+
+async def run_load(client: httpx.AsyncClient, headers: dict, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    paths = itertools.cycle(PATHS)
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = await client.get(next(paths), headers=headers)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+async def benchmark(args) -> dict:
+    results = {}
+    headers = None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    for name, db_async in (("sync", False), ("async", True)):
+        server = start_server(args.port, db_async, args.workers)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+                await wait_ready(client)
+                if headers is None:
+                    headers = await create_owner(client, args.size)
+                # Прогрів пулів з'єднань та кешу ідентичності власника
+                await run_load(client, headers, args.concurrency, 1)
+                results[name] = await run_load(client, headers, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="sync vs async (DB_ASYNC) endpoints під навантаженням")
+    parser.add_argument("--concurrency", type=int, default=32, help="Паралельних клієнтів")
+    parser.add_argument("--duration", type=float, default=10, help="Тривалість виміру кожного режиму, с")
+    parser.add_argument("--workers", type=int, default=1, help="Воркерів uvicorn")
+    parser.add_argument("--size", type=int, default=500, help="Спорядження / клієнтів / оренд у тестового власника")
+    parser.add_argument("--port", type=int, default=8765, help="Порт uvicorn")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+    print(f"{len(PATHS)} endpoints по колу, {args.concurrency} клієнтів, {args.duration:g} с, воркерів: {args.workers}")
+    for name, result in results.items():
+        print(
+            f"  {name:<6} {result['rps']:8.1f} req/s   p50 {result['p50']:7.1f} ms   p95 {result['p95']:7.1f} ms   "
+            f"p99 {result['p99']:7.1f} ms   запитів {result['requests']}   помилок {result['errors']}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Продуктивність брендів: rollup оренд по спорядженню (app.analytics.brand_stats, 3 запити незалежно від кількості брендів) проти запитів на кожен бренд.
+
+Створює тимчасового власника з даними (за замовчуванням 50 брендів, 100k оренд), вимірює обидва
+варіанти на тій самій БД і видаляє дані (--keep - залишити).
+
+Приклади:
+    python benchmark_brands.py
+    python benchmark_brands.py --brands 50 --rentals 100000 --repeat 10
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from sqlalchemy import event, func, text
+from app.database import SessionLocal, engine
+from app.models import Gear, Rental, Brand
+from app.analytics import brand_stats
+
+def create_dataset(db, brands: int, gear_per_brand: int, customers: int, rentals: int) -> int:
+    owner_id = db.execute(
+        text("INSERT INTO owners (email, password_hash, company_name) VALUES (:email, 'x', 'Benchmark') RETURNING id"),
+        {"email": f"benchmark-{uuid.uuid4().hex[:12]}@example.com"}
+    ).scalar()
+    params = {"owner_id": owner_id, "brands": brands, "gear": brands * gear_per_brand, "customers": customers, "rentals": rentals}
+    db.execute(text("""
+        INSERT INTO brands (name, owner_id)
+        SELECT 'Brand ' || n, :owner_id FROM generate_series(1, :brands) AS n
+    """), params)
+    db.execute(text("""
+        INSERT INTO gear (type, brand_id, status, hourly_price, daily_price, owner_id)
+        SELECT (ARRAY['ski', 'skate', 'sled'])[1 + n % 3]::gear_type_enum,
+               (SELECT id FROM brands WHERE owner_id = :owner_id ORDER BY id OFFSET n % :brands LIMIT 1),
+               (CASE WHEN n % 7 = 0 THEN 'rented' ELSE 'available' END)::gear_status_enum,
+               10, 50, :owner_id
+        FROM generate_series(1, :gear) AS n
+    """), params)
+    db.execute(text("""
+        INSERT INTO customers (full_name, phone, owner_id)
+        SELECT 'Клієнт ' || n, '+380' || lpad(n::text, 9, '0'), :owner_id FROM generate_series(1, :customers) AS n
+    """), params)
+    # Усі оренди завершені - обмеження однієї активної оренди на gear не заважає
+    db.execute(text("""
+        WITH gear_ids AS (SELECT array_agg(id) AS ids FROM gear WHERE owner_id = :owner_id),
+             customer_ids AS (SELECT array_agg(id) AS ids FROM customers WHERE owner_id = :owner_id)
+        INSERT INTO rentals (gear_id, customer_id, start_at, due_at, return_at, rental_type, total_price, condition_score, owner_id, created_at)
+        SELECT gear_ids.ids[1 + n % :gear], customer_ids.ids[1 + n % :customers],
+               now() - make_interval(hours => n % 8760 + 24), now() - make_interval(hours => n % 8760),
+               now() - make_interval(hours => n % 8760), 'daily', 50 + n % 100, 1 + n % 5, :owner_id,
+               now() - make_interval(hours => n % 8760 + 24)
+        FROM generate_series(1, :rentals) AS n, gear_ids, customer_ids
+    """), params)
+    db.commit()
+    db.execute(text("ANALYZE brands, gear, customers, rentals"))
+    db.commit()
+    return owner_id
+
+def drop_dataset(db, owner_id: int):
+    for table in ("rentals", "gear", "customers", "brands", "owners"):
+        column = "id" if table == "owners" else "owner_id"
+        db.execute(text(f"DELETE FROM {table} WHERE {column} = :owner_id"), {"owner_id": owner_id})
+    db.commit()
+
+def per_brand_queries(db, owner_id: int) -> list:
+    # Попередня реалізація: підсумки та по 5 запитів на кожен бренд
+    db.query(Gear).filter(Gear.owner_id == owner_id).count()
+    db.query(func.sum(Rental.total_price)).filter(Rental.owner_id == owner_id).scalar()
+    db.query(Rental).filter(Rental.owner_id == owner_id).count()
+    rows = []
+    for brand in db.query(Brand).filter(Brand.owner_id == owner_id).all():
+        by_brand = (Gear.brand_id == brand.id, Rental.owner_id == owner_id, Gear.owner_id == owner_id)
+        rows.append((
+            brand.id,
+            db.query(Gear).filter(Gear.brand_id == brand.id, Gear.owner_id == owner_id).count(),
+            db.query(Rental).join(Gear, Rental.gear_id == Gear.id).filter(*by_brand).count(),
+            db.query(func.sum(Rental.total_price)).join(Gear, Rental.gear_id == Gear.id).filter(*by_brand).scalar(),
+            db.query(func.avg(Rental.condition_score)).join(Gear, Rental.gear_id == Gear.id)
+              .filter(*by_brand, Rental.condition_score.isnot(None)).scalar(),
+            db.query(Gear).filter(Gear.brand_id == brand.id, Gear.owner_id == owner_id, Gear.status == 'rented').count(),
+        ))
+    return rows
+
+def measure(variant, owner_id: int, repeat: int) -> tuple[list[float], int]:
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    timings = []
+    try:
+        for _ in range(repeat):
+            # Нова сесія на кожен прогін - спільні агрегати session.info не переносяться між вимірами
+            db = SessionLocal()
+            try:
+                statements.clear()
+                started = time.perf_counter()
+                variant(db, owner_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return timings, len(statements)
+
+def report(name: str, timings: list[float], statements: int):
+    print(f"  {name:<24} median {statistics.median(timings):9.1f} ms   min {min(timings):9.1f} ms   запитів {statements}")
+
+def main():
+    parser = argparse.ArgumentParser(description="GROUP BY по брендах проти запитів на кожен бренд")
+    parser.add_argument("--brands", type=int, default=50, help="Кількість брендів")
+    parser.add_argument("--gear-per-brand", type=int, default=20, help="Спорядження на бренд")
+    parser.add_argument("--customers", type=int, default=2000, help="Кількість клієнтів")
+    parser.add_argument("--rentals", type=int, default=100000, help="Кількість оренд")
+    parser.add_argument("--repeat", type=int, default=5, help="Кількість прогонів кожного варіанту")
+    parser.add_argument("--keep", action="store_true", help="Не видаляти згенеровані дані")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    owner_id = create_dataset(db, args.brands, args.gear_per_brand, args.customers, args.rentals)
+    print(f"Власник {owner_id}: {args.brands} брендів, {args.brands * args.gear_per_brand} од. спорядження, "
+          f"{args.rentals} оренд (згенеровано за {time.perf_counter() - started:.1f} с)")
+    try:
+        # Прогрів кешу сторінок, щоб обидва варіанти читали з пам'яті
+        measure(brand_stats, owner_id, 1)
+        report("rollup (brand_stats)", *measure(brand_stats, owner_id, args.repeat))
+        report("запити на кожен бренд", *measure(per_brand_queries, owner_id, args.repeat))
+    finally:
+        if not args.keep:
+            drop_dataset(db, owner_id)
+        db.close()
+
+if __name__ == "__main__":
+    main()
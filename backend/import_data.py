@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Масовий імпорт спорядження та клієнтів з CSV напряму в БД (COPY у staging таблицю).
+
+Приклади:
+    python import_data.py gear gear.csv --owner-id 1
+    python import_data.py customers customers.csv --owner-id 1
+
+Колонки CSV:
+    gear:      type, brand, size, status, hourly_price, daily_price, notes
+    customers: full_name, phone, notes
+"""
+
+import argparse
+import json
+import sys
+import time
+from fastapi import HTTPException
+from app.database import SessionLocal
+from app.importer import import_gear_csv, import_customers_csv
+
+def main():
+    parser = argparse.ArgumentParser(description="Імпорт спорядження та клієнтів з CSV")
+    parser.add_argument("entity", choices=["gear", "customers"])
+    parser.add_argument("path", help="Шлях до CSV файлу (UTF-8)")
+    parser.add_argument("--owner-id", type=int, required=True, help="ID власника, якому належать дані")
+    parser.add_argument("--no-create-brands", action="store_true", help="Не створювати відсутні бренди (рядки з ними - помилка)")
+    parser.add_argument("--max-errors", type=int, default=50, help="Скільки помилок вивести")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as lines:
+            if args.entity == "gear":
+                report = import_gear_csv(db, lines, args.owner_id, create_brands=not args.no_create_brands)
+            else:
+                report = import_customers_csv(db, lines, args.owner_id)
+    except HTTPException as e:
+        db.rollback()
+        print(f"❌ {e.detail}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    errors = report.pop("errors")
+    print(f"✅ Імпорт {args.entity} завершено за {time.monotonic() - started:.2f} с")
+    print(json.dumps(report, ensure_ascii=False))
+    for error in errors[:args.max_errors]:
+        print(f"  рядок {error['row']}: {error['error']}")
+    if len(errors) > args.max_errors:
+        print(f"  ... та ще {len(errors) - args.max_errors} помилок")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Перерахунок rollup таблиці rental_daily_stats з таблиці rentals (backfill або виправлення розбіжностей).
+
+Приклади:
+    python rebuild_rollups.py               # всі власники
+    python rebuild_rollups.py --owner-id 1  # один власник
+"""
+
+import argparse
+import time
+from app.database import SessionLocal
+from app.rollups import rebuild_rental_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Перерахунок rental_daily_stats")
+    parser.add_argument("--owner-id", type=int, help="Лише для цього власника")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        rebuild_rental_stats(db, args.owner_id)
+        db.commit()
+    finally:
+        db.close()
+
+    # Кеш аналітики API оновиться після ANALYTICS_CACHE_TTL
+    print(f"✅ rental_daily_stats перераховано за {time.monotonic() - started:.2f} с")
+
+if __name__ == "__main__":
+    main()
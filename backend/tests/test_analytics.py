@@ -0,0 +1,226 @@
+import pytest
+from app.cache import analytics_cache
+
+def dashboard_query_count(client, auth_headers) -> int:
+    analytics_cache.clear()
+    response = client.get("/analytics/dashboard", headers=auth_headers)
+    assert response.status_code == 200
+    return int(response.headers["X-DB-Queries"])
+
+def test_dashboard_is_single_statement(client, auth_headers, make_gear, make_customers):
+    gear_ids = make_gear(3)
+    customer_ids = make_customers(2)
+    assert dashboard_query_count(client, auth_headers) == 1
+
+    # Кількість запитів не залежить від обсягу даних
+    for gear_id, customer_id in zip(gear_ids, customer_ids * 2):
+        response = client.post("/rentals", json={
+            "gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1
+        }, headers=auth_headers)
+        assert response.status_code == 200
+    assert dashboard_query_count(client, auth_headers) == 1
+
+    # Повторний запит обслуговується з кешу без звернень до БД
+    response = client.get("/analytics/dashboard", headers=auth_headers)
+    assert response.headers["X-DB-Queries"] == "0"
+
+def rent(client, auth_headers, gear_id: int, customer_id: int) -> int:
+    response = client.post("/rentals", json={
+        "gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def give_back(client, auth_headers, rental_id: int, condition_score: int):
+    response = client.post(f"/rentals/{rental_id}/return", json={"condition_score": condition_score}, headers=auth_headers)
+    assert response.status_code == 200
+
+@pytest.fixture
+def rental_history(client, auth_headers, make_gear, make_customers):
+    # Клієнт 0: 3 оренди (оцінки 2, 1, 3), клієнт 1: 2 оренди (5, 4), клієнт 2: 1 оренда (2), клієнти 3-11 без оренд
+    skis = make_gear(3, type="ski")
+    sleds = make_gear(2, type="sled")
+    customers = make_customers(12)
+    for gear_id, customer_id, score in (
+        (skis[0], customers[0], 2), (skis[0], customers[1], 5), (skis[0], customers[0], 1),
+        (skis[1], customers[0], 3), (skis[1], customers[2], 2),
+        (sleds[0], customers[1], 4),
+    ):
+        give_back(client, auth_headers, rent(client, auth_headers, gear_id, customer_id), score)
+    rent(client, auth_headers, skis[2], customers[2])
+    return {"skis": skis, "sleds": sleds, "customers": customers}
+
+def test_top_customers(client, auth_headers, rental_history):
+    customers = rental_history["customers"]
+    response = client.get("/analytics/customers/top", headers=auth_headers)
+    assert response.status_code == 200
+    top = response.json()["top_customers"]
+    # Усі з оренд, далі без оренд за id - рівно 10
+    assert [customer["id"] for customer in top] == [customers[0], customers[1], customers[2], *customers[3:10]]
+    assert [customer["rental_count"] for customer in top[:4]] == [3, 2, 2, 0]
+    assert top[0]["total_spent"] == 150
+    assert top[3]["total_spent"] == 0 and top[3]["last_rental"] is None
+
+def test_problematic_customers(client, auth_headers, rental_history):
+    customers = rental_history["customers"]
+    response = client.get("/analytics/customers/problematic", headers=auth_headers)
+    assert response.status_code == 200
+    problematic = response.json()["problematic_customers"]
+    # Відкрита оренда клієнта 2 не має оцінки і не враховується
+    assert [(customer["id"], customer["avg_condition_score"], customer["rental_count"]) for customer in problematic] == [
+        (customers[0], 2.0, 3), (customers[2], 2.0, 1)
+    ]
+
+def test_popular_equipment(client, auth_headers, rental_history):
+    skis, sleds = rental_history["skis"], rental_history["sleds"]
+    response = client.get("/analytics/equipment/popular", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [gear["id"] for gear in data["top_equipment"]] == [skis[0], skis[1], skis[2], sleds[0], sleds[1]]
+    assert [gear["rental_count"] for gear in data["top_equipment"]] == [3, 2, 1, 1, 0]
+    assert data["top_equipment"][0]["brand"] == "Brand ski"
+    assert data["by_type"] == {"ski": 3, "sled": 2}
+    assert data["by_brand"] == [{"name": "Brand ski", "count": 3}, {"name": "Brand sled", "count": 2}]
+
+def test_brand_performance(client, auth_headers, rental_history):
+    client.post("/brands", json={"name": "Без спорядження"}, headers=auth_headers)
+    response = client.get("/analytics/brands/performance", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["summary"] == {"total_brands": 3, "total_equipment": 5, "total_revenue": 350.0, "total_rentals": 7}
+    brands = {brand["brand_name"]: brand for brand in data["brands"]}
+    assert brands["Brand ski"]["rental_count"] == 6
+    assert brands["Brand ski"]["rented_count"] == 1
+    assert brands["Без спорядження"]["equipment_count"] == 0
+
+def test_bundle_matches_endpoints(client, auth_headers, rental_history):
+    sections = {
+        "popular_equipment": "/analytics/equipment/popular",
+        "top_customers": "/analytics/customers/top",
+        "brands": "/analytics/brands/performance",
+        "problematic": "/analytics/customers/problematic",
+        "overdue": "/analytics/overdue",
+        "segmentation": "/analytics/customers/segmentation",
+    }
+    bundle = client.get("/analytics/bundle", params={"sections": ",".join(sections)}, headers=auth_headers)
+    assert bundle.status_code == 200
+    analytics_cache.clear()
+    for name, path in sections.items():
+        assert bundle.json()[name] == client.get(path, headers=auth_headers).json()
+
+def test_bundle_sections_share_one_snapshot(clean_db):
+    import anyio
+    from sqlalchemy import text
+    from app.analytics import compute_sections
+
+    def snapshot(name, db):
+        # Кожна секція фіксує іншу транзакцію перед читанням - без спільного знімка воркери бачили б різні
+        with clean_db.begin() as connection:
+            connection.execute(text("SELECT txid_current()"))
+        return db.execute(text("SELECT current_setting('transaction_isolation'), txid_current_snapshot()::text")).one()
+
+    results = anyio.run(compute_sections, ["a", "b", "c", "d"], snapshot, 4)
+    assert {row[0] for row in results.values()} == {"repeatable read"}
+    assert len({row[1] for row in results.values()}) == 1
+
+def test_bundle_connection_budget():
+    from app.analytics import ConnectionBudget
+    budget = ConnectionBudget(4)
+    assert (budget.acquire(3), budget.acquire(3)) == (3, 1)
+    budget.release(3)
+    assert budget.acquire(4) == 3
+
+def engine_responses(client, auth_headers) -> dict:
+    analytics_cache.clear()
+    responses = {
+        path: client.get(path, headers=auth_headers).json()
+        for path in (
+            "/analytics/equipment/popular", "/analytics/customers/top", "/analytics/customers/problematic",
+            "/analytics/brands/performance", "/analytics/customers/segmentation?limit=1",
+            "/analytics/customers/segmentation/regular?limit=1",
+        )
+    }
+    # Друга сторінка сегмента за курсором
+    cursor = responses["/analytics/customers/segmentation/regular?limit=1"]["next_cursor"]
+    responses["page 2"] = client.get(
+        "/analytics/customers/segmentation/regular", params={"limit": 1, "cursor": cursor}, headers=auth_headers
+    ).json()
+    return responses
+
+def test_numpy_engine_matches_sql(client, auth_headers, owner, rental_history, monkeypatch):
+    pytest.importorskip("numpy")
+    from app import analytics
+    from app.analytics_engine import RentalAnalyticsEngine
+
+    expected = engine_responses(client, auth_headers)
+    assert expected["/analytics/customers/segmentation?limit=1"]["regular"]["next_cursor"]
+    assert len(expected["page 2"]["customers"]) == 1
+
+    engine = RentalAnalyticsEngine(True, 4)
+    monkeypatch.setattr(analytics, "rental_engine", engine)
+    engine.load(owner["id"])
+    assert engine.stats()["rentals"] == 7
+    assert engine_responses(client, auth_headers) == expected
+
+def test_numpy_engine_loads_in_background(client, auth_headers, owner, rental_history, monkeypatch):
+    pytest.importorskip("numpy")
+    import time
+    from app import analytics
+    from app.analytics_engine import RentalAnalyticsEngine
+
+    engine = RentalAnalyticsEngine(True, 4)
+    monkeypatch.setattr(analytics, "rental_engine", engine)
+    db = analytics.SessionLocal()
+    # Перший запит не чекає на знімок: відповідь з SQL, завантаження - у фоновому потоці
+    assert engine.top_customers(db, owner["id"], 10) is None
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and engine.stats()["rentals"] != 7:
+        time.sleep(0.05)
+    assert engine.stats() | {"bytes": 0} == {"enabled": True, "owners": 1, "rentals": 7, "loading": 0, "bytes": 0}
+
+    # Поки інший запит дозавантажує зміни, знімок не блокує - агрегат рахується в SQL
+    snapshot = engine.snapshot(owner["id"])
+    with snapshot.lock:
+        assert engine.columns(db, owner["id"]) is None
+    assert engine.columns(db, owner["id"]) is not None
+    db.close()
+
+def test_numpy_engine_refreshes_only_after_writes(client, auth_headers, owner, rental_history, monkeypatch):
+    pytest.importorskip("numpy")
+    from sqlalchemy import event
+    from app import analytics
+    from app.analytics_engine import RentalAnalyticsEngine
+    from app.database import engine
+
+    rental_engine = RentalAnalyticsEngine(True, 4)
+    monkeypatch.setattr(analytics, "rental_engine", rental_engine)
+    rental_engine.load(owner["id"])
+    statements = []
+    listener = lambda connection, cursor, statement, *args: statements.append(statement)
+
+    def top_customers() -> list[dict]:
+        analytics_cache.clear()
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response = client.get("/analytics/customers/top", headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert response.status_code == 200
+        return response.json()["top_customers"]
+
+    def reads_rentals() -> bool:
+        return any("FROM rentals" in statement for statement in statements)
+
+    # Без записів знімок актуальний - rentals не читаються
+    top_customers()
+    assert not reads_rentals()
+
+    # Після запису - дозавантаження змін у запиті, без повного завантаження
+    customers = rental_history["customers"]
+    give_back(client, auth_headers, rent(client, auth_headers, rental_history["sleds"][1], customers[3]), 5)
+    top = top_customers()
+    assert reads_rentals()
+    assert rental_engine.stats()["loading"] == 0
+    assert [customer["id"] for customer in top[:4]] == [customers[0], customers[1], customers[2], customers[3]]
+    assert top[3]["rental_count"] == 1
@@ -0,0 +1,25 @@
+import asyncio
+from app import auth
+
+def test_password_hash_roundtrip():
+    hashed = asyncio.run(auth.hash_password("secret"))
+    assert asyncio.run(auth.verify_password("secret", hashed))
+    assert not asyncio.run(auth.verify_password("wrong", hashed))
+
+def test_login(client, auth_headers):
+    response = client.post("/login", json={"email": "owner@example.com", "password": "secret"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "owner@example.com"
+    assert client.post("/login", json={"email": "owner@example.com", "password": "wrong"}).status_code == 401
+
+def test_login_recovers_from_broken_password_pool(client, auth_headers):
+    # Аварійне завершення воркера ламає ProcessPoolExecutor - пул має бути створений заново
+    pool = auth._get_pool()
+    for process in list(pool._processes.values()):
+        process.kill()
+        process.join()
+
+    for _ in range(2):
+        response = client.post("/login", json={"email": "owner@example.com", "password": "secret"})
+        assert response.status_code == 200
+    assert auth._get_pool() is not pool
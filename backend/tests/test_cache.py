@@ -0,0 +1,39 @@
+from app.cache import AnalyticsCache
+
+def make_cache() -> AnalyticsCache:
+    return AnalyticsCache(ttl=60, max_entries=16, max_bytes=1024 * 1024)
+
+def test_get_or_compute_caches_result():
+    cache = make_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert cache.get_or_compute(1, "dashboard", (), compute) == {"value": 1}
+    assert cache.get_or_compute(1, "dashboard", (), compute) == {"value": 1}
+    assert len(calls) == 1
+
+def test_invalidation_during_compute_is_not_cached():
+    cache = make_cache()
+
+    def compute():
+        # Запис даних власника завершився, поки обчислювався результат
+        cache.invalidate_owner(1)
+        return {"value": "stale"}
+
+    assert cache.get_or_compute(1, "dashboard", (), compute) == {"value": "stale"}
+    assert cache.get((1, "dashboard", ())) is None
+    assert cache.get_or_compute(1, "dashboard", (), lambda: {"value": "fresh"}) == {"value": "fresh"}
+    assert cache.get((1, "dashboard", ())) == {"value": "fresh"}
+
+def test_invalidation_of_other_owner_does_not_skip_caching():
+    cache = make_cache()
+
+    def compute():
+        cache.invalidate_owner(2)
+        return {"value": 1}
+
+    cache.get_or_compute(1, "dashboard", (), compute)
+    assert cache.get((1, "dashboard", ())) == {"value": 1}
@@ -0,0 +1,17 @@
+from app import database
+
+def test_pool_status(client):
+    response = client.get("/health/pool")
+    assert response.status_code == 200
+    status = response.json()
+    assert {"size", "checked_out", "checked_in", "overflow", "checkouts", "timeouts"} <= status.keys()
+    # Пул asyncpg показується лише в async режимі
+    if database.DB_ASYNC:
+        assert {"size", "checked_out", "checked_in", "overflow"} <= status["async"].keys()
+    else:
+        assert "async" not in status
+
+def test_metrics_include_pools(client):
+    text = client.get("/metrics").text
+    assert "db_pool_connections{state=\"checked_out\"}" in text
+    assert ("db_async_pool_connections" in text) == database.DB_ASYNC
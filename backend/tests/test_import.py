@@ -0,0 +1,100 @@
+import threading
+import time
+from sqlalchemy import text
+
+def upload(client, auth_headers, path: str, content: str):
+    # BOM як у CSV, збереженого з Excel
+    return client.post(path, files={"file": ("import.csv", ("﻿" + content).encode("utf-8"), "text/csv")}, headers=auth_headers)
+
+def test_import_customers(client, auth_headers, make_customers):
+    make_customers(1)
+    response = upload(client, auth_headers, "/import/customers", (
+        "full_name,phone,notes\r\n"
+        "Іван Петренко,+380501112233,\"постійний,\r\nклієнт\"\r\n"
+        "Дублікат у базі,+380500000000,\r\n"
+        "Дублікат у файлі,+380501112233,\r\n"
+        ",+380509998877,\r\n"
+    ))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["total_rows"], report["imported"], report["failed"]) == (4, 1, 3)
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+
+    customers = client.get("/customers", headers=auth_headers).json()["items"]
+    imported = [(customer["full_name"], customer["notes"]) for customer in customers if customer["phone"] == "+380501112233"]
+    assert imported == [("Іван Петренко", "постійний,\r\nклієнт")]
+
+def test_import_gear(client, auth_headers):
+    response = upload(client, auth_headers, "/import/gear", (
+        "type,brand,size,hourly_price,daily_price\n"
+        "ski,Atomic,170,10,50\n"
+        "sled,Новий бренд,,5,20\n"
+        "skis,Atomic,,10,50\n"
+    ))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["row"] == 4
+
+def test_import_requires_columns_and_utf8(client, auth_headers):
+    response = upload(client, auth_headers, "/import/customers", "full_name\nІван\n")
+    assert response.status_code == 400
+
+    response = client.post("/import/customers", files={
+        "file": ("import.csv", "full_name,phone\nІван,+380501112233\n".encode("cp1251"), "text/csv")
+    }, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_import_customers_concurrent_phone(client, auth_headers, owner, clean_db):
+    # Інша транзакція вставляє той самий телефон і фіксується, коли імпорт уже чекає на унікальному індексі
+    with clean_db.connect() as connection:
+        connection.execute(text(
+            "INSERT INTO customers (full_name, phone, owner_id) VALUES ('Паралельний', '+380501112233', :owner_id)"
+        ), {"owner_id": owner["id"]})
+
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(
+            upload(client, auth_headers, "/import/customers", "full_name,phone\nІван,+380501112233\n")
+        ))
+        thread.start()
+        # pg_stat_activity читається з окремого з'єднання: у межах транзакції знімок статистики не оновлюється
+        deadline = time.monotonic() + 10
+        with clean_db.connect() as monitor:
+            while time.monotonic() < deadline and not monitor.execute(text(
+                "SELECT 1 FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND query LIKE '%INSERT INTO customers%'"
+            )).first():
+                monitor.rollback()
+                time.sleep(0.05)
+        connection.commit()
+        thread.join()
+
+    assert responses[0].status_code == 409
+    customers = client.get("/customers", headers=auth_headers).json()["items"]
+    assert [customer["full_name"] for customer in customers] == ["Паралельний"]
+
+def test_import_gear_concurrent_brand(client, auth_headers, owner, clean_db):
+    # Той самий бренд створює інша транзакція, поки імпорт чекає на унікальному індексі брендів
+    with clean_db.connect() as connection:
+        connection.execute(text(
+            "INSERT INTO brands (name, owner_id) VALUES ('Atomic', :owner_id)"
+        ), {"owner_id": owner["id"]})
+
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(
+            upload(client, auth_headers, "/import/gear", "type,brand,hourly_price,daily_price\nski,Atomic,10,50\n")
+        ))
+        thread.start()
+        deadline = time.monotonic() + 10
+        with clean_db.connect() as monitor:
+            while time.monotonic() < deadline and not monitor.execute(text(
+                "SELECT 1 FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND query LIKE '%INSERT INTO brands%'"
+            )).first():
+                monitor.rollback()
+                time.sleep(0.05)
+        connection.commit()
+        thread.join()
+
+    assert responses[0].status_code == 200
+    assert (responses[0].json()["imported"], responses[0].json()["brands_created"]) == (1, 0)
+    brands = client.get("/brands", headers=auth_headers).json()["items"]
+    assert [brand["name"] for brand in brands] == ["Atomic"]
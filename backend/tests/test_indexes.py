@@ -0,0 +1,103 @@
+import re
+import pytest
+from sqlalchemy import event, text
+from app.database import engine, async_engine
+
+# Власник тесту - один з OWNERS власників з однаковим обсягом даних, тож його рядки - 1/OWNERS таблиці
+OWNERS = 40
+GEAR_PER_OWNER = 500
+CUSTOMERS_PER_OWNER = 2000
+RENTALS_PER_OWNER = 2500
+
+# Основні запити endpoints, що читають rentals / gear / customers власника
+ENDPOINTS = (
+    "/rentals", "/rentals?status=active", "/rentals?status=overdue", "/rentals?include_total=false",
+    "/gear", "/gear?status=available", "/customers", "/brands",
+    "/analytics/overdue?limit=20", "/analytics/equipment/idle",
+    "/analytics/customers/top", "/analytics/customers/problematic", "/analytics/customers/segmentation",
+    "/analytics/equipment/popular", "/analytics/brands/performance",
+)
+
+LARGE_TABLES = ("rentals", "gear", "customers")
+
+def seed_owner_data(connection, owner_id: int):
+    params = {
+        "owner_id": owner_id, "gear": GEAR_PER_OWNER, "customers": CUSTOMERS_PER_OWNER, "rentals": RENTALS_PER_OWNER
+    }
+    connection.execute(text("""
+        INSERT INTO brands (name, owner_id) SELECT 'Brand ' || n, :owner_id FROM generate_series(1, 5) AS n
+    """), params)
+    connection.execute(text("""
+        INSERT INTO gear (type, brand_id, status, hourly_price, daily_price, owner_id, last_returned_at)
+        SELECT (ARRAY['ski', 'skate', 'sled'])[1 + n % 3]::gear_type_enum,
+               (SELECT min(id) FROM brands WHERE owner_id = :owner_id) + n % 5,
+               (CASE WHEN n % 10 = 0 THEN 'rented' ELSE 'available' END)::gear_status_enum,
+               10, 50, :owner_id, now() - make_interval(days => n % 60)
+        FROM generate_series(1, :gear) AS n
+    """), params)
+    connection.execute(text("""
+        INSERT INTO customers (full_name, phone, owner_id)
+        SELECT 'Клієнт ' || n, '+380' || lpad((:owner_id * 100000 + n)::text, 9, '0'), :owner_id
+        FROM generate_series(1, :customers) AS n
+    """), params)
+    # Відкриті оренди - лише на 'rented' gear, по одній (унікальний частковий індекс)
+    connection.execute(text("""
+        WITH gear_ids AS (SELECT array_agg(id ORDER BY id) AS ids FROM gear WHERE owner_id = :owner_id),
+             customer_ids AS (SELECT array_agg(id ORDER BY id) AS ids FROM customers WHERE owner_id = :owner_id)
+        INSERT INTO rentals (gear_id, customer_id, start_at, due_at, return_at, rental_type, total_price, condition_score, owner_id, created_at)
+        SELECT gear_ids.ids[1 + n % :gear], customer_ids.ids[1 + n % :customers],
+               now() - make_interval(hours => n + 24), now() - make_interval(hours => n - 12),
+               CASE WHEN n <= :gear AND n % 10 = 0 THEN NULL ELSE now() - make_interval(hours => n) END,
+               'daily', 50 + n % 100,
+               CASE WHEN n <= :gear AND n % 10 = 0 THEN NULL ELSE 1 + n % 5 END,
+               :owner_id, now() - make_interval(hours => n + 24)
+        FROM generate_series(1, :rentals) AS n, gear_ids, customer_ids
+    """), params)
+
+@pytest.fixture
+def large_dataset(clean_db, owner):
+    with clean_db.begin() as connection:
+        owner_ids = [owner["id"]] + [
+            connection.execute(text(
+                "INSERT INTO owners (email, password_hash, company_name) VALUES (:email, 'x', 'Filler') RETURNING id"
+            ), {"email": f"filler-{n}@example.com"}).scalar()
+            for n in range(OWNERS - 1)
+        ]
+        for owner_id in owner_ids:
+            seed_owner_data(connection, owner_id)
+    # Карта видимості для index-only scan та статистика планувальника
+    with clean_db.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM ANALYZE rentals, gear, customers, brands"))
+    return owner_ids
+
+def captured_selects(client, auth_headers, path: str) -> list:
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if context.compiled is not None and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append(context.compiled.statement)
+
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    for target in engines:
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        response = client.get(path, headers=auth_headers)
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", capture)
+    assert response.status_code == 200, (path, response.text)
+    assert statements, path
+    return statements
+
+def test_endpoint_queries_use_indexes(client, auth_headers, large_dataset, clean_db):
+    seq_scan = re.compile(rf"Seq Scan on ({'|'.join(LARGE_TABLES)})\b")
+    offenders = []
+    with clean_db.connect() as connection:
+        for path in ENDPOINTS:
+            for statement in captured_selects(client, auth_headers, path):
+                # Той самий SQL, що виконує endpoint, з тими ж параметрами; налаштування планувальника - типові
+                compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+                plan = "\n".join(connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).scalars())
+                if seq_scan.search(plan):
+                    offenders.append(f"{path}\n{compiled}\n{plan}")
+    assert not offenders, "\n\n".join(offenders)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.models import Customer, Gear
+from app.pagination import MAX_PAGE_SIZE, encode_cursor, keyset_window
+
+@pytest.mark.parametrize("keyset, values", [
+    ((Gear.created_at, Gear.id), ["not a date", 1]),
+    ((Gear.created_at, Gear.id), ["2026-01-01T00:00:00", "1"]),
+    ((Gear.created_at, Gear.id), ["2026-01-01T00:00:00", 1.5]),
+    ((Gear.created_at, Gear.id), ["2026-01-01T00:00:00", True]),
+    ((Gear.created_at, Gear.id), ["2026-01-01T00:00:00", None]),
+    ((Customer.full_name, Customer.id), [42, 1]),
+    ((Customer.full_name, Customer.id), [["Іван"], 1]),
+])
+def test_cursor_value_of_wrong_type_is_rejected(keyset, values):
+    with pytest.raises(HTTPException) as error:
+        keyset_window(select(keyset[0].class_), keyset, encode_cursor("next", *values), 10)
+    assert error.value.status_code == 400
+
+def test_cursor_values_are_parsed():
+    created_at = datetime(2026, 1, 1, 12, 30)
+    direction, window = keyset_window(select(Gear), (Gear.created_at, Gear.id), encode_cursor("prev", created_at, 7), 10)
+    assert direction == "prev"
+    assert window.compile().params == {"param_1": created_at, "param_2": 7, "param_3": 11}
+
+def test_offset_pages_are_ordered_by_keyset(client, auth_headers):
+    # Імена вставляються у зворотному порядку - сторінки мають іти за (full_name, id), а не за порядком вставки
+    for index in reversed(range(5)):
+        response = client.post("/customers", json={"full_name": f"Клієнт {index}", "phone": f"+38050000{index:04d}"}, headers=auth_headers)
+        assert response.status_code == 200
+    names = [
+        customer["full_name"]
+        for page in (1, 2, 3)
+        for customer in client.get("/customers", params={"page": page, "page_size": 2}, headers=auth_headers).json()["items"]
+    ]
+    assert names == sorted(names) and len(names) == 5
+
+def test_cursor_with_wrong_type_returns_400(client, auth_headers):
+    response = client.get("/customers", params={"cursor": encode_cursor("next", 42, "1")}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_overdue_cursor_with_wrong_type_returns_400(client, auth_headers):
+    response = client.get("/analytics/overdue", params={"cursor": encode_cursor("2026-01-01T00:00:00", "1"), "limit": 10}, headers=auth_headers)
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("limit", [-1, 0, MAX_PAGE_SIZE + 1])
+def test_overdue_limit_out_of_range(client, auth_headers, limit):
+    response = client.get("/analytics/overdue", params={"limit": limit}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_overdue_pages_by_limit(client, auth_headers, owner, make_gear, make_customers):
+    gear_ids = make_gear(3)
+    customer_id, = make_customers(1)
+    now = datetime.utcnow()
+    for days, gear_id in enumerate(gear_ids, start=1):
+        response = client.post("/seed/rentals", json={
+            "gear_id": gear_id, "customer_id": customer_id, "owner_id": owner["id"],
+            "start_at": (now - timedelta(days=days + 1)).isoformat(), "due_at": (now - timedelta(days=days)).isoformat(),
+            "rental_type": "daily", "total_price": 50
+        })
+        assert response.status_code == 200
+
+    first = client.get("/analytics/overdue", params={"limit": 2}, headers=auth_headers).json()
+    assert first["count"] == 2 and first["next_cursor"]
+    rest = client.get("/analytics/overdue", params={"limit": 2, "cursor": first["next_cursor"]}, headers=auth_headers).json()
+    assert rest["count"] == 1 and rest["next_cursor"] is None
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+import asyncio
+import httpx
+from sqlalchemy import text
+
+def rental_ids(client, auth_headers, **params) -> list[int]:
+    response = client.get("/rentals", params={"page_size": 50, **params}, headers=auth_headers)
+    assert response.status_code == 200
+    return sorted(rental["id"] for rental in response.json()["items"])
+
+async def post_concurrently(client, path: str, payloads: list, headers: dict | None = None) -> list[int]:
+    # Усі запити одночасно в event loop тестового клієнта (sync endpoints - у пулі потоків)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=client.app), base_url="http://test") as async_client:
+        responses = await asyncio.gather(*(async_client.post(path, json=payload, headers=headers) for payload in payloads))
+    return [response.status_code for response in responses]
+
+def test_rentals_status_filter(client, auth_headers, owner, make_gear, make_customers):
+    gear_ids = make_gear(3)
+    customer_id, = make_customers(1)
+    now = datetime.utcnow()
+    ids = []
+    for gear_id, start_at, due_at, return_at in (
+        (gear_ids[0], now - timedelta(days=3), now - timedelta(days=2), now - timedelta(days=2)),
+        (gear_ids[1], now - timedelta(days=2), now - timedelta(days=1), None),
+        (gear_ids[2], now - timedelta(hours=1), now + timedelta(days=1), None),
+    ):
+        response = client.post("/seed/rentals", json={
+            "gear_id": gear_id, "customer_id": customer_id, "owner_id": owner["id"],
+            "start_at": start_at.isoformat(), "due_at": due_at.isoformat(),
+            "return_at": return_at.isoformat() if return_at else None,
+            "rental_type": "daily", "total_price": 50
+        })
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+
+    completed, overdue, active = ids
+    assert rental_ids(client, auth_headers) == ids
+    assert rental_ids(client, auth_headers, status="completed") == [completed]
+    assert rental_ids(client, auth_headers, status="active") == [overdue, active]
+    assert rental_ids(client, auth_headers, status="overdue") == [overdue]
+
+def test_concurrent_rentals_of_same_gear(client, auth_headers, make_gear, make_customers):
+    gear_id, = make_gear(1)
+    customer_ids = make_customers(8)
+    # Також відкриває перше з'єднання пулу поза конкуренцією запитів
+    assert rental_ids(client, auth_headers) == []
+
+    statuses = client.portal.call(post_concurrently, client, "/rentals", [
+        {"gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1} for customer_id in customer_ids
+    ], auth_headers)
+
+    assert sorted(statuses) == [200] + [400] * (len(customer_ids) - 1)
+    assert len(rental_ids(client, auth_headers, status="active")) == 1
+    assert len(rental_ids(client, auth_headers)) == 1
+    gear = client.get("/gear", headers=auth_headers).json()["items"][0]
+    assert gear["status"] == "rented"
+
+def test_batch_create_conflict_with_active_rental(client, auth_headers, owner, make_gear, make_customers):
+    gear_ids = make_gear(2)
+    customer_id, = make_customers(1)
+    now = datetime.utcnow()
+    # Активна оренда поза API: статус gear лишається 'available', конфлікт виявляє лише унікальний індекс
+    response = client.post("/seed/rentals", json={
+        "gear_id": gear_ids[0], "customer_id": customer_id, "owner_id": owner["id"],
+        "start_at": now.isoformat(), "due_at": (now + timedelta(days=1)).isoformat(),
+        "rental_type": "daily", "total_price": 50
+    })
+    assert response.status_code == 200
+
+    response = client.post("/rentals/batch", json={"items": [
+        {"gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1} for gear_id in gear_ids
+    ]}, headers=auth_headers)
+    assert response.status_code == 400
+    assert len(rental_ids(client, auth_headers)) == 1
+    statuses = {gear["id"]: gear["status"] for gear in client.get("/gear", headers=auth_headers).json()["items"]}
+    assert statuses == {gear_id: "available" for gear_id in gear_ids}
+
+def test_concurrent_bulk_seed_of_same_gear(client, auth_headers, owner, make_gear, make_customers):
+    gear_ids = make_gear(10)
+    customer_id, = make_customers(1)
+    now = datetime.utcnow()
+
+    def batch(order: list[int]) -> list[dict]:
+        return [
+            {
+                "gear_id": gear_id, "customer_id": customer_id, "owner_id": owner["id"],
+                "start_at": (now - timedelta(days=2)).isoformat(), "due_at": (now - timedelta(days=1)).isoformat(),
+                "return_at": (now - timedelta(days=1, minutes=index)).isoformat(),
+                "rental_type": "daily", "total_price": 50, "condition_score": 5
+            }
+            for index, gear_id in enumerate(order)
+        ]
+
+    # Пачки з тим самим gear у різному порядку не повинні отримувати deadlock
+    batches = [batch(gear_ids), batch(gear_ids[::-1])] * 3
+    statuses = client.portal.call(post_concurrently, client, "/seed/rentals/bulk", batches)
+
+    assert statuses == [200] * len(batches)
+    assert len(rental_ids(client, auth_headers, status="completed", page_size=100)) == 10 * len(batches)
+
+def test_concurrent_returns_of_same_rental(client, auth_headers, clean_db, make_gear, make_customers):
+    gear_id, = make_gear(1)
+    customer_id, = make_customers(1)
+    response = client.post("/rentals", json={
+        "gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    rental_id = response.json()["id"]
+
+    statuses = client.portal.call(post_concurrently, client, f"/rentals/{rental_id}/return", [
+        {"condition_score": score} for score in (5, 4, 3, 2)
+    ], auth_headers)
+
+    assert sorted(statuses) == [200, 400, 400, 400]
+    # Rollup повернень застосовано рівно один раз
+    with clean_db.connect() as connection:
+        returned, score_sum = connection.execute(text(
+            "SELECT sum(returned_count), sum(condition_score_sum) FROM rental_daily_stats"
+        )).one()
+    score = client.get(f"/rentals/{rental_id}", headers=auth_headers).json()["condition_score"]
+    assert (returned, score_sum) == (1, score)
+
+def test_concurrent_overlapping_batches(client, auth_headers, make_gear, make_customers):
+    gear_ids = make_gear(10)
+    customer_id, = make_customers(1)
+
+    def batch(order: list[int]) -> dict:
+        return {"items": [
+            {"gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1} for gear_id in order
+        ]}
+
+    # Пачки з тим самим gear у різному порядку: одна створює всі оренди, решта - 400 без deadlock
+    statuses = client.portal.call(post_concurrently, client, "/rentals/batch", [
+        batch(gear_ids), batch(gear_ids[::-1])
+    ] * 3, auth_headers)
+
+    assert sorted(statuses) == [200] + [400] * 5
+    assert len(rental_ids(client, auth_headers, status="active")) == 10
+
+def test_concurrent_overlapping_return_batches(client, auth_headers, clean_db, make_gear, make_customers):
+    gear_ids = make_gear(10)
+    customer_id, = make_customers(1)
+    response = client.post("/rentals/batch", json={"items": [
+        {"gear_id": gear_id, "customer_id": customer_id, "rental_type": "daily", "duration": 1} for gear_id in gear_ids
+    ]}, headers=auth_headers)
+    assert response.status_code == 200
+    ids = [item["rental"]["id"] for item in response.json()["items"]]
+
+    def batch(order: list[int]) -> dict:
+        return {"items": [{"id": rental_id, "condition_score": 4} for rental_id in order]}
+
+    # Пачки з тими самими орендами в різному порядку: перша повертає всі, решта отримують помилки позицій
+    statuses = client.portal.call(post_concurrently, client, "/rentals/return/batch", [
+        batch(ids), batch(ids[::-1])
+    ] * 3, auth_headers)
+
+    assert statuses == [200] * 6
+    assert len(rental_ids(client, auth_headers, status="completed")) == 10
+    statuses = {gear["status"] for gear in client.get("/gear", params={"page_size": 50}, headers=auth_headers).json()["items"]}
+    assert statuses == {"available"}
+    # Кожна оренда повернута рівно один раз - rollup повернень не задвоєний
+    with clean_db.connect() as connection:
+        returned, = connection.execute(text("SELECT sum(returned_count) FROM rental_daily_stats")).one()
+    assert returned == 10
@@ -7,21 +7,24 @@ const COLORS = {
   occasional: '#52c41a'
 }
 
-const LABELS = {
-  vip: 'VIP (≥5 оренд)',
-  regular: 'Постійні (2-4 оренди)',
-  occasional: 'Нові (1 оренда)'
-}
+// Підписи з порогів сегментації власника (налаштовуються через /settings/segmentation)
+const segmentLabels = ({ vip_min_rentals: vip, regular_min_rentals: regular }) => ({
+  vip: `VIP (≥${vip} оренд)`,
+  regular: `Постійні (${regular}-${vip - 1} оренд)`,
+  occasional: `Нові (<${regular} оренд)`
+})
 
 function CustomerSegmentChart({ data }) {
   if (!data) {
     return <Empty description="Немає даних для відображення" />
   }
 
+  const labels = segmentLabels(data.thresholds)
+
   const chartData = [
-    { name: LABELS.vip, value: data.vip.count, segment: 'vip', revenue: data.vip.total_revenue },
-    { name: LABELS.regular, value: data.regular.count, segment: 'regular', revenue: data.regular.total_revenue },
-    { name: LABELS.occasional, value: data.occasional.count, segment: 'occasional', revenue: data.occasional.total_revenue }
+    { name: labels.vip, value: data.vip.count, segment: 'vip', revenue: data.vip.total_revenue },
+    { name: labels.regular, value: data.regular.count, segment: 'regular', revenue: data.regular.total_revenue },
+    { name: labels.occasional, value: data.occasional.count, segment: 'occasional', revenue: data.occasional.total_revenue }
   ].filter(item => item.value > 0)
 
   return (
@@ -261,3 +261,31 @@ export const useProblematicCustomers = () => {
 
   return { data, loading, refetch: fetchData }
 }
+
+// Кілька секцій аналітики одним HTTP запитом (GET /analytics/bundle) замість окремого запиту на кожну секцію
+export const useAnalyticsBundle = (sections) => {
+  const { message } = App.useApp()
+  const [data, setData] = useState(null)
+  const [loading, setLoading] = useState(false)
+  const sectionsParam = sections.join(',')
+
+  const fetchData = () => {
+    setLoading(true)
+    api.get('/analytics/bundle', { params: { sections: sectionsParam } })
+      .then(response => {
+        setData(response.data)
+      })
+      .catch(error => {
+        message.error('Не вдалося завантажити аналітику')
+      })
+      .finally(() => {
+        setLoading(false)
+      })
+  }
+
+  useEffect(() => {
+    fetchData()
+  }, [sectionsParam])
+
+  return { data, loading, refetch: fetchData }
+}
@@ -5,7 +5,7 @@ import {
   CheckCircleOutlined,
   WarningOutlined
 } from '@ant-design/icons'
-import { useDashboardStats, usePopularEquipment, useTopCustomers, useRevenueData, useOverdueRentals, useBrandAnalytics, useCustomerSegmentation, useProblematicCustomers } from '../hooks/useAnalytics'
+import { useAnalyticsBundle } from '../hooks/useAnalytics'
 import { useAuth } from '../context/AuthContext'
 import EquipmentPieChart from '../components/analytics/EquipmentPieChart'
 import PopularEquipmentTable from '../components/analytics/PopularEquipmentTable'
@@ -18,18 +18,21 @@ import RevenueBreakdownChart from '../components/analytics/RevenueBreakdownChart
 
 const { Title } = Typography
 
+const ANALYTICS_SECTIONS = ['dashboard', 'popular_equipment', 'top_customers', 'revenue', 'overdue', 'brands', 'segmentation', 'problematic']
+
 function Analytics() {
   const { user } = useAuth()
-  const { data: dashboardStats, loading: loadingDashboard } = useDashboardStats()
-  const { data: equipmentData, loading: loadingEquipment } = usePopularEquipment()
-  const { data: customersData, loading: loadingCustomers } = useTopCustomers()
-  const { data: revenueData, loading: loadingRevenue } = useRevenueData()
-  const { data: overdueData, loading: loadingOverdue } = useOverdueRentals()
-  const { data: brandData, loading: loadingBrands } = useBrandAnalytics()
-  const { data: segmentData, loading: loadingSegments } = useCustomerSegmentation()
-  const { data: problematicData, loading: loadingProblematic } = useProblematicCustomers()
+  const { data: analytics, loading } = useAnalyticsBundle(ANALYTICS_SECTIONS)
+  const dashboardStats = analytics?.dashboard
+  const equipmentData = analytics?.popular_equipment
+  const customersData = analytics?.top_customers
+  const revenueData = analytics?.revenue
+  const overdueData = analytics?.overdue
+  const brandData = analytics?.brands
+  const segmentData = analytics?.segmentation
+  const problematicData = analytics?.problematic
 
-  if (loadingDashboard) {
+  if (loading) {
     return (
       <div style={{ textAlign: 'center', padding: '100px' }}>
         <Spin size="large" />
@@ -122,11 +125,11 @@ function Analytics() {
             label: '📊 Огляд',
             children: (
               <Space direction="vertical" size="large" style={{ width: '100%' }}>
-                <Card title="Розподіл виручки за типом оренди" loading={loadingRevenue}>
+                <Card title="Розподіл виручки за типом оренди" loading={loading}>
                   {revenueData && <RevenueBreakdownChart data={revenueData} />}
                 </Card>
 
-                <Card title="Розподіл спорядження по типах" loading={loadingEquipment}>
+                <Card title="Розподіл спорядження по типах" loading={loading}>
                   {equipmentData && <EquipmentPieChart data={equipmentData.by_type} />}
                 </Card>
 
@@ -135,7 +138,7 @@ function Analytics() {
                     <Card title="Топ-10 спорядження за орендами">
                       <PopularEquipmentTable
                         data={equipmentData?.top_equipment || []}
-                        loading={loadingEquipment}
+                        loading={loading}
                       />
                     </Card>
                   </Col>
@@ -143,7 +146,7 @@ function Analytics() {
                     <Card title="Топ-10 клієнтів">
                       <TopCustomersTable
                         data={customersData?.top_customers || []}
-                        loading={loadingCustomers}
+                        loading={loading}
                       />
                     </Card>
                   </Col>
@@ -156,11 +159,11 @@ function Analytics() {
             label: '🏷️ Бренди',
             children: (
               <Space direction="vertical" size="large" style={{ width: '100%' }}>
-                <Card title="Виручка по брендах" loading={loadingBrands}>
+                <Card title="Виручка по брендах" loading={loading}>
                   {brandData && <BrandRevenueChart data={brandData.brands} />}
                 </Card>
 
-                <Card title="Детальна аналітика по брендах" loading={loadingBrands}>
+                <Card title="Детальна аналітика по брендах" loading={loading}>
                   {brandData && <BrandPerformanceTable data={brandData.brands} loading={false} />}
                 </Card>
               </Space>
@@ -171,14 +174,14 @@ function Analytics() {
             label: '👥 Клієнти',
             children: (
               <Space direction="vertical" size="large" style={{ width: '100%' }}>
-                <Card title="Сегментація клієнтів" loading={loadingSegments}>
+                <Card title="Сегментація клієнтів" loading={loading}>
                   {segmentData && <CustomerSegmentChart data={segmentData} />}
                 </Card>
 
                 {problematicData && problematicData.count > 0 && (
                   <Card
                     title={`Проблемні клієнти (${problematicData.count})`}
-                    loading={loadingProblematic}
+                    loading={loading}
                     extra={<span style={{ color: '#ff4d4f' }}>⚠️ Середня оцінка стану &lt; 3.0</span>}
                   >
                     <ProblematicCustomersTable